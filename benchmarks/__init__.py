@@ -0,0 +1,117 @@
+"""
+Benchmarks
+Scripts de medición ejecutables con `python -m <paquete>.benchmarks.<nombre>`
+"""
+import random
+import time
+from decimal import Decimal
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from ..calculator import OpeningData, ProductData
+
+if TYPE_CHECKING:  # SQLAlchemy solo hace falta en los benchmarks de base de datos
+    from sqlalchemy.engine import Engine
+
+
+OPENING_TYPES = ["window", "door", "sliding_door", "shower_enclosure", "partition", "skylight"]
+PRODUCT_TYPES = ["laminate_security", "solar_control", "vinyl_decorative", "privacy"]
+
+
+def synthetic_quotation(
+    openings_count: int,
+    products_count: int = 20,
+    seed: int = 42
+) -> Tuple[List[OpeningData], List[ProductData]]:
+    """
+    Generar aberturas y productos sintéticos reproducibles
+
+    Args:
+        openings_count: Cantidad de aberturas
+        products_count: Tamaño del catálogo del que se eligen productos
+        seed: Semilla del generador
+
+    Returns:
+        Tuple (aberturas, productos) alineadas por posición
+    """
+    rng = random.Random(seed)
+    catalog = [
+        ProductData(
+            product_id=f"prod-{index}",
+            product_type=PRODUCT_TYPES[index % len(PRODUCT_TYPES)],
+            sku=f"SKU-{index:04d}",
+            name=f"Film {index}",
+            price_per_sqm=Decimal(rng.randint(1500, 9000)) / 100,
+            installation_per_sqm=Decimal(rng.randint(500, 2500)) / 100,
+            specifications={"heat_rejection": rng.randint(20, 80)},
+        )
+        for index in range(products_count)
+    ]
+
+    openings: List[OpeningData] = []
+    products: List[ProductData] = []
+    for index in range(openings_count):
+        floor = rng.randint(1, 12)
+        openings.append(OpeningData(
+            opening_id=f"open-{index}",
+            opening_type=rng.choice(OPENING_TYPES),
+            width=Decimal(rng.randint(40, 300)) / 100,
+            height=Decimal(rng.randint(40, 300)) / 100,
+            quantity=rng.randint(1, 4),
+            specifications={
+                "floor": floor,
+                "difficult_access": rng.random() < 0.1,
+                "curved": rng.random() < 0.05,
+                "irregular_shape": rng.random() < 0.05,
+                "requires_scaffolding": floor > 6 and rng.random() < 0.5,
+            },
+            room_name=f"Ambiente {index // 8}",
+            floor=floor,
+        ))
+        products.append(rng.choice(catalog))
+    return openings, products
+
+
+def best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    """Mejor tiempo (segundos) de varias ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+_SQLITE_JSONB_REGISTERED = False
+
+
+def register_sqlite_jsonb() -> None:
+    """Compilar JSONB como JSON en SQLite para poder crear el esquema (idempotente)"""
+    global _SQLITE_JSONB_REGISTERED
+    if _SQLITE_JSONB_REGISTERED:
+        return
+
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, "sqlite")
+    def _compile_jsonb_sqlite(type_, compiler, **kw):
+        return "JSON"
+
+    _SQLITE_JSONB_REGISTERED = True
+
+
+def benchmark_engine(database_url: Optional[str]) -> "Engine":
+    """
+    Motor para benchmarks: database_url o, si no se indica, SQLite en memoria
+    con JSONB compilado como JSON para poder crear el esquema
+
+    Args:
+        database_url: URL de la base (None para SQLite en memoria)
+    """
+    from sqlalchemy import create_engine
+
+    if database_url:
+        return create_engine(database_url)
+
+    register_sqlite_jsonb()
+    return create_engine("sqlite://")
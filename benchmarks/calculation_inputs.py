@@ -0,0 +1,203 @@
+"""
+Benchmark: load_calculation_inputs (Core) frente a la carga por el ORM
+
+Crea una cotización con --openings aberturas (2.000 por defecto) y compara
+la carga de OpeningData/ProductData con la consulta Core contra hidratar
+QuotationItem, Opening, Room, Product y ProductPrice con selectinload.
+Sin --database-url usa SQLite en memoria.
+
+    python -m <paquete>.benchmarks.calculation_inputs [--database-url postgresql://...]
+"""
+import argparse
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import (
+    Base,
+    Customer,
+    CustomerType,
+    Opening,
+    OpeningType,
+    Product,
+    ProductCategory,
+    ProductPrice,
+    ProductType,
+    Property,
+    PropertyType,
+    Quotation,
+    QuotationItem,
+    Room,
+    RoomType,
+    VerticalType,
+)
+from ..calculation_inputs import load_calculation_inputs
+from ..calculator import OpeningData, ProductData
+from . import benchmark_engine, best_of
+
+
+OPENINGS_PER_ROOM = 8
+
+
+def seed_quotation(session: Session, openings_count: int, products_count: int = 20, seed: int = 42) -> uuid.UUID:
+    """
+    Insertar una cotización residencial con sus ambientes, aberturas e items
+
+    Returns:
+        ID de la cotización creada
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    suffix = uuid.uuid4().hex[:8]
+
+    customer_id, quotation_id, property_id, category_id = (uuid.uuid4() for _ in range(4))
+    session.execute(Customer.__table__.insert().values(
+        id=customer_id, name=f"Cliente {suffix}", phone="011 4000-0000", customer_type=CustomerType.BUSINESS,
+    ))
+    session.execute(Quotation.__table__.insert().values(
+        id=quotation_id, quotation_number=f"BENCH-{suffix}", customer_id=customer_id,
+        vertical=VerticalType.RESIDENTIAL, subtotal=Decimal("0.00"), total=Decimal("0.00"),
+    ))
+    session.execute(Property.__table__.insert().values(
+        id=property_id, quotation_id=quotation_id, property_type=PropertyType.BUILDING, name="Edificio",
+    ))
+    session.execute(ProductCategory.__table__.insert().values(
+        id=category_id, name="Films", slug=f"films-{suffix}", vertical=VerticalType.RESIDENTIAL,
+    ))
+
+    product_ids = [uuid.uuid4() for _ in range(products_count)]
+    session.execute(Product.__table__.insert(), [
+        {
+            "id": product_id, "category_id": category_id, "sku": f"SKU-{suffix}-{index:04d}",
+            "name": f"Film {index}", "product_type": rng.choice(list(ProductType)),
+            "specifications": {"heat_rejection": rng.randint(20, 80)}, "active": True, "featured": False,
+        }
+        for index, product_id in enumerate(product_ids)
+    ])
+    prices = []
+    for product_id in product_ids:
+        # Un precio genérico vencido, uno genérico vigente y uno por vertical
+        for vertical, valid_from in (
+            (None, now - timedelta(days=400)),
+            (None, now - timedelta(days=30)),
+            (VerticalType.RESIDENTIAL, now - timedelta(days=10)),
+        ):
+            prices.append({
+                "id": uuid.uuid4(), "product_id": product_id, "vertical": vertical, "valid_from": valid_from,
+                "price_per_sqm": Decimal(rng.randint(1500, 9000)) / 100,
+                "installation_per_sqm": Decimal(rng.randint(500, 2500)) / 100,
+                "currency": "USD", "active": True,
+            })
+    session.execute(ProductPrice.__table__.insert(), prices)
+
+    rooms, openings, items = [], [], []
+    for index in range(openings_count):
+        if index % OPENINGS_PER_ROOM == 0:
+            room_id = uuid.uuid4()
+            rooms.append({
+                "id": room_id, "property_id": property_id, "name": f"Ambiente {index // OPENINGS_PER_ROOM}",
+                "room_type": rng.choice(list(RoomType)), "floor": rng.randint(1, 12),
+            })
+        floor = rooms[-1]["floor"]
+        width, height = Decimal(rng.randint(40, 300)) / 100, Decimal(rng.randint(40, 300)) / 100
+        opening_id = uuid.uuid4()
+        openings.append({
+            "id": opening_id, "room_id": room_id, "opening_type": rng.choice(list(OpeningType)),
+            "width": width, "height": height, "area": width * height, "quantity": rng.randint(1, 4),
+            "specifications": {"floor": floor, "difficult_access": rng.random() < 0.1},
+        })
+        items.append({
+            "id": uuid.uuid4(), "quotation_id": quotation_id, "opening_id": opening_id,
+            "product_id": rng.choice(product_ids), "quantity": width * height, "unit": "m²",
+            "unit_price": Decimal("0.00"), "subtotal": Decimal("0.00"),
+        })
+    session.execute(Room.__table__.insert(), rooms)
+    session.execute(Opening.__table__.insert(), openings)
+    session.execute(QuotationItem.__table__.insert(), items)
+    session.commit()
+    return quotation_id
+
+
+def load_with_orm(session: Session, quotation_id: uuid.UUID) -> Tuple[List[OpeningData], List[ProductData]]:
+    """Camino anterior: objetos del ORM y elección del precio en Python"""
+    now = datetime.now(timezone.utc)
+    quotation = session.get(Quotation, quotation_id)
+    items = session.scalars(
+        select(QuotationItem)
+        .where(QuotationItem.quotation_id == quotation_id)
+        .where(QuotationItem.opening_id.is_not(None))
+        .options(
+            selectinload(QuotationItem.opening).selectinload(Opening.room),
+            selectinload(QuotationItem.product).selectinload(Product.prices),
+        )
+    ).all()
+
+    openings, products = [], []
+    for item in items:
+        opening, product = item.opening, item.product
+        candidates = [
+            price for price in product.prices
+            if price.active
+            and _aware(price.valid_from) <= now
+            and (price.valid_until is None or _aware(price.valid_until) > now)
+            and price.vertical in (None, quotation.vertical)
+        ]
+        price = max(candidates, key=lambda p: (p.vertical is not None, _aware(p.valid_from)))
+        openings.append(OpeningData(
+            opening_id=str(opening.id), opening_type=opening.opening_type.value,
+            width=opening.width, height=opening.height, quantity=opening.quantity,
+            specifications=opening.specifications or {}, room_name=opening.room.name, floor=opening.room.floor,
+        ))
+        products.append(ProductData(
+            product_id=str(product.id), product_type=product.product_type.value, sku=product.sku,
+            name=product.name, price_per_sqm=price.price_per_sqm,
+            installation_per_sqm=price.installation_per_sqm, specifications=product.specifications or {},
+        ))
+    return openings, products
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona horaria
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--openings", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = benchmark_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        quotation_id = seed_quotation(session, args.openings)
+
+    def run_core():
+        with Session(engine) as session:
+            return load_calculation_inputs(session, quotation_id)
+
+    def run_orm():
+        with Session(engine) as session:
+            return load_with_orm(session, quotation_id)
+
+    core_openings, core_products = run_core()
+    orm_openings, orm_products = run_orm()
+    assert len(core_openings) == len(orm_openings) == args.openings
+    assert sorted(p.price_per_sqm for p in core_products) == sorted(p.price_per_sqm for p in orm_products)
+
+    core = best_of(run_core, args.repeat)
+    orm = best_of(run_orm, args.repeat)
+    print(f"{args.openings} aberturas ({engine.dialect.name})")
+    print(f"  ORM + selectinload: {orm * 1000:8.1f} ms")
+    print(f"  Core SELECT:        {core * 1000:8.1f} ms  ({orm / core:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark: generador de carga para el servidor de cálculo
+
+Levanta calculation_server en un subproceso por escenario y lo satura con
+--concurrency conexiones keep-alive durante --seconds segundos, cada una
+enviando cotizaciones de --openings aberturas. Reporta throughput, p50/p99
+y respuestas 503/504 con y sin micro-lotes, y un escenario con la cola
+acotada para ver la contrapresión. Como referencia mide lanzar un proceso
+por cálculo.
+
+    python -m <paquete>.benchmarks.calculation_server [--workers 4 --concurrency 64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict
+
+from . import synthetic_quotation
+
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+
+def request_body(openings_count: int, seed: int) -> bytes:
+    openings, products = synthetic_quotation(openings_count, seed=seed)
+    return json.dumps(
+        {"openings": [asdict(opening) for opening in openings], "products": [asdict(product) for product in products]},
+        default=str,
+    ).encode("utf-8")
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _environment():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+
+
+def start_server(port: int, *options: str) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", f"{PACKAGE}.calculation_server", "--port", str(port), *options],
+        stdout=subprocess.PIPE, env=_environment(),
+    )
+    process.stdout.readline()  # "Servidor de cálculo en ..."
+    return process
+
+
+def descendants(pid: int) -> set:
+    """Procesos descendientes de pid (vacío si no hay /proc)"""
+    children = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    found, pending = set(), [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.add(child)
+            pending.append(child)
+    return found
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    """Detener con SIGINT (cierre ordenado del pool) y verificar que no queden workers"""
+    workers = descendants(process.pid)
+    process.send_signal(signal.SIGINT)
+    process.wait(timeout=30)
+    # El forkserver recoge a los workers apenas después de que sale el servidor
+    deadline = time.perf_counter() + 5
+    while True:
+        alive = {pid for pid in workers if os.path.exists(f"/proc/{pid}")}
+        if not alive or time.perf_counter() > deadline:
+            break
+        time.sleep(0.05)
+    assert not alive, f"workers huérfanos del servidor: {sorted(alive)}"
+
+
+async def _exchange(reader, writer, request: bytes):
+    writer.write(request)
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    body = await reader.readexactly(length)
+    return int(status_line.split()[1]), body
+
+
+async def load(port: int, bodies, concurrency: int, seconds: float, deadline_ms: float):
+    latencies, statuses = [], Counter()
+    stop_at = time.perf_counter() + seconds
+
+    async def client(index: int):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = bodies[index % len(bodies)]
+        request = (
+            f"POST /calculate HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"X-Deadline-Ms: {deadline_ms:.0f}\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1") + body
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            status, _ = await _exchange(reader, writer, request)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if status == 503:
+                await asyncio.sleep(0.01)  # el cliente respeta Retry-After (acortado)
+        writer.close()
+
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    health_request = b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n"
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, health = await _exchange(reader, writer, health_request)
+    writer.close()
+    return sorted(latencies), statuses, json.loads(health)
+
+
+def scenario(label: str, bodies, args, concurrency: int, *options: str) -> None:
+    port = free_port()
+    server = start_server(port, "--workers", str(args.workers), *options)
+    try:
+        asyncio.run(load(port, bodies[:4], min(concurrency, 4), 0.5, args.deadline_ms))  # calentamiento
+        latencies, statuses, health = asyncio.run(load(port, bodies, concurrency, args.seconds, args.deadline_ms))
+    finally:
+        stop_server(server)
+    ok = statuses[200]
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"  {label:<34} {ok / args.seconds:7.0f} cot/s  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  "
+          f"503: {statuses[503]:5d}  504: {statuses[504]:4d}  lote medio {health['average_batch_size']:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--deadline-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    bodies = [request_body(args.openings, seed) for seed in range(32)]
+    print(f"{args.openings} aberturas por cotización, {args.workers} workers, {args.seconds:.0f} s por escenario")
+
+    spawn_script = (
+        f"import json, sys; from {PACKAGE}.calculation_server import _calculate_batch; "
+        f"_calculate_batch([sys.stdin.buffer.read()])"
+    )
+    start = time.perf_counter()
+    for body in bodies[:5]:
+        subprocess.run([sys.executable, "-c", spawn_script], input=body, env=_environment(), check=True)
+    print(f"  {'un proceso por cálculo':<34} {5 / (time.perf_counter() - start):7.0f} cot/s")
+
+    scenario("1 conexión", bodies, args, 1)
+    scenario(f"{args.concurrency} conexiones, sin lotes", bodies, args, args.concurrency, "--max-batch-size", "1")
+    scenario(f"{args.concurrency} conexiones, lotes de hasta 32", bodies, args, args.concurrency)
+    scenario(f"{args.concurrency * 4} conexiones, cola de 64", bodies, args, args.concurrency * 4, "--max-pending", "64")
+
+
+if __name__ == "__main__":
+    main()
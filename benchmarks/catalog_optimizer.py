@@ -0,0 +1,115 @@
+"""
+Benchmark: CatalogOptimizer con aberturas y catálogo sintéticos
+
+Optimiza --openings aberturas (200 por defecto) contra --products films
+(100 por defecto) y compara con elegir el producto más barato por abertura,
+que ignora los escalones de descuento por volumen. Repite con un único
+escalón --tight-tier-pct por encima del área de esa asignación, el caso en
+que hay que ganar poca área eligiendo entre muchas combinaciones.
+
+    python -m <paquete>.benchmarks.catalog_optimizer [--openings 200 --products 100]
+"""
+import argparse
+import random
+import time
+from dataclasses import replace
+from decimal import Decimal
+
+from ..calculator import OpeningData, ProductData, QuotationCalculator
+from ..catalog_optimizer import CatalogOptimizer, OptimizationConstraints
+
+
+OPENING_TYPES = ["window", "door", "sliding_door", "partition", "skylight", "curtain_wall"]
+PRODUCT_TYPES = ["laminate_security", "solar_control", "vinyl_decorative", "privacy"]
+ROOMS = ["Living", "Cocina", "Dormitorio", "Oficina", "Baño"]
+
+
+def synthetic_openings(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        OpeningData(
+            opening_id=f"opening-{index}",
+            opening_type=rng.choice(OPENING_TYPES),
+            width=Decimal(str(round(rng.uniform(0.4, 1.6), 2))),
+            height=Decimal(str(round(rng.uniform(0.5, 1.4), 2))),
+            quantity=rng.choice([1, 1, 1, 2]),
+            specifications={"floor": rng.randint(1, 8), "difficult_access": rng.random() < 0.1},
+            room_name=rng.choice(ROOMS),
+            floor=1,
+        )
+        for index in range(count)
+    ]
+
+
+def synthetic_products(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        ProductData(
+            product_id=f"film-{index}",
+            product_type=rng.choice(PRODUCT_TYPES),
+            sku=f"SKU-{index:04d}",
+            name=f"Film {index}",
+            price_per_sqm=Decimal(str(round(rng.uniform(18, 60), 2))),
+            installation_per_sqm=Decimal(str(round(rng.uniform(8, 20), 2))),
+            specifications={"heat_rejection": rng.randint(20, 80)},
+        )
+        for index in range(count)
+    ]
+
+
+def cheapest_per_opening(calculator, openings, products, constraints):
+    chosen = []
+    for opening in openings:
+        allowed = [product for product in products if constraints.allows(opening, product)]
+        chosen.append(min(allowed, key=lambda product: calculator.calculate_item(opening, product).item_subtotal))
+    return chosen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=200)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--min-heat-rejection", type=int, default=40)
+    parser.add_argument("--tight-tier-pct", type=Decimal, default=Decimal("1"))
+    args = parser.parse_args()
+
+    openings = synthetic_openings(args.openings)
+    products = synthetic_products(args.products)
+    constraints = OptimizationConstraints(
+        min_specifications={"heat_rejection": Decimal(args.min_heat_rejection)},
+        room_product_types={"Baño": {"privacy", "vinyl_decorative"}},
+    )
+    calculator = QuotationCalculator()
+
+    start = time.perf_counter()
+    naive_products = cheapest_per_opening(calculator, openings, products, constraints)
+    naive = calculator.calculate_quotation(openings, naive_products)
+    naive_s = time.perf_counter() - start
+
+    result = CatalogOptimizer(calculator).optimize(openings, products, constraints)
+    print(f"{args.openings} aberturas x {args.products} films")
+    print(f"  más barato por abertura: {naive.total} ({naive.total_final_area} m², "
+          f"descuento {naive.volume_discount_percentage:.0%}), {naive_s * 1000:.0f} ms")
+    report(result)
+    print(f"  candidatos {result.candidates} -> {result.candidates_after_pruning} tras podar dominados")
+    for alternative in result.alternatives:
+        print(f"  alternativa: {alternative.total} ({alternative.result.total_final_area} m², "
+              f"escalón {alternative.target_area} m²)")
+
+    # Escalón apenas por encima del área más barata
+    threshold = (naive.total_final_area * (1 + args.tight_tier_pct / 100)).quantize(Decimal("0.01"))
+    tight = QuotationCalculator(rules=replace(calculator.rules, volume_discounts=((threshold, Decimal("0.10")),)))
+    result = CatalogOptimizer(tight).optimize(openings, products, constraints)
+    print(f"escalón único de 10% en {threshold} m² (+{args.tight_tier_pct}% sobre el más barato)")
+    report(result)
+    assert result.best.total <= tight.calculate_quotation(openings, naive_products).total, "peor que el más barato"
+
+
+def report(result) -> None:
+    best = result.best.result
+    print(f"  optimizador: {best.total} ({best.total_final_area} m², descuento {best.volume_discount_percentage:.0%}), "
+          f"{result.duration_s * 1000:.0f} ms, {result.states} estados")
+
+
+if __name__ == "__main__":
+    main()
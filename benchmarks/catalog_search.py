@@ -0,0 +1,169 @@
+"""
+Benchmark: search_catalog frente a contención JSONB + filtrado en Python
+
+Requiere PostgreSQL. Carga --skus productos (50k por defecto) con
+especificaciones aleatorias y compara, para filtros de rango y faceta
+típicos, la consulta sobre columnas generadas indexadas contra el camino
+anterior (specifications @> {...} y el resto de los filtros y los
+conteos de facetas en Python).
+
+    python -m <paquete>.benchmarks.catalog_search --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from ..models import Base, Product, ProductCategory, ProductFacetCount, ProductType, VerticalType
+from ..catalog_search import NUMERIC_FACETS, CatalogFilters, rebuild_facet_counts, search_catalog
+
+
+COLORS = ["charcoal", "bronze", "silver", "blue", "green", "neutral", "frosted"]
+MATERIALS = ["polyester", "vinyl", "ceramic", "nano_carbon"]
+
+SEED_BATCH_SIZE = 5000
+
+
+def _specifications(rng: random.Random) -> dict:
+    return {
+        "material": rng.choice(MATERIALS),
+        "color": rng.choice(COLORS),
+        "opacity": rng.randint(0, 100),
+        "uv_protection": rng.choice([95, 97, 99, 99.9]),
+        "heat_rejection": rng.randint(10, 90),
+        "visible_light_transmission": rng.randint(5, 80),
+        "thickness_microns": rng.choice([50, 100, 150, 200, 300]),
+        "warranty_years": rng.randint(1, 15),
+        "scratch_resistant": rng.random() < 0.5,
+        "anti_fade": rng.random() < 0.5,
+    }
+
+
+def seed(session: Session, count: int, rng: random.Random) -> None:
+    categories = ProductCategory.__table__
+    category_ids = []
+    for vertical in VerticalType:
+        category_id = uuid.uuid4()
+        session.execute(categories.insert().values(
+            id=category_id, name=f"Bench {vertical.value}", slug=f"bench-{vertical.value}-{category_id.hex[:8]}",
+            vertical=vertical,
+        ))
+        category_ids.append(category_id)
+
+    table = Product.__table__
+    existing = session.scalar(select(func.count()).select_from(table))
+    for start in range(existing, count, SEED_BATCH_SIZE):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "category_id": rng.choice(category_ids),
+                "sku": f"BENCH-{index:07d}",
+                "name": f"Film {index}",
+                "product_type": rng.choice(list(ProductType)),
+                "specifications": _specifications(rng),
+                "active": rng.random() < 0.95,
+                "featured": False,
+            }
+            for index in range(start, min(count, start + SEED_BATCH_SIZE))
+        ]
+        session.execute(table.insert(), rows)
+        session.commit()
+    rebuild_facet_counts(session)
+    session.commit()
+    session.execute(text("ANALYZE products"))
+    session.execute(text("ANALYZE product_facet_counts"))
+    session.commit()
+
+
+def legacy_search(session: Session, filters: CatalogFilters) -> Dict[str, Counter]:
+    """Camino anterior: contención JSONB sin índice y el resto en Python"""
+    containment = {name: values[0] for name, values in filters.values.items() if len(values) == 1}
+    stmt = (
+        select(Product.__table__.c.sku, Product.__table__.c.specifications)
+        .join(ProductCategory.__table__)
+        .where(Product.__table__.c.active.is_(True))
+    )
+    if filters.vertical is not None:
+        stmt = stmt.where(ProductCategory.__table__.c.vertical == filters.vertical)
+    if filters.product_type is not None:
+        stmt = stmt.where(Product.__table__.c.product_type == filters.product_type)
+    if containment:
+        stmt = stmt.where(Product.__table__.c.specifications.contains(containment))
+
+    matches = []
+    for sku, specs in session.execute(stmt):
+        ok = True
+        for name, (low, high) in filters.ranges.items():
+            value = specs.get(name)
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                ok = False
+                break
+        if ok and all(specs.get(name) in values for name, values in filters.values.items()):
+            matches.append((sku, specs))
+
+    facets: Dict[str, Counter] = {name: Counter() for name in NUMERIC_FACETS}
+    for _, specs in matches:
+        for name, width in NUMERIC_FACETS.items():
+            if specs.get(name) is not None:
+                facets[name][str(int(specs[name] // width * width))] += 1
+    return facets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--skus", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    rng = random.Random(11)
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(
+        engine, tables=[ProductCategory.__table__, Product.__table__, ProductFacetCount.__table__]
+    )
+
+    with Session(engine) as session:
+        start = time.perf_counter()
+        seed(session, args.skus, rng)
+        print(f"seed: {time.perf_counter() - start:.1f}s")
+
+        scenarios = {
+            "sin filtros": lambda: CatalogFilters(product_type=rng.choice(list(ProductType))),
+            "heat>=60": lambda: CatalogFilters(ranges={"heat_rejection": (60, None)}),
+            "heat+vlt": lambda: CatalogFilters(
+                ranges={"heat_rejection": (60, None), "visible_light_transmission": (None, 20)}
+            ),
+            "color+garantía": lambda: CatalogFilters(
+                vertical=rng.choice(list(VerticalType)),
+                ranges={"warranty_years": (10, None)},
+                values={"color": [rng.choice(COLORS)]},
+            ),
+        }
+        print(f"{'escenario':>16} {'facetado p50':>13} {'p95':>8} {'anterior p50':>13} {'p95':>8}")
+        for label, make_filters in scenarios.items():
+            faceted, legacy = [], []
+            for _ in range(args.queries):
+                filters = make_filters()
+                began = time.perf_counter()
+                search_catalog(session, filters)
+                faceted.append((time.perf_counter() - began) * 1000)
+                began = time.perf_counter()
+                legacy_search(session, filters)
+                legacy.append((time.perf_counter() - began) * 1000)
+            print(
+                f"{label:>16} {statistics.median(faceted):>13.2f} {statistics.quantiles(faceted, n=20)[-1]:>8.2f} "
+                f"{statistics.median(legacy):>13.2f} {statistics.quantiles(legacy, n=20)[-1]:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
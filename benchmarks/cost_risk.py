@@ -0,0 +1,50 @@
+"""
+Benchmark: estimate_cost_risk sobre una cotización sintética
+
+Mide --draws muestras (10.000 y 100.000 por defecto) para una cotización de
+--openings items (500 por defecto) y verifica que, sin incertidumbre, todas
+las muestras den el total de calculate_quotation.
+
+    python -m <paquete>.benchmarks.cost_risk [--openings 500]
+"""
+import argparse
+import random
+
+from ..calculator import QuotationCalculator
+from ..cost_risk import UncertaintyModel, estimate_cost_risk
+from .catalog_optimizer import synthetic_openings, synthetic_products
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=500)
+    parser.add_argument("--draws", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    openings = synthetic_openings(args.openings)
+    for opening in openings:
+        opening.specifications["irregular_shape"] = rng.random() < 0.1
+        opening.specifications["curved"] = rng.random() < 0.05
+    catalog = synthetic_products(100)
+    products = [rng.choice(catalog) for _ in openings]
+    calculator = QuotationCalculator()
+
+    exact = estimate_cost_risk(
+        openings, products, draws=1000, model=UncertaintyModel(0.0, 0.0, {}), seed=1, calculator=calculator
+    )
+    print(f"{args.openings} items, total cotizado {exact.quoted_total}")
+    print(f"  sin incertidumbre: p50={exact.percentiles[50]} p95={exact.percentiles[95]} "
+          f"(coincide: {exact.percentiles[50] == exact.percentiles[95] == exact.quoted_total})")
+
+    for draws in args.draws:
+        estimate_cost_risk(openings, products, draws=draws, seed=1, calculator=calculator)  # calentamiento
+        estimate = estimate_cost_risk(openings, products, draws=draws, seed=1, calculator=calculator)
+        print(f"  {draws} muestras: {estimate.duration_s * 1000:.0f} ms, "
+              f"p50={estimate.percentiles[50]} p90={estimate.percentiles[90]} p95={estimate.percentiles[95]}, "
+              f"P(sobrecosto)={estimate.overrun_probability:.2f}, "
+              f"P(sube escalón)={estimate.tier_up_probability:.3f}, P(baja escalón)={estimate.tier_down_probability:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: find_duplicates y apply_merge_proposals sobre clientes sintéticos
+
+La detección corre en memoria sobre --customers registros (1M por defecto)
+con un --duplicate-rate de altas repetidas (otro formato de email, alta por
+WhatsApp, nombre con o sin acentos). La fusión se mide sobre --merge-customers
+clientes con cotizaciones en la base (SQLite en memoria sin --database-url).
+
+    python -m <paquete>.benchmarks.customer_dedup [--customers 1000000]
+"""
+import argparse
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Base, Customer, CustomerType, Quotation, QuotationStatus, VerticalType
+from ..customer_dedup import apply_merge_proposals, customer_record, find_duplicates, load_customer_records
+from . import benchmark_engine
+
+
+FIRST_NAMES = ["Juan", "María", "Carlos", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Pablo", "Camila"]
+LAST_NAMES = ["González", "Rodríguez", "Fernández", "López", "Martínez", "Pérez", "García", "Sánchez", "Romero", "Díaz"]
+DOMAINS = ["gmail.com", "hotmail.com", "yahoo.com.ar", "outlook.com"]
+
+START = datetime(2023, 1, 1)
+
+
+def _person(rng: random.Random, index: int) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "id": uuid.uuid4(),
+        "created_at": START + timedelta(minutes=index),
+        "name": f"{first} {last} {rng.choice(LAST_NAMES)}",
+        "email": f"{first.lower()}.{last.lower()}{index}@{rng.choice(DOMAINS)}",
+        "phone_normalized": f"+54911{rng.randint(10000000, 99999999)}",
+        "whatsapp_normalized": None,
+        "tax_id": None,
+        "company_name": None,
+    }
+
+
+def _duplicate(rng: random.Random, original: dict, index: int) -> dict:
+    copy = dict(original, id=uuid.uuid4(), created_at=START + timedelta(minutes=index))
+    variant = rng.randrange(3)
+    if variant == 0:
+        # Alta por WhatsApp: mismo número, sin email
+        copy.update(whatsapp_normalized=original["phone_normalized"], phone_normalized=None, email=None)
+    elif variant == 1:
+        # Mismo email con otro formato, otro teléfono
+        local, domain = original["email"].split("@")
+        copy.update(email=f"{local.replace('.', '')}+web{index}@{domain}",
+                    phone_normalized=f"+54911{rng.randint(10000000, 99999999)}")
+    else:
+        # Nombre sin acentos, mismo teléfono
+        copy.update(name=original["name"].replace("í", "i").replace("á", "a").replace("é", "e"), email=None)
+    return copy
+
+
+def synthetic_customers(count: int, duplicate_rate: float, seed: int = 42):
+    rng = random.Random(seed)
+    rows, originals = [], []
+    for index in range(count):
+        if originals and rng.random() < duplicate_rate:
+            rows.append(_duplicate(rng, rng.choice(originals), index))
+        else:
+            originals.append(_person(rng, index))
+            rows.append(originals[-1])
+    return rows
+
+
+def _record(row: dict):
+    return customer_record(
+        row["id"], row["created_at"], row["name"], row["email"], row["phone_normalized"],
+        row["whatsapp_normalized"], row["tax_id"], row["company_name"],
+    )
+
+
+def bench_detection(count: int, duplicate_rate: float) -> None:
+    rows = synthetic_customers(count, duplicate_rate)
+    start = time.perf_counter()
+    records = [_record(row) for row in rows]
+    normalize_s = time.perf_counter() - start
+    report = find_duplicates(records)
+    duplicates = sum(len(proposal.duplicate_ids) for proposal in report.proposals)
+    print(f"Detección: {count} clientes")
+    print(f"  normalización {normalize_s:.1f}s, detección {report.duration_s:.1f}s")
+    print(f"  {report.candidate_pairs} pares candidatos, {report.matched_pairs} coincidencias")
+    print(f"  {len(report.proposals)} propuestas, {duplicates} duplicados "
+          f"({report.skipped_blocks} bloques y {report.skipped_clusters} grupos descartados)")
+
+
+def bench_merge(database_url, count: int, duplicate_rate: float) -> None:
+    engine = benchmark_engine(database_url)
+    Base.metadata.create_all(engine)
+    rows = synthetic_customers(count, duplicate_rate, seed=7)
+    with Session(engine) as session:
+        session.execute(Customer.__table__.insert(), [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "email": row["email"],
+                "phone": row["phone_normalized"] or row["whatsapp_normalized"],
+                "whatsapp": row["whatsapp_normalized"],
+                "phone_normalized": row["phone_normalized"],
+                "whatsapp_normalized": row["whatsapp_normalized"],
+                "customer_type": CustomerType.INDIVIDUAL,
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ])
+        session.execute(Quotation.__table__.insert(), [
+            {
+                "id": uuid.uuid4(),
+                "quotation_number": f"COT-BENCH-{index:08d}",
+                "customer_id": row["id"],
+                "vertical": VerticalType.RESIDENTIAL,
+                "status": QuotationStatus.PENDING,
+                "subtotal": 100, "discount_amount": 0, "tax_amount": 21, "total": 121,
+            }
+            for index, row in enumerate(rows)
+        ])
+        session.commit()
+
+        records = load_customer_records(session)
+        proposals = find_duplicates(records).proposals
+        start = time.perf_counter()
+        report = apply_merge_proposals(session, proposals)
+        elapsed = time.perf_counter() - start
+        remaining = session.scalar(select(func.count()).select_from(Customer.__table__))
+
+    print(f"Fusión: {count} clientes ({engine.dialect.name})")
+    print(f"  {report.customers_merged} fusionados, {report.quotations_reassigned} cotizaciones reasignadas, "
+          f"{report.statements} sentencias, {elapsed:.2f}s; quedan {remaining} clientes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--merge-customers", type=int, default=50_000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    bench_detection(args.customers, args.duplicate_rate)
+    if args.merge_customers:
+        bench_merge(args.database_url, args.merge_customers, args.duplicate_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: search_customers sobre una tabla de clientes sintética
+
+Requiere PostgreSQL con pg_trgm. Carga --customers clientes (1M por defecto)
+con teléfonos en formatos variados y mide latencias de la primera página y
+de la siguiente vía cursor.
+
+    python -m <paquete>.benchmarks.customer_search --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from ..models import Base, Customer, CustomerType
+from ..customer_search import ensure_search_extensions, search_customers
+from ..phones import normalize_phone
+
+
+FIRST_NAMES = ["Juan", "María", "Carlos", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Pablo", "Camila"]
+LAST_NAMES = ["González", "Rodríguez", "Fernández", "López", "Martínez", "Pérez", "García", "Sánchez", "Romero", "Díaz"]
+COMPANIES = ["Vidrios", "Cristalería", "Constructora", "Inmobiliaria", "Estudio", "Logística"]
+PHONE_FORMATS = ["011 {a}-{b}", "+54 9 11 {a} {b}", "(011) {a}{b}", "11{a}{b}", "15-{a}-{b}"]
+
+SEED_BATCH_SIZE = 10000
+
+
+def _customer_row(rng: random.Random, index: int) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    a, b = f"{rng.randint(1000, 9999)}", f"{rng.randint(1000, 9999)}"
+    phone = rng.choice(PHONE_FORMATS).format(a=a, b=b)
+    whatsapp = f"+54911{a}{b}" if rng.random() < 0.7 else None
+    business = rng.random() < 0.3
+    return {
+        "id": uuid.uuid4(),
+        "name": f"{first} {last} {index}",
+        "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+        "phone": phone,
+        "whatsapp": whatsapp,
+        "phone_normalized": normalize_phone(phone),
+        "whatsapp_normalized": normalize_phone(whatsapp),
+        "customer_type": CustomerType.BUSINESS if business else CustomerType.INDIVIDUAL,
+        "company_name": f"{rng.choice(COMPANIES)} {last} SA" if business else None,
+    }
+
+
+def seed(session: Session, count: int, rng: random.Random) -> None:
+    existing = session.scalar(select(func.count()).select_from(Customer.__table__))
+    table = Customer.__table__
+    for start in range(existing, count, SEED_BATCH_SIZE):
+        rows = [_customer_row(rng, index) for index in range(start, min(count, start + SEED_BATCH_SIZE))]
+        session.execute(table.insert(), rows)
+        session.commit()
+    session.execute(text("ANALYZE customers"))
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    # Todos los formatos del mismo celular deben dar la clave del wa_id
+    keys = {normalize_phone(phone_format.format(a="2345", b="6789")) for phone_format in PHONE_FORMATS}
+    assert keys == {normalize_phone("+5491123456789")}, f"claves distintas por formato: {sorted(keys)}"
+
+    rng = random.Random(7)
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        ensure_search_extensions(connection)
+    Base.metadata.create_all(engine, tables=[Customer.__table__])
+
+    with Session(engine) as session:
+        start = time.perf_counter()
+        seed(session, args.customers, rng)
+        print(f"seed: {time.perf_counter() - start:.1f}s")
+
+        queries = {
+            "name": lambda: rng.choice(FIRST_NAMES) + " " + rng.choice(LAST_NAMES)[:4],
+            "email": lambda: f"{rng.choice(LAST_NAMES).lower()}{rng.randint(1, args.customers)}@",
+            "company": lambda: rng.choice(COMPANIES)[:6],
+            "phone_fragment": lambda: f"{rng.randint(1000, 9999)}",
+            "phone_full": lambda: rng.choice(PHONE_FORMATS).format(
+                a=rng.randint(1000, 9999), b=rng.randint(1000, 9999)
+            ),
+        }
+        print(f"{'query':>15} {'p50 ms':>8} {'p95 ms':>8} {'next p50':>9}")
+        for label, make_query in queries.items():
+            first_page, next_page = [], []
+            for _ in range(args.queries):
+                query = make_query()
+                began = time.perf_counter()
+                page = search_customers(session, query)
+                first_page.append((time.perf_counter() - began) * 1000)
+                if page.next_cursor:
+                    began = time.perf_counter()
+                    search_customers(session, query, cursor=page.next_cursor)
+                    next_page.append((time.perf_counter() - began) * 1000)
+            p95 = statistics.quantiles(first_page, n=20)[-1]
+            next_p50 = statistics.median(next_page) if next_page else 0.0
+            print(f"{label:>15} {statistics.median(first_page):>8.2f} {p95:>8.2f} {next_p50:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
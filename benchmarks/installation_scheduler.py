@@ -0,0 +1,92 @@
+"""
+Benchmark: schedule_jobs con trabajos y cuadrillas sintéticos
+
+Genera --jobs trabajos (10.000 por defecto) con áreas, factores de
+complejidad y habilidades como los del calculador, y los planifica en
+--crews cuadrillas (50 por defecto). Muestra el tiempo del greedy, la mejora
+de la búsqueda local y los atrasos.
+
+    python -m <paquete>.benchmarks.installation_scheduler [--jobs 10000 --crews 50]
+"""
+import argparse
+import random
+
+from ..installation_scheduler import (
+    SETUP_HOURS,
+    SKILL_CURVED_GLASS,
+    SKILL_NIGHT_INSTALL,
+    SKILL_SCAFFOLDING,
+    Crew,
+    InstallationJob,
+    item_crew_hours,
+    schedule_jobs,
+)
+
+
+def synthetic_jobs(count: int, horizon_days: int, seed: int = 42):
+    rng = random.Random(seed)
+    jobs = []
+    for index in range(count):
+        area = rng.lognormvariate(2.0, 0.7)  # mediana ~7 m²
+        skills = set()
+        complexity = 1.0
+        if rng.random() < 0.15:
+            skills.add(SKILL_SCAFFOLDING)
+            complexity *= 1.4
+        if rng.random() < 0.05:
+            skills.add(SKILL_CURVED_GLASS)
+            complexity *= 1.5
+        if rng.random() < 0.08:
+            skills.add(SKILL_NIGHT_INSTALL)
+            complexity *= 1.25
+        release = rng.randrange(horizon_days)
+        jobs.append(InstallationJob(
+            job_id=f"job-{index}",
+            crew_hours=SETUP_HOURS + item_crew_hours(area, complexity),
+            skills=frozenset(skills),
+            release_day=release,
+            deadline_day=release + rng.choice([2, 5, 7, 15]),
+            area_sqm=area,
+        ))
+    return jobs
+
+
+def synthetic_crews(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    crews = []
+    for index in range(count):
+        skills = {skill for skill, share in (
+            (SKILL_SCAFFOLDING, 0.4), (SKILL_CURVED_GLASS, 0.2), (SKILL_NIGHT_INSTALL, 0.25)
+        ) if rng.random() < share}
+        crews.append(Crew(f"crew-{index}", frozenset(skills), rng.choice([8.0, 8.0, 9.0])))
+    return crews
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--crews", type=int, default=50)
+    parser.add_argument("--horizon-days", type=int, default=90)
+    parser.add_argument("--improve-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    jobs = synthetic_jobs(args.jobs, args.horizon_days)
+    crews = synthetic_crews(args.crews)
+    total_hours = sum(job.crew_hours for job in jobs)
+    capacity = sum(crew.hours_per_day for crew in crews) * args.horizon_days
+    print(f"{len(jobs)} trabajos ({total_hours:.0f} h), {len(crews)} cuadrillas "
+          f"({capacity:.0f} h en {args.horizon_days} días)")
+
+    greedy = schedule_jobs(jobs, crews, improve_seconds=0)
+    print(f"  greedy: {greedy.duration_s:.2f}s, {greedy.late_jobs} atrasados "
+          f"({greedy.total_late_days} días), {greedy.makespan_days} días")
+    improved = schedule_jobs(jobs, crews, improve_seconds=args.improve_seconds)
+    print(f"  greedy + búsqueda local: {improved.duration_s:.2f}s, {improved.moves} movimientos, "
+          f"{improved.late_jobs} atrasados ({improved.total_late_days} días), {improved.makespan_days} días, "
+          f"costo {improved.greedy_cost:.0f} -> {improved.final_cost:.0f}")
+    if improved.unassigned:
+        print(f"  {len(improved.unassigned)} sin cuadrilla habilitada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""
+Benchmark: prueba de carga de punta a punta
+
+Crea el esquema desde Base.metadata (SQLite en un archivo temporal sin
+--database-url; también sirve un PostgreSQL local sin contenedor, ej:
+initdb + pg_ctl), siembra clientes, catálogo y precios y reproduce durante
+--seconds segundos, con --concurrency hilos, una mezcla de operaciones:
+
+- create: alta de una cotización con ambientes y aberturas, cálculo y guardado
+- edit: cambio de medidas de algunas aberturas, recálculo y guardado por diferencias
+- browse: búsqueda facetada del catálogo (dos páginas)
+- webhook: ráfaga de --burst mensajes entrantes de WhatsApp de un mismo remitente
+
+Reporta throughput y p50/p95/p99 por operación (webhook por mensaje), la
+espera por locks (en SQLite, el BEGIN IMMEDIATE de cada escritura; en
+PostgreSQL, muestreo de pg_stat_activity) y la espera por conexiones del
+pool con las métricas de database.py.
+
+    python -m <paquete>.benchmarks.load_test [--mix create=2,edit=3,browse=4,webhook=1 --concurrency 8]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, event, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from ..models import (
+    Base,
+    Customer,
+    CustomerType,
+    MessageDirection,
+    Opening,
+    OpeningType,
+    Product,
+    ProductCategory,
+    ProductPrice,
+    ProductType,
+    Property,
+    PropertyType,
+    Quotation,
+    QuotationItem,
+    Room,
+    RoomType,
+    VerticalType,
+    WhatsAppConversation,
+    WhatsAppMessage,
+)
+from ..calculation_inputs import load_calculation_inputs
+from ..calculator import QuotationCalculator
+from ..catalog_search import CatalogFilters, rebuild_facet_counts, search_catalog
+from ..database import AppSession, Database, DatabaseSettings, pool_status
+from ..quotation_clone import generate_quotation_number
+from ..quotation_persistence import save_calculation
+from ..whatsapp_matching import WhatsAppSenderResolver
+from . import register_sqlite_jsonb
+
+
+OPERATIONS = ("create", "edit", "browse", "webhook")
+
+# Operaciones que escriben: en SQLite abren la transacción con BEGIN IMMEDIATE
+WRITE_OPERATIONS = frozenset({"create", "edit", "webhook"})
+
+DEFAULT_MIX = "create=2,edit=3,browse=4,webhook=1"
+
+OPENINGS_PER_ROOM = 8
+
+COLORS = ["charcoal", "bronze", "silver", "blue", "neutral", "frosted"]
+MATERIALS = ["polyester", "vinyl", "ceramic", "nano_carbon"]
+
+
+# ============================================================================
+# MEASUREMENTS
+# ============================================================================
+
+@dataclass
+class OperationStats:
+    """Mediciones de una operación (acumuladas por hilo y luego combinadas)"""
+    writes: bool
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    lock_wait_s: float = 0.0
+
+    def merge(self, other: "OperationStats") -> None:
+        self.latencies.extend(other.latencies)
+        for name, count in other.errors.items():
+            self.errors[name] = self.errors.get(name, 0) + count
+        self.lock_wait_s += other.lock_wait_s
+
+    def percentile_ms(self, percentile: float) -> float:
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))] * 1000
+
+
+# Operación en curso en este hilo: el listener de BEGIN le imputa la espera
+_current: ContextVar[Optional[OperationStats]] = ContextVar("load_test_operation", default=None)
+
+
+def instrument_sqlite(engine, busy_timeout_ms: int) -> None:
+    """
+    WAL y BEGIN explícito en SQLite: las escrituras toman el lock al empezar
+    (BEGIN IMMEDIATE) y el tiempo de ese BEGIN es la espera por el lock
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None  # el BEGIN lo emite _on_begin
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(connection):
+        stats = _current.get()
+        if stats is None or not stats.writes:
+            connection.exec_driver_sql("BEGIN")
+            return
+        start = time.perf_counter()
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        stats.lock_wait_s += time.perf_counter() - start
+
+
+class LockWaitSampler(threading.Thread):
+    """Muestrea en PostgreSQL las sesiones esperando un lock (segundos-sesión estimados)"""
+
+    def __init__(self, database_url: str, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.engine = create_engine(database_url, poolclass=NullPool)
+        self.interval = interval
+        self.waiting_s = 0.0
+        self.max_waiting = 0
+        self._stop = threading.Event()
+
+    def run(self) -> None:
+        query = text(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE wait_event_type = 'Lock' AND datname = current_database()"
+        )
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            while not self._stop.wait(self.interval):
+                waiting = connection.execute(query).scalar()
+                self.waiting_s += waiting * self.interval
+                self.max_waiting = max(self.max_waiting, waiting)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.join()
+        self.engine.dispose()
+
+
+# ============================================================================
+# SEED
+# ============================================================================
+
+@dataclass
+class LoadContext:
+    """Datos sembrados y objetos compartidos por los hilos"""
+    db: Database
+    calculator: QuotationCalculator
+    resolver: WhatsAppSenderResolver
+    customer_ids: List[uuid.UUID]
+    product_ids: List[uuid.UUID]
+    senders: List[str]  # wa_id de clientes conocidos y desconocidos
+    openings_per_quote: int
+    quotation_ids: List[uuid.UUID] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_quotation(self, quotation_id: uuid.UUID) -> None:
+        with self._lock:
+            self.quotation_ids.append(quotation_id)
+
+
+def _wa_id(rng: random.Random) -> str:
+    return f"54911{rng.randint(10000000, 99999999)}"
+
+
+def seed(db: Database, customers: int, products: int, rng: random.Random) -> Tuple[List, List, List[str]]:
+    """
+    Sembrar clientes, categorías, productos con especificaciones y precios
+
+    Returns:
+        Tuple (IDs de clientes, IDs de productos, wa_id de remitentes)
+    """
+    now = datetime.now(timezone.utc)
+    customer_rows, senders = [], []
+    for index in range(customers):
+        wa_id = _wa_id(rng)
+        senders.append(wa_id)
+        customer_rows.append({
+            "id": uuid.uuid4(), "name": f"Cliente {index}", "email": f"cliente{index}@example.com",
+            "phone": f"+{wa_id}", "whatsapp": f"+{wa_id}", "phone_normalized": f"+{wa_id}",
+            "whatsapp_normalized": f"+{wa_id}", "customer_type": rng.choice(list(CustomerType)),
+        })
+    # Una quinta parte de los mensajes llega de números que no son clientes
+    senders.extend(_wa_id(rng) for _ in range(customers // 4))
+
+    category_ids = {vertical: uuid.uuid4() for vertical in VerticalType}
+    product_rows, price_rows = [], []
+    for index in range(products):
+        product_id = uuid.uuid4()
+        vertical = rng.choice(list(VerticalType))
+        product_rows.append({
+            "id": product_id, "category_id": category_ids[vertical], "sku": f"LOAD-{index:05d}",
+            "name": f"Film {index}", "product_type": rng.choice(list(ProductType)), "active": True,
+            "featured": False,
+            "specifications": {
+                "material": rng.choice(MATERIALS),
+                "color": rng.choice(COLORS),
+                "heat_rejection": rng.randint(10, 90),
+                "visible_light_transmission": rng.randint(5, 80),
+                "uv_protection": rng.choice([95, 97, 99]),
+                "warranty_years": rng.randint(1, 15),
+            },
+        })
+        # Un precio genérico y uno residencial vigentes
+        for price_vertical in (None, VerticalType.RESIDENTIAL):
+            price_rows.append({
+                "id": uuid.uuid4(), "product_id": product_id, "vertical": price_vertical,
+                "valid_from": now - timedelta(days=rng.randint(1, 90)),
+                "price_per_sqm": Decimal(rng.randint(1500, 9000)) / 100,
+                "installation_per_sqm": Decimal(rng.randint(500, 2500)) / 100,
+                "currency": "USD", "active": True,
+            })
+
+    with db.session() as session:
+        session.execute(Customer.__table__.insert(), customer_rows)
+        session.execute(ProductCategory.__table__.insert(), [
+            {"id": category_id, "name": f"Films {vertical.value}", "slug": f"load-{vertical.value}",
+             "vertical": vertical}
+            for vertical, category_id in category_ids.items()
+        ])
+        session.execute(Product.__table__.insert(), product_rows)
+        session.execute(ProductPrice.__table__.insert(), price_rows)
+        rebuild_facet_counts(session)
+    return [row["id"] for row in customer_rows], [row["id"] for row in product_rows], senders
+
+
+# ============================================================================
+# OPERATIONS
+# ============================================================================
+
+def _dimensions(rng: random.Random) -> Tuple[Decimal, Decimal]:
+    return Decimal(rng.randint(40, 300)) / 100, Decimal(rng.randint(40, 300)) / 100
+
+
+def _recalculate(context: LoadContext, session, quotation: Quotation) -> None:
+    openings, products = load_calculation_inputs(session, quotation.id)
+    result = context.calculator.calculate_quotation(openings, products)
+    save_calculation(session, quotation, result)
+
+
+def create_quote(context: LoadContext, rng: random.Random) -> None:
+    """Alta de una cotización residencial con sus items, cálculo y guardado"""
+    with context.db.session() as session:
+        quotation = Quotation(
+            quotation_number=generate_quotation_number(),
+            customer_id=rng.choice(context.customer_ids),
+            vertical=VerticalType.RESIDENTIAL,
+            subtotal=Decimal("0.00"),
+            total=Decimal("0.00"),
+        )
+        quotation.property = Property(property_type=rng.choice(list(PropertyType)), name="Propiedad")
+        for index in range(context.openings_per_quote):
+            if index % OPENINGS_PER_ROOM == 0:
+                room = Room(
+                    name=f"Ambiente {index // OPENINGS_PER_ROOM}",
+                    room_type=rng.choice(list(RoomType)),
+                    floor=rng.randint(1, 12),
+                )
+                quotation.property.rooms.append(room)
+            width, height = _dimensions(rng)
+            opening = Opening(
+                opening_type=rng.choice(list(OpeningType)), width=width, height=height,
+                area=width * height, quantity=rng.randint(1, 4),
+                specifications={"floor": room.floor, "difficult_access": rng.random() < 0.1},
+            )
+            room.openings.append(opening)
+            quotation.items.append(QuotationItem(
+                opening=opening, product_id=rng.choice(context.product_ids), quantity=width * height,
+                unit="m²", unit_price=Decimal("0.00"), subtotal=Decimal("0.00"),
+            ))
+        session.add(quotation)
+        session.flush()
+        _recalculate(context, session, quotation)
+    context.add_quotation(quotation.id)
+
+
+def edit_quote(context: LoadContext, rng: random.Random) -> None:
+    """Cambiar las medidas de algunas aberturas, recalcular y guardar por diferencias"""
+    quotation_id = rng.choice(context.quotation_ids)
+    with context.db.session() as session:
+        quotation = session.get(Quotation, quotation_id)
+        opening_ids = session.scalars(
+            select(Opening.id)
+            .join(Room, Room.id == Opening.room_id)
+            .join(Property, Property.id == Room.property_id)
+            .where(Property.quotation_id == quotation_id)
+        ).all()
+        for opening_id in rng.sample(opening_ids, min(3, len(opening_ids))):
+            width, height = _dimensions(rng)
+            session.execute(
+                update(Opening).where(Opening.id == opening_id).values(width=width, height=height, area=width * height)
+            )
+        _recalculate(context, session, quotation)
+
+
+def browse_catalog(context: LoadContext, rng: random.Random) -> None:
+    """Dos páginas de búsqueda facetada, a veces con filtro por especificación"""
+    filters = CatalogFilters(vertical=rng.choice(list(VerticalType)))
+    if rng.random() < 0.5:
+        filters.ranges["heat_rejection"] = (rng.choice([30, 50, 70]), None)
+    with context.db.session() as session:
+        page = search_catalog(session, filters, limit=20)
+        if page.next_sku is not None:
+            search_catalog(session, filters, limit=20, after_sku=page.next_sku, with_facets=False)
+
+
+def ingest_message(context: LoadContext, wa_id: str, content: str) -> None:
+    """Guardar un mensaje entrante, creando la conversación activa si no existe"""
+    for attempt in range(2):
+        match = context.resolver.resolve(wa_id)
+        try:
+            with context.db.session() as session:
+                conversation_id = match.conversation_id
+                if conversation_id is None:
+                    conversation = WhatsAppConversation(
+                        customer_id=match.customer_id, phone_number=f"+{wa_id}", wa_id=wa_id,
+                    )
+                    session.add(conversation)
+                    session.flush()
+                    conversation_id = conversation.id
+                session.add(WhatsAppMessage(
+                    conversation_id=conversation_id, direction=MessageDirection.INBOUND,
+                    content=content, wa_message_id=f"wamid.{uuid.uuid4().hex}",
+                ))
+                session.execute(
+                    update(WhatsAppConversation)
+                    .where(WhatsAppConversation.id == conversation_id)
+                    .values(last_message_at=func.now())
+                )
+            return
+        except IntegrityError:
+            # Otro hilo creó la conversación activa del mismo teléfono
+            context.resolver.invalidate(match.phone_key)
+            if attempt:
+                raise
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parsear "create=2,edit=3,..." a pesos por operación"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {name} (válidas: {', '.join(OPERATIONS)})")
+        mix[name] = int(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("La mezcla no tiene operaciones con peso")
+    return mix
+
+
+def _timed(stats: OperationStats, operation, *args) -> None:
+    token = _current.set(stats)
+    start = time.perf_counter()
+    try:
+        operation(*args)
+    except Exception as exc:  # la carga sigue; el error se cuenta por tipo
+        stats.errors[type(exc).__name__] = stats.errors.get(type(exc).__name__, 0) + 1
+    else:
+        stats.latencies.append(time.perf_counter() - start)
+    finally:
+        _current.reset(token)
+
+
+def worker(context: LoadContext, mix: Dict[str, int], burst: int, stop_at: float, seed_value: int,
+           results: List[Dict[str, OperationStats]]) -> None:
+    rng = random.Random(seed_value)
+    stats = {name: OperationStats(writes=name in WRITE_OPERATIONS) for name in OPERATIONS}
+    names, weights = zip(*mix.items())
+    while time.perf_counter() < stop_at:
+        name = rng.choices(names, weights)[0]
+        if name == "create":
+            _timed(stats[name], create_quote, context, rng)
+        elif name == "edit":
+            _timed(stats[name], edit_quote, context, rng)
+        elif name == "browse":
+            _timed(stats[name], browse_catalog, context, rng)
+        else:
+            wa_id = rng.choice(context.senders)
+            for index in range(burst):
+                _timed(stats[name], ingest_message, context, wa_id, f"Mensaje {index}")
+    results.append(stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--pool-timeout", type=float, default=10.0)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--quotes", type=int, default=50, help="cotizaciones iniciales para editar")
+    parser.add_argument("--openings-per-quote", type=int, default=24)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--busy-timeout-ms", type=int, default=30000)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    temporary = None
+    url = args.database_url
+    if not url:
+        register_sqlite_jsonb()
+        temporary = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(temporary.name, 'load_test.db')}"
+    db = Database(DatabaseSettings(
+        url=url, pool_size=args.pool_size, max_overflow=0, pool_timeout=args.pool_timeout,
+    ))
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        instrument_sqlite(db.engine, args.busy_timeout_ms)
+    elif dialect == "postgresql":
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(db.engine)
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    customer_ids, product_ids, senders = seed(db, args.customers, args.products, rng)
+    resolver = WhatsAppSenderResolver(db.session_factory)
+    resolver.register(AppSession)
+    context = LoadContext(
+        db=db, calculator=QuotationCalculator(), resolver=resolver, customer_ids=customer_ids,
+        product_ids=product_ids, senders=senders, openings_per_quote=args.openings_per_quote,
+    )
+    for _ in range(args.quotes):
+        create_quote(context, rng)
+    print(f"{dialect}: {args.customers} clientes, {args.products} productos, {args.quotes} cotizaciones "
+          f"sembradas en {time.perf_counter() - start:.1f} s")
+    print(f"mezcla {args.mix}, {args.concurrency} hilos, pool de {args.pool_size}, {args.seconds:.0f} s")
+
+    sampler = LockWaitSampler(url) if dialect == "postgresql" else None
+    if sampler is not None:
+        sampler.start()
+    results: List[Dict[str, OperationStats]] = []
+    stop_at = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(context, mix, args.burst, stop_at, index, results))
+        for index in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if sampler is not None:
+        sampler.stop()
+
+    totals = {name: OperationStats(writes=name in WRITE_OPERATIONS) for name in OPERATIONS}
+    for stats in results:
+        for name, operation_stats in stats.items():
+            totals[name].merge(operation_stats)
+
+    print(f"  {'operación':<10} {'ops':>6} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'lock ms/op':>10}  errores")
+    for name in OPERATIONS:
+        stats = totals[name]
+        count = len(stats.latencies)
+        if not count and not stats.errors:
+            continue
+        attempts = count + sum(stats.errors.values())
+        lock = f"{stats.lock_wait_s * 1000 / attempts:10.2f}" if dialect == "sqlite" and stats.writes else f"{'-':>10}"
+        errors = ", ".join(f"{error}={number}" for error, number in stats.errors.items()) or "-"
+        print(f"  {name:<10} {count:6d} {count / elapsed:7.1f} {stats.percentile_ms(50):8.1f} "
+              f"{stats.percentile_ms(95):8.1f} {stats.percentile_ms(99):8.1f} {lock}  {errors}")
+
+    if dialect == "sqlite":
+        lock_wait_s = sum(stats.lock_wait_s for stats in totals.values())
+        print(f"  espera por lock de escritura: {lock_wait_s:.2f} s en total")
+    elif sampler is not None:
+        print(f"  espera por locks: ~{sampler.waiting_s:.2f} s-sesión, hasta {sampler.max_waiting} sesiones a la vez")
+    status = pool_status(db.engine)
+    print(f"  pool: {status.checkouts} checkouts, espera media {status.wait_avg_ms:.2f} ms, "
+          f"máxima {status.wait_max_ms:.1f} ms, {status.timeouts} timeouts")
+    print(f"  caché de remitentes: {resolver.stats.hit_ratio:.0%} aciertos")
+
+    db.dispose()
+    if temporary is not None:
+        temporary.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: cálculo por fragmentos de una cotización gigante
+
+Calcula una cotización de --openings aberturas en serie y con
+ShardedQuotationCalculator para 2..--max-workers procesos, con y sin
+(por defecto) devolver los items. Verifica que el resultado sea idéntico al serie y
+reporta el speedup y el desglose de tiempos: el armado del buffer y la
+reconstrucción de items ocurren en el proceso padre y acotan la escala
+(ley de Amdahl), el cálculo repartido escala con los núcleos.
+
+    python -m <paquete>.benchmarks.parallel_calculation [--openings 200000 --max-workers 8]
+"""
+import argparse
+import time
+from dataclasses import replace
+
+from . import synthetic_quotation
+from ..calculator import QuotationCalculator
+from ..parallel_calculation import ShardedQuotationCalculator, available_cpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=max(2, available_cpus()))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    openings, products = synthetic_quotation(args.openings, products_count=args.products)
+    calculator = QuotationCalculator()
+
+    serial_s = float("inf")
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        expected = calculator.calculate_quotation(openings, products)
+        serial_s = min(serial_s, time.perf_counter() - start)
+    print(f"{args.openings} aberturas, {available_cpus()} núcleos disponibles")
+    print(f"  {'serie':<24} {serial_s:7.3f} s")
+
+    for workers in range(2, max(args.max_workers, 2) + 1):
+        with ShardedQuotationCalculator(calculator, workers=workers, min_parallel_openings=0) as sharded:
+            sharded.calculate_quotation(openings[:1000], products[:1000])  # calentamiento del pool
+            for include_items in (True, False):
+                best = None
+                for _ in range(args.runs):
+                    result = sharded.calculate_quotation(openings, products, include_items=include_items)
+                    if best is None or sharded.last_run.total_s < best.total_s:
+                        best = sharded.last_run
+                if include_items:
+                    assert result == expected, "el resultado por fragmentos difiere del serie"
+                else:
+                    assert result == replace(expected, items=[]), "los totales por fragmentos difieren del serie"
+                parent_s = best.encode_s + best.decode_s + best.finalize_s
+                label = f"{workers} workers, {'con' if include_items else 'sin'} items"
+                print(f"  {label:<24} {best.total_s:7.3f} s  {serial_s / best.total_s:5.2f}x  "
+                      f"(buffer {best.encode_s:.3f} s, espera {best.wait_s:.3f} s, "
+                      f"items {best.decode_s:.3f} s, cierre {best.finalize_s:.3f} s; "
+                      f"tope Amdahl {serial_s / parent_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
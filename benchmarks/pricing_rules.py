@@ -0,0 +1,109 @@
+"""
+Benchmark: recarga de reglas en caliente bajo carga
+
+Varios hilos cotizan --openings aberturas durante --seconds segundos tomando
+la calculadora del RulesRegistry; en la segunda corrida un watcher relee un
+archivo de reglas que se reescribe con una versión nueva cada --reload-ms.
+Compara la latencia de ambas corridas y verifica que cada cotización se
+calcule de punta a punta con un único snapshot.
+
+    python -m <paquete>.benchmarks.pricing_rules [--openings 200 --threads 4]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from ..calculator import DEFAULT_PRICING_RULES
+from ..pricing_rules import RulesRegistry, file_source, rules_to_dict
+from .catalog_optimizer import synthetic_openings, synthetic_products
+
+
+def run(registry, openings, products, threads: int, seconds: float):
+    latencies, totals_by_version, lock = [], {}, threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        local, seen = [], {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            calculator = registry.calculator()
+            result = calculator.calculate_quotation(openings, products)
+            local.append(time.perf_counter() - start)
+            # Si un cálculo mezclara snapshots, una versión tendría dos totales
+            seen.setdefault(result.calculation_details["rules_version"], set()).add(result.total)
+        with lock:
+            latencies.extend(local)
+            for version, totals in seen.items():
+                totals_by_version.setdefault(version, set()).update(totals)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sorted(latencies), totals_by_version
+
+
+def describe(label, latencies, seconds):
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  {label}: {len(latencies) / seconds:.0f} cotizaciones/s, p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {p99 * 1000:.2f} ms, máx {latencies[-1] * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--reload-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    openings = synthetic_openings(args.openings)
+    products = synthetic_products(args.openings)
+    rules = rules_to_dict(DEFAULT_PRICING_RULES)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "pricing_rules.json")
+
+    def write(version: int) -> None:
+        rules["version"] = f"bench.{version}"
+        rules["tax_rate"] = str(Decimal("0.21") + Decimal(version % 5) / 100)
+        with open(path + ".tmp", "w", encoding="utf-8") as target:
+            json.dump(rules, target)
+        os.replace(path + ".tmp", path)  # reemplazo atómico: el watcher nunca lee medio archivo
+
+    write(0)
+    registry = RulesRegistry(file_source(path))
+    registry.reload()
+    print(f"{args.openings} aberturas, {args.threads} hilos, {args.seconds:.0f} s por corrida")
+
+    latencies, _ = run(registry, openings, products, args.threads, args.seconds)
+    describe("reglas fijas", latencies, args.seconds)
+
+    stop = threading.Event()
+
+    def writer():
+        version = 1
+        while not stop.wait(args.reload_ms / 1000):
+            write(version)
+            version += 1
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    registry.start_watching(args.reload_ms / 2000)
+    latencies, totals_by_version = run(registry, openings, products, args.threads, args.seconds)
+    stop.set()
+    writer_thread.join()
+    registry.stop_watching()
+    describe(f"recarga cada {args.reload_ms:.0f} ms", latencies, args.seconds)
+    mixed = [version for version, totals in totals_by_version.items() if len(totals) > 1]
+    print(f"  versiones usadas: {len(totals_by_version)}, cotizaciones con reglas mezcladas: {mixed or 'ninguna'}, "
+          f"error del watcher: {registry.last_error}")
+
+
+if __name__ == "__main__":
+    main()
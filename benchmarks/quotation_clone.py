@@ -0,0 +1,51 @@
+"""
+Benchmark: clone_quotation sobre una cotización grande
+
+Crea una cotización con --openings aberturas (5.000 por defecto), la
+duplica y muestra el tiempo y las sentencias emitidas, que no dependen del
+tamaño. Sin --database-url usa SQLite en memoria.
+
+    python -m <paquete>.benchmarks.quotation_clone [--database-url postgresql://...]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import Base
+from ..quotation_clone import clone_quotation
+from . import benchmark_engine
+from .calculation_inputs import seed_quotation
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--openings", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = benchmark_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        source_id = seed_quotation(session, args.openings)
+
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda *a: executed.append(1))
+
+    print(f"{args.openings} aberturas ({engine.dialect.name})")
+    for _ in range(args.repeat):
+        executed.clear()
+        with Session(engine) as session:
+            start = time.perf_counter()
+            result = clone_quotation(session, source_id)
+            session.commit()
+            elapsed = time.perf_counter() - start
+        copied = ", ".join(f"{name}={count}" for name, count in result.rows_copied.items())
+        print(f"  {result.quotation_number}: {elapsed * 1000:.1f} ms, {len(executed)} sentencias ({copied})")
+
+
+if __name__ == "__main__":
+    main()
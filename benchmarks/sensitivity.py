@@ -0,0 +1,68 @@
+"""
+Benchmark: sensitivity_report frente a recalcular la cotización
+
+Calcula una cotización de --openings aberturas con factores de complejidad
+variados y compara el costo del reporte con el del cálculo base y con
+recalcular la cotización una vez por factor (quitándolo), verificando que
+los totales coincidan.
+
+    python -m <paquete>.benchmarks.sensitivity [--openings 200]
+"""
+import argparse
+import random
+
+from ..calculator import QuotationCalculator
+from ..sensitivity import complexity_drivers, sensitivity_report
+from . import best_of
+from .catalog_optimizer import synthetic_openings, synthetic_products
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openings", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    openings = synthetic_openings(args.openings)
+    for opening in openings:
+        for driver in ("requires_scaffolding", "curved", "night_install", "extreme_weather", "irregular_shape"):
+            if rng.random() < 0.15:
+                opening.specifications[driver] = True
+    catalog = synthetic_products(100)
+    products = [rng.choice(catalog) for _ in openings]
+    calculator = QuotationCalculator()
+
+    result = calculator.calculate_quotation(openings, products)
+    report = sensitivity_report(result, openings, products, calculator)
+
+    def rerun():
+        totals = {}
+        for driver, neutral in complexity_drivers(calculator.rules).items():
+            stripped = [
+                type(opening)(**{**vars(opening), "specifications": {**opening.specifications, driver: neutral}})
+                for opening in openings
+            ]
+            totals[driver] = calculator.calculate_quotation(stripped, products).total
+        return totals
+
+    expected = rerun()
+    mismatches = [
+        driver.driver for driver in report.drivers if expected[driver.driver] != driver.total_without
+    ]
+
+    base_s = best_of(lambda: calculator.calculate_quotation(openings, products))
+    report_s = best_of(lambda: sensitivity_report(result, openings, products, calculator))
+    rerun_s = best_of(rerun)
+    print(f"{args.openings} aberturas: total {result.total}, {result.total_final_area} m²")
+    print(f"  cálculo base {base_s * 1000:.1f} ms, reporte {report_s * 1000:.1f} ms "
+          f"({report_s / base_s:.2f}x), recalcular por factor {rerun_s * 1000:.1f} ms ({rerun_s / base_s:.1f}x)")
+    print(f"  factores: {len(report.drivers)}, totales distintos al recálculo: {mismatches or 'ninguno'}")
+    for driver in report.drivers:
+        print(f"    sin {driver.driver}: {driver.total_change} ({driver.items_affected} items)")
+    for tier in report.tiers:
+        print(f"  escalón {tier.threshold} m²: faltan {tier.missing_area} m², cambio {tier.total_change}, "
+              f"equilibrio {tier.break_even_area} m², conviene={tier.pays_off}")
+
+
+if __name__ == "__main__":
+    main()
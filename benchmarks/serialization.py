@@ -0,0 +1,46 @@
+"""
+Benchmark: serialization.encode_result contra dataclasses.asdict + json.dumps
+"""
+import argparse
+import io
+import json
+from dataclasses import asdict
+
+from ..calculator import QuotationCalculator, generate_quotation_summary
+from ..serialization import encode_result, write_result
+from . import best_of, synthetic_quotation
+
+
+def baseline_encode(result) -> bytes:
+    """Camino actual: resumen con floats + items con asdict"""
+    document = {
+        "summary": generate_quotation_summary(result),
+        "items": [asdict(item) for item in result.items],
+    }
+    return json.dumps(document, default=str).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    calculator = QuotationCalculator()
+    print(f"{'items':>8} {'asdict+json':>12} {'encode':>10} {'stream':>10} {'speedup':>8} {'bytes':>12}")
+    for size in args.sizes:
+        openings, products = synthetic_quotation(size)
+        result = calculator.calculate_quotation(openings, products)
+
+        baseline = best_of(lambda: baseline_encode(result), args.repeat)
+        encoded = best_of(lambda: encode_result(result), args.repeat)
+        streamed = best_of(lambda: write_result(result, io.BytesIO()), args.repeat)
+        payload = encode_result(result)
+        print(
+            f"{size:>8} {baseline * 1000:>10.1f}ms {encoded * 1000:>8.1f}ms "
+            f"{streamed * 1000:>8.1f}ms {baseline / encoded:>7.1f}x {len(payload):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
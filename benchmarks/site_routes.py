@@ -0,0 +1,82 @@
+"""
+Benchmark: GridIndex y plan_routes con visitas sintéticas
+
+Genera --stops visitas (5.000 por defecto) concentradas alrededor de
+barrios del AMBA y mide la construcción del índice, consultas de vecino más
+cercano y por radio (comparadas con fuerza bruta) y el armado de recorridos.
+
+    python -m <paquete>.benchmarks.site_routes [--stops 5000]
+"""
+import argparse
+import random
+import time
+
+from ..site_routes import Depot, GridIndex, Stop, haversine_km, plan_routes
+from . import best_of
+
+
+# (lat, lng) de centros de demanda
+NEIGHBORHOODS = [
+    (-34.5875, -58.3974), (-34.6037, -58.3816), (-34.5627, -58.4566), (-34.6345, -58.3631),
+    (-34.4708, -58.5286), (-34.7203, -58.2546), (-34.6518, -58.6196), (-34.5106, -58.4917),
+]
+DEPOTS = [
+    Depot("palermo", -34.5800, -58.4200, crews=8),
+    Depot("avellaneda", -34.6620, -58.3650, crews=6),
+    Depot("san-isidro", -34.4710, -58.5130, crews=6),
+]
+
+
+def synthetic_stops(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    stops = []
+    for index in range(count):
+        lat, lng = rng.choice(NEIGHBORHOODS)
+        stops.append(Stop(
+            stop_id=f"stop-{index}",
+            lat=rng.gauss(lat, 0.03),
+            lng=rng.gauss(lng, 0.03),
+            service_minutes=rng.choice([45, 45, 45, 180]),
+        ))
+    return stops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    stops = synthetic_stops(args.stops)
+    rng = random.Random(7)
+    queries = [(rng.uniform(-34.75, -34.45), rng.uniform(-58.65, -58.25)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = GridIndex.build(stops, lambda stop: (stop.lat, stop.lng))
+    print(f"{len(stops)} visitas, índice en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def grid_nearest():
+        return [index.nearest(lat, lng)[0][1] for lat, lng in queries]
+
+    def brute_nearest():
+        return [min(stops, key=lambda stop: haversine_km(lat, lng, stop.lat, stop.lng)) for lat, lng in queries]
+
+    grid_s, brute_s = best_of(grid_nearest), best_of(brute_nearest, repeat=1)
+    grid_result, brute_result = grid_nearest(), brute_nearest()
+    agree = sum(a is b for a, b in zip(grid_result, brute_result))
+    print(f"  vecino más cercano: grilla {grid_s / len(queries) * 1e6:.0f} µs/consulta, "
+          f"fuerza bruta {brute_s / len(queries) * 1e6:.0f} µs/consulta ({agree}/{len(queries)} coinciden)")
+
+    radius_s = best_of(lambda: [index.within(lat, lng, 2.0) for lat, lng in queries])
+    found = [len(index.within(lat, lng, 2.0)) for lat, lng in queries]
+    print(f"  radio 2 km: {radius_s / len(queries) * 1e6:.0f} µs/consulta, "
+          f"{sum(found) / len(found):.1f} resultados en promedio")
+
+    plan = plan_routes(stops, DEPOTS)
+    total_km = sum(route.distance_km for route in plan.routes)
+    print(f"  recorridos: {plan.duration_s:.2f}s, {len(plan.routes)} recorridos en {plan.days} días, "
+          f"{total_km:.0f} km ({total_km / len(plan.routes):.1f} km/recorrido)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: arranque en frío del punto de entrada de solo cálculo
+
+Importa cada módulo en un intérprete nuevo con `-X importtime` (--runs
+veces, se toma el mejor) y reporta el tiempo de import acumulado, la
+memoria residente máxima y los módulos más costosos. Falla (código de
+salida 1) si el motor de cálculo supera --max-import-ms o --max-rss-mb, o
+si arrastra alguno de los módulos prohibidos (SQLAlchemy, NumPy).
+
+    python -m <paquete>.benchmarks.startup [--max-import-ms 80 --max-rss-mb 20]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+# Módulo del motor de cálculo y referencia con los modelos
+ENTRY_POINT = f"{PACKAGE}.calculator"
+REFERENCE = f"{PACKAGE}.models"
+
+# Dependencias que el punto de entrada de solo cálculo no debe importar
+FORBIDDEN_MODULES = ("sqlalchemy", "numpy")
+
+_CHILD = """
+import resource, sys
+import {module}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print(",".join(name for name in {forbidden!r} if name in sys.modules))
+"""
+
+
+def measure(module: str) -> Tuple[float, float, List[str], List[Tuple[float, str]]]:
+    """
+    Importar un módulo en un proceso nuevo
+
+    Returns:
+        Tuple (ms de import acumulado, RSS máximo en MB, módulos prohibidos
+        cargados, [(ms propios, módulo)] de cada import)
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c",
+         _CHILD.format(module=module, forbidden=FORBIDDEN_MODULES)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rss_kb, loaded = completed.stdout.splitlines()[-2:]
+
+    cumulative: Dict[str, float] = {}
+    imports: List[Tuple[float, str]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((int(self_us) / 1000, name.strip()))
+        if not name[1:].startswith(" "):  # sin sangría: import de primer nivel
+            cumulative[name.strip()] = int(cumulative_us) / 1000
+    # El paquete padre puede figurar como import de primer nivel aparte
+    total_ms = sum(ms for name, ms in cumulative.items() if module == name or module.startswith(name + "."))
+    return total_ms, int(rss_kb) / 1024, [name for name in loaded.split(",") if name], imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=80.0)
+    parser.add_argument("--max-rss-mb", type=float, default=20.0)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    results = {}
+    for module in (ENTRY_POINT, REFERENCE):
+        runs = [measure(module) for _ in range(args.runs)]
+        total_ms, _, loaded, imports = min(runs, key=lambda run: run[0])
+        rss_mb = min(run[1] for run in runs)
+        results[module] = (total_ms, rss_mb, loaded)
+        print(f"{module}: import {total_ms:.1f} ms, RSS máx {rss_mb:.1f} MB, "
+              f"{len(imports)} módulos, prohibidos cargados: {', '.join(loaded) or 'ninguno'}")
+        for self_ms, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"    {self_ms:7.2f} ms  {name}")
+
+    total_ms, rss_mb, loaded = results[ENTRY_POINT]
+    reference_ms = results[REFERENCE][0]
+    print(f"  motor de cálculo: {total_ms:.1f} ms vs {reference_ms:.1f} ms con modelos ({reference_ms / total_ms:.1f}x)")
+
+    failures = []
+    if total_ms > args.max_import_ms:
+        failures.append(f"import {total_ms:.1f} ms > {args.max_import_ms:.0f} ms")
+    if rss_mb > args.max_rss_mb:
+        failures.append(f"RSS {rss_mb:.1f} MB > {args.max_rss_mb:.0f} MB")
+    if loaded:
+        failures.append(f"importa {', '.join(loaded)}")
+    if failures:
+        print(f"FALLA: {'; '.join(failures)}")
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
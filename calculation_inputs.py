@@ -0,0 +1,155 @@
+"""
+Calculation Inputs
+Carga de las entradas del calculador (OpeningData/ProductData) de una
+cotización con una sola consulta Core, sin hidratar objetos del ORM
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, bindparam, func, or_, select
+
+from .models import Opening, Product, ProductPrice, Property, Quotation, QuotationItem, Room
+from .calculator import OpeningData, ProductData
+
+
+ITEMS_TABLE = QuotationItem.__table__
+OPENINGS_TABLE = Opening.__table__
+ROOMS_TABLE = Room.__table__
+PROPERTIES_TABLE = Property.__table__
+PRODUCTS_TABLE = Product.__table__
+PRICES_TABLE = ProductPrice.__table__
+QUOTATIONS_TABLE = Quotation.__table__
+
+_STATEMENT = None
+
+
+# ============================================================================
+# STATEMENT
+# ============================================================================
+
+def calculation_inputs_statement():
+    """
+    SELECT de items con su abertura, ambiente, producto y precio vigente
+
+    El precio vigente se elige con ROW_NUMBER por producto: primero el de la
+    vertical de la cotización, luego el genérico (vertical NULL), y entre
+    ellos el de valid_from más reciente. Parámetros: quotation_id y at.
+    """
+    quotation_id = bindparam("quotation_id")
+    at = bindparam("at")
+    i, o, r, p, pr = (
+        ITEMS_TABLE.c, OPENINGS_TABLE.c, ROOMS_TABLE.c, PRODUCTS_TABLE.c, PRICES_TABLE.c
+    )
+
+    quotation_vertical = (
+        select(QUOTATIONS_TABLE.c.vertical)
+        .where(QUOTATIONS_TABLE.c.id == quotation_id)
+        .scalar_subquery()
+    )
+    ranked_prices = (
+        select(
+            pr.product_id,
+            pr.price_per_sqm,
+            pr.installation_per_sqm,
+            func.row_number().over(
+                partition_by=pr.product_id,
+                order_by=(pr.vertical.is_(None), pr.valid_from.desc()),
+            ).label("rank"),
+        )
+        .where(pr.product_id.in_(select(i.product_id).where(i.quotation_id == quotation_id)))
+        .where(pr.active.is_(True))
+        .where(pr.valid_from <= at)
+        .where(or_(pr.valid_until.is_(None), pr.valid_until > at))
+        .where(or_(pr.vertical.is_(None), pr.vertical == quotation_vertical))
+        .cte("ranked_prices")
+    )
+
+    return (
+        select(
+            o.id, o.opening_type, o.width, o.height, o.quantity, o.specifications,
+            r.name, r.floor,
+            p.id, p.product_type, p.sku, p.name, p.specifications,
+            ranked_prices.c.price_per_sqm, ranked_prices.c.installation_per_sqm,
+        )
+        .select_from(
+            ITEMS_TABLE
+            .join(OPENINGS_TABLE, o.id == i.opening_id)
+            .join(ROOMS_TABLE, r.id == o.room_id)
+            .join(PROPERTIES_TABLE, PROPERTIES_TABLE.c.id == r.property_id)
+            .join(PRODUCTS_TABLE, p.id == i.product_id)
+            .outerjoin(ranked_prices, and_(ranked_prices.c.product_id == p.id, ranked_prices.c.rank == 1))
+        )
+        .where(i.quotation_id == quotation_id)
+        .where(PROPERTIES_TABLE.c.quotation_id == quotation_id)
+        .order_by(r.floor, r.name, o.id, i.created_at, i.id)
+    )
+
+
+def _statement():
+    global _STATEMENT
+    if _STATEMENT is None:
+        _STATEMENT = calculation_inputs_statement()
+    return _STATEMENT
+
+
+# ============================================================================
+# LOADER
+# ============================================================================
+
+def load_calculation_inputs(
+    session,
+    quotation_id: UUID,
+    at: Optional[datetime] = None
+) -> Tuple[List[OpeningData], List[ProductData]]:
+    """
+    Cargar aberturas y productos de una cotización para calculate_quotation
+
+    Los productos repetidos comparten la misma instancia de ProductData.
+
+    Args:
+        session: Sesión o conexión de base de datos
+        quotation_id: ID de la cotización
+        at: Fecha de vigencia de precios (None para ahora)
+
+    Returns:
+        Tuple (aberturas, productos) alineadas por posición
+    """
+    at = at or datetime.now(timezone.utc)
+    rows = session.execute(_statement(), {"quotation_id": quotation_id, "at": at}).tuples()
+
+    openings: List[OpeningData] = []
+    products: List[ProductData] = []
+    product_cache: Dict[UUID, ProductData] = {}
+    for (
+        opening_id, opening_type, width, height, quantity, opening_specs,
+        room_name, floor,
+        product_id, product_type, sku, product_name, product_specs,
+        price_per_sqm, installation_per_sqm,
+    ) in rows:
+        product = product_cache.get(product_id)
+        if product is None:
+            if price_per_sqm is None:
+                raise ValueError(f"Producto sin precio vigente: {sku}")
+            product = product_cache[product_id] = ProductData(
+                product_id=str(product_id),
+                product_type=product_type.value,
+                sku=sku,
+                name=product_name,
+                price_per_sqm=price_per_sqm,
+                installation_per_sqm=installation_per_sqm or Decimal("0.00"),
+                specifications=product_specs or {},
+            )
+        openings.append(OpeningData(
+            opening_id=str(opening_id),
+            opening_type=opening_type.value,
+            width=width,
+            height=height,
+            quantity=quantity or 1,
+            specifications=opening_specs or {},
+            room_name=room_name,
+            floor=floor or 1,
+        ))
+        products.append(product)
+    return openings, products
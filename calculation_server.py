@@ -0,0 +1,494 @@
+"""
+Calculation Server
+Servidor local de cálculo de cotizaciones (HTTP sobre localhost o socket
+Unix, asyncio) que agrupa en micro-lotes los pedidos concurrentes y los
+calcula en un pool de procesos o hilos con QuotationCalculator, con
+contrapresión y plazo por pedido
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from .calculator import OpeningData, ProductData
+from .pricing_rules import RulesRegistry, file_source, load_rules_file
+from .serialization import encode_result
+
+
+DEFAULT_PORT = 8765
+
+# Tope del cuerpo de un pedido
+MAX_BODY_BYTES = 8 * 1024 * 1024  # 8 MB
+
+# Respuesta: (código HTTP, cuerpo JSON)
+Response = Tuple[int, bytes]
+
+# Resultado de un lote: (respuestas, versión de reglas, error de recarga o None)
+BatchResult = Tuple[List[Response], str, Optional[str]]
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+def _error(status: int, message: str) -> Response:
+    return status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+@dataclass
+class ServerConfig:
+    """Parámetros del servidor"""
+    workers: int = os.cpu_count() or 1
+    executor: str = "process"  # "process" o "thread"
+    max_batch_size: int = 32
+    # Espera adicional para completar un lote; con 0 los lotes se forman solo
+    # con lo que se acumuló mientras los workers estaban ocupados
+    max_batch_wait_ms: float = 0.0
+    # Pedidos en cola antes de rechazar con 503
+    max_pending: int = 1024
+    default_deadline_ms: float = 2000.0
+    max_deadline_ms: float = 30000.0
+    rules_path: Optional[str] = None  # reglas recargables (None: las por defecto)
+    tax_rate: Optional[Decimal] = None
+
+
+@dataclass
+class ServerStats:
+    """Contadores del servidor"""
+    requests: int = 0
+    completed: int = 0
+    rejected: int = 0  # cola llena (503)
+    expired: int = 0  # plazo vencido (504)
+    failed: int = 0  # pedido inválido o error de cálculo
+    batches: int = 0
+    batched_requests: int = 0
+    max_queue: int = 0
+    rules_version: Optional[str] = None  # reglas del último lote
+    rules_error: Optional[str] = None  # última recarga fallida (se sigue con las vigentes)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["average_batch_size"] = round(self.batched_requests / self.batches, 2) if self.batches else 0.0
+        return data
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+# Corre en el pool: parsea, calcula y codifica, así el event loop solo mueve bytes
+
+_registry: Optional[RulesRegistry] = None
+
+
+def _init_worker(rules_path: Optional[str], tax_rate: Optional[Decimal]) -> None:
+    global _registry
+    _registry = RulesRegistry(file_source(rules_path) if rules_path else None, tax_rate=tax_rate)
+    if rules_path:
+        _registry.reload()
+
+
+def _decimal(value, field_name: str) -> Decimal:
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{field_name}: se esperaba un número")
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{field_name}: número inválido") from None
+    if not number.is_finite() or number < 0:
+        raise ValueError(f"{field_name}: debe ser un número no negativo")
+    return number
+
+
+def parse_calculation_request(data: Dict) -> Tuple[List[OpeningData], List[ProductData], Optional[Decimal], str]:
+    """
+    Validar un pedido de cálculo
+
+    Las aberturas y productos usan los mismos campos que OpeningData y
+    ProductData (los mismos que arma la ruta de Next.js).
+
+    Args:
+        data: {"openings": [...], "products": [...], "tax_rate"?, "currency"?}
+
+    Returns:
+        Tuple (aberturas, productos, tasa de impuesto o None, moneda)
+
+    Raises:
+        ValueError: Si falta un campo o algún valor es inválido
+    """
+    if not isinstance(data, dict):
+        raise ValueError("El pedido debe ser un objeto")
+    raw_openings, raw_products = data.get("openings"), data.get("products")
+    if not isinstance(raw_openings, list) or not isinstance(raw_products, list):
+        raise ValueError("Se requieren las listas openings y products")
+    try:
+        openings = [
+            OpeningData(
+                opening_id=str(opening["opening_id"]),
+                opening_type=str(opening["opening_type"]),
+                width=_decimal(opening["width"], "width"),
+                height=_decimal(opening["height"], "height"),
+                quantity=int(opening.get("quantity", 1)),
+                specifications=dict(opening.get("specifications") or {}),
+                room_name=str(opening.get("room_name") or ""),
+                floor=int(opening.get("floor") or 1),
+            )
+            for opening in raw_openings
+        ]
+        products = [
+            ProductData(
+                product_id=str(product["product_id"]),
+                product_type=str(product["product_type"]),
+                sku=str(product.get("sku") or ""),
+                name=str(product.get("name") or ""),
+                price_per_sqm=_decimal(product["price_per_sqm"], "price_per_sqm"),
+                installation_per_sqm=_decimal(product["installation_per_sqm"], "installation_per_sqm"),
+                specifications=dict(product.get("specifications") or {}),
+            )
+            for product in raw_products
+        ]
+    except KeyError as exc:
+        raise ValueError(f"Falta el campo {exc.args[0]}") from None
+    except (TypeError, AttributeError):
+        raise ValueError("Aberturas y productos deben ser objetos") from None
+    tax_rate = _decimal(data["tax_rate"], "tax_rate") if data.get("tax_rate") is not None else None
+    return openings, products, tax_rate, str(data.get("currency") or "USD")
+
+
+def _calculate_batch(bodies: List[bytes]) -> BatchResult:
+    """Calcular un lote de pedidos con un único snapshot de reglas"""
+    if _registry is None:
+        _init_worker(None, None)
+    if _registry.source is not None:
+        try:
+            _registry.reload()  # un stat del archivo; si no cambió no hace nada
+            _registry.last_error = None
+        except (OSError, ValueError) as exc:
+            _registry.last_error = exc  # se sigue con las reglas vigentes; se informa en /health
+    calculator = _registry.calculator()
+
+    responses: List[Response] = []
+    for body in bodies:
+        try:
+            openings, products, tax_rate, currency = parse_calculation_request(json.loads(body))
+            result = calculator.calculate_quotation(openings, products, tax_rate)
+            responses.append((200, encode_result(result, currency)))
+        except ValueError as exc:  # incluye JSON inválido
+            responses.append(_error(400, str(exc)))
+        except Exception as exc:  # noqa: BLE001 - un pedido no debe tirar el lote
+            responses.append(_error(500, f"Error de cálculo: {exc}"))
+    error = _registry.last_error
+    return responses, calculator.rules.version, f"{type(error).__name__}: {error}" if error else None
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class _Pending:
+    __slots__ = ("body", "deadline", "future")
+
+    def __init__(self, body: bytes, deadline: float, future: asyncio.Future):
+        self.body = body
+        self.deadline = deadline
+        self.future = future
+
+
+class CalculationServer:
+    """
+    Servidor de cálculo con micro-lotes
+
+    Los pedidos entran a una cola acotada (llena = 503 inmediato). Hay un
+    despachador por worker del pool: cada uno toma todo lo acumulado hasta
+    max_batch_size y lo manda al pool en una sola llamada, así que con carga
+    los lotes crecen solos y sin carga cada pedido sale enseguida. Los
+    pedidos vencidos se descartan antes de calcular y el cliente recibe 504
+    al vencer su plazo aunque el lote siga en curso.
+    """
+
+    def __init__(self, config: Optional[ServerConfig] = None):
+        """
+        Inicializar servidor
+
+        Args:
+            config: Parámetros (None para los por defecto)
+        """
+        self.config = config or ServerConfig()
+        self.stats = ServerStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[Executor] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self._servers: List[asyncio.AbstractServer] = []
+
+    # ------------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        config = self.config
+        if config.executor not in ("process", "thread"):
+            raise ValueError("executor debe ser 'process' o 'thread'")
+        if config.rules_path:
+            # Fallar al arrancar: un error en el initializer del pool rompe cada lote
+            load_rules_file(config.rules_path)
+        pool_options = dict(max_workers=config.workers, initializer=_init_worker, initargs=(config.rules_path, config.tax_rate))
+        if config.executor == "process":
+            # Los workers se crean con el primer pedido, con el socket ya
+            # abierto: con fork lo heredarían y seguirían escuchando si el
+            # proceso principal muere; forkserver/spawn no heredan descriptores
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(mp_context=context, **pool_options)
+        else:
+            self._executor = ThreadPoolExecutor(**pool_options)
+        self._queue = asyncio.Queue(maxsize=config.max_pending)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(config.workers)]
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self._ensure_started()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        self._ensure_started()
+        if os.path.exists(path):
+            os.unlink(path)  # socket de una ejecución anterior
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self._servers, self._dispatchers, self._queue, self._executor = [], [], None, None
+
+    # ------------------------------------------------------------------------
+    # Pedidos
+    # ------------------------------------------------------------------------
+
+    async def submit(self, body: bytes, deadline_ms: Optional[float] = None) -> Response:
+        """
+        Encolar un pedido de cálculo y esperar su respuesta
+
+        Args:
+            body: JSON del pedido (ver parse_calculation_request)
+            deadline_ms: Plazo en milisegundos (None para el por defecto)
+
+        Returns:
+            Tuple (código HTTP, JSON de la respuesta)
+        """
+        self._ensure_started()
+        config = self.config
+        self.stats.requests += 1
+        timeout = min(deadline_ms or config.default_deadline_ms, config.max_deadline_ms) / 1000
+        loop = asyncio.get_running_loop()
+        pending = _Pending(body, loop.time() + timeout, loop.create_future())
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            return _error(503, "Servidor saturado, reintentar")
+        self.stats.max_queue = max(self.stats.max_queue, self._queue.qsize())
+
+        try:
+            status, payload = await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+        except asyncio.TimeoutError:
+            pending.future.cancel()  # si sigue en cola, el despachador lo saltea
+            self.stats.expired += 1
+            return _error(504, "Plazo vencido")
+        if status == 200:
+            self.stats.completed += 1
+        else:
+            self.stats.failed += 1
+        return status, payload
+
+    def _fill_batch(self, batch: List[_Pending]) -> List[_Pending]:
+        queue = self._queue
+        while len(batch) < self.config.max_batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        max_wait = self.config.max_batch_wait_ms / 1000
+        while True:
+            batch = self._fill_batch([await queue.get()])
+            if max_wait and len(batch) < self.config.max_batch_size:
+                await asyncio.sleep(max_wait)
+                self._fill_batch(batch)
+            now = loop.time()
+            # Cancelados (el cliente ya recibió 504) o vencidos: no se calculan
+            live = [pending for pending in batch if not pending.future.done() and pending.deadline > now]
+            if not live:
+                continue
+            self.stats.batches += 1
+            self.stats.batched_requests += len(live)
+            try:
+                responses, self.stats.rules_version, self.stats.rules_error = await loop.run_in_executor(
+                    self._executor, _calculate_batch, [p.body for p in live]
+                )
+            except Exception as exc:  # noqa: BLE001 - ej: pool roto
+                responses = [_error(500, f"Error del pool: {exc}")] * len(live)
+            for pending, response in zip(live, responses):
+                if not pending.future.done():
+                    pending.future.set_result(response)
+
+    # ------------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, _error(400, "Pedido HTTP inválido"), keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive"
+                )
+
+                length_header = headers.get("content-length") or "0"
+                if not (length_header.isascii() and length_header.isdigit()):
+                    await self._respond(writer, _error(400, "Content-Length inválido"), keep_alive=False)
+                    break
+                length = int(length_header)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, _error(413, "Pedido demasiado grande"), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                path = target.split("?", 1)[0]
+                if method == "POST" and path == "/calculate":
+                    deadline = headers.get("x-deadline-ms")
+                    try:
+                        deadline_ms = float(deadline) if deadline else None
+                    except ValueError:
+                        deadline_ms = None
+                    response = await self.submit(body, deadline_ms)
+                elif method == "GET" and path == "/health":
+                    stats = {**self.stats.to_dict(), "queue": self._queue.qsize()}
+                    response = 200, json.dumps(stats).encode("utf-8")
+                else:
+                    response = _error(404, f"{method} {path} no existe")
+                await self._respond(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+        status, payload = response
+        headers = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if status == 503:
+            headers += "Retry-After: 1\r\n"
+        writer.write(headers.encode("latin-1") + b"\r\n" + payload)
+        await writer.drain()
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = ServerConfig()
+    parser = argparse.ArgumentParser(description="Servidor local de cálculo de cotizaciones")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Escuchar en un socket Unix en lugar de TCP")
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--executor", choices=["process", "thread"], default=defaults.executor)
+    parser.add_argument("--max-batch-size", type=int, default=defaults.max_batch_size)
+    parser.add_argument("--max-batch-wait-ms", type=float, default=defaults.max_batch_wait_ms)
+    parser.add_argument("--max-pending", type=int, default=defaults.max_pending)
+    parser.add_argument("--deadline-ms", type=float, default=defaults.default_deadline_ms)
+    parser.add_argument("--rules-file", default=os.environ.get("PRICING_RULES_FILE"))
+    args = parser.parse_args(argv)
+
+    config = ServerConfig(
+        workers=args.workers,
+        executor=args.executor,
+        max_batch_size=args.max_batch_size,
+        max_batch_wait_ms=args.max_batch_wait_ms,
+        max_pending=args.max_pending,
+        default_deadline_ms=args.deadline_ms,
+        rules_path=args.rules_file,
+    )
+
+    if config.rules_path:
+        try:
+            load_rules_file(config.rules_path)
+        except (OSError, ValueError) as exc:
+            print(f"Reglas inválidas en {config.rules_path}: {exc}")
+            return 1
+
+    async def serve() -> None:
+        server = CalculationServer(config)
+        if args.unix:
+            await server.start_unix(args.unix)
+            where = args.unix
+        else:
+            await server.start_tcp(args.host, args.port)
+            where = f"http://{args.host}:{args.port}"
+        print(f"Servidor de cálculo en {where} ({config.workers} workers, {config.executor})", flush=True)
+        # SIGTERM (systemd, docker) y SIGINT cierran ordenadamente, incluido el pool
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,8 @@ Quotation Calculation Engine
 Motor de cálculo de cotizaciones con reglas de negocio para todas las verticales
 """
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -97,11 +98,82 @@ VOLUME_DISCOUNTS = [
     (Decimal("50"), Decimal("0.05")),   # 50+ m² = 5% descuento
 ]
 
+# Desperdicio cuando la combinación abertura/film no está en la matriz
+DEFAULT_WASTE_PERCENTAGE = Decimal("0.15")
+
+# Desperdicio adicional por especificación
+WASTE_ADJUSTMENTS = {
+    "difficult_access": Decimal("0.05"),  # +5% por acceso difícil
+    "irregular_shape": Decimal("0.08"),   # +8% por forma irregular
+}
+
+# Tope máximo de desperdicio
+MAX_WASTE_PERCENTAGE = Decimal("0.35")
+
+# Recargo de instalación por altura: (piso a partir del cual aplica, factor)
+HEIGHT_FACTORS = [
+    (3, Decimal("1.2")),  # piso > 3: +20% por altura
+]
+
+# Factores de complejidad de instalación por especificación
+COMPLEXITY_FACTORS = {
+    "difficult_access": Decimal("1.3"),      # +30%
+    "curved": Decimal("1.5"),                # +50% vidrio curvo
+    "extreme_weather": Decimal("1.15"),      # +15% condiciones extremas
+    "night_install": Decimal("1.25"),        # +25% horario nocturno
+    "requires_scaffolding": Decimal("1.4"),  # +40% andamios o equipos especiales
+}
+
+# Versión de las reglas de negocio (incrementar al modificar desperdicios,
+# descuentos, impuestos o factores de complejidad)
+PRICING_RULES_VERSION = "2024.1"
+
 
 # ============================================================================
 # DATA STRUCTURES
 # ============================================================================
 
+@dataclass(frozen=True)
+class PricingRules:
+    """
+    Snapshot inmutable de las reglas de negocio
+
+    Se construye una vez (ver pricing_rules.rules_from_dict) y se comparte
+    entre cálculos: las secuencias ya vienen ordenadas y las tablas son de
+    solo lectura, así un cálculo en curso nunca ve reglas a medio cambiar.
+    """
+    version: str
+    waste_matrix: Mapping[str, Mapping[str, Decimal]]
+    default_waste: Decimal
+    waste_adjustments: Tuple[Tuple[str, Decimal], ...]
+    max_waste: Decimal
+    tax_rate: Decimal
+    volume_discounts: Tuple[Tuple[Decimal, Decimal], ...]  # umbral descendente
+    height_factors: Tuple[Tuple[int, Decimal], ...]  # piso descendente
+    complexity_factors: Tuple[Tuple[str, Decimal], ...]
+
+    @property
+    def min_discount_area(self) -> Optional[Decimal]:
+        """Área del primer escalón de descuento (None si no hay descuentos)"""
+        return self.volume_discounts[-1][0] if self.volume_discounts else None
+
+
+DEFAULT_PRICING_RULES = PricingRules(
+    version=PRICING_RULES_VERSION,
+    waste_matrix=MappingProxyType({
+        opening_type: MappingProxyType(dict(by_product))
+        for opening_type, by_product in WASTE_MATRIX.items()
+    }),
+    default_waste=DEFAULT_WASTE_PERCENTAGE,
+    waste_adjustments=tuple(WASTE_ADJUSTMENTS.items()),
+    max_waste=MAX_WASTE_PERCENTAGE,
+    tax_rate=DEFAULT_TAX_RATE,
+    volume_discounts=tuple(sorted(VOLUME_DISCOUNTS, reverse=True)),
+    height_factors=tuple(sorted(HEIGHT_FACTORS, reverse=True)),
+    complexity_factors=tuple(COMPLEXITY_FACTORS.items()),
+)
+
+
 @dataclass
 class OpeningData:
     """Datos de una abertura para calcular"""
@@ -187,6 +259,48 @@ class QuotationCalculationResult:
     calculation_details: Dict
 
 
+@dataclass
+class ItemTotals:
+    """Sumas parciales de un conjunto de items (combinables entre fragmentos)"""
+    base_area: Decimal
+    waste_area: Decimal
+    final_area: Decimal
+    material_subtotal: Decimal
+    installation_subtotal: Decimal
+    items_count: int
+    has_complex_installation: bool
+    rooms: frozenset
+
+    @classmethod
+    def from_items(cls, items: List[CalculationItem]) -> "ItemTotals":
+        zero = Decimal("0")
+        return cls(
+            base_area=sum((item.base_area for item in items), zero),
+            waste_area=sum((item.waste_area for item in items), zero),
+            final_area=sum((item.final_area for item in items), zero),
+            material_subtotal=sum((item.material_subtotal for item in items), zero),
+            installation_subtotal=sum((item.installation_subtotal for item in items), zero),
+            items_count=len(items),
+            has_complex_installation=any(item.complexity_factor > Decimal("1.0") for item in items),
+            rooms=frozenset(item.opening_name.split(" - ")[0] for item in items),
+        )
+
+    @classmethod
+    def merge(cls, parts: List["ItemTotals"]) -> "ItemTotals":
+        """Combinar en orden; las sumas de Decimal son exactas, el resultado no depende del reparto"""
+        zero = Decimal("0")
+        return cls(
+            base_area=sum((part.base_area for part in parts), zero),
+            waste_area=sum((part.waste_area for part in parts), zero),
+            final_area=sum((part.final_area for part in parts), zero),
+            material_subtotal=sum((part.material_subtotal for part in parts), zero),
+            installation_subtotal=sum((part.installation_subtotal for part in parts), zero),
+            items_count=sum(part.items_count for part in parts),
+            has_complex_installation=any(part.has_complex_installation for part in parts),
+            rooms=frozenset().union(*(part.rooms for part in parts)),
+        )
+
+
 # ============================================================================
 # CALCULATION ENGINE
 # ============================================================================
@@ -194,14 +308,16 @@ class QuotationCalculationResult:
 class QuotationCalculator:
     """Motor de cálculo de cotizaciones"""
     
-    def __init__(self, tax_rate: Optional[Decimal] = None):
+    def __init__(self, tax_rate: Optional[Decimal] = None, rules: Optional[PricingRules] = None):
         """
         Inicializar calculadora
         
         Args:
-            tax_rate: Tasa de impuesto (None para usar default)
+            tax_rate: Tasa de impuesto (None para usar la de las reglas)
+            rules: Reglas de negocio (None para usar las por defecto)
         """
-        self.tax_rate = tax_rate or DEFAULT_TAX_RATE
+        self.rules = rules or DEFAULT_PRICING_RULES
+        self.tax_rate = tax_rate or self.rules.tax_rate
     
     def calculate_waste_percentage(
         self,
@@ -228,21 +344,21 @@ class QuotationCalculator:
         elif specifications.get("automotive", False):
             opening_type = "automotive_flat"
         
+        rules = self.rules
+        
         # Obtener porcentaje de la matriz
-        waste_pct = WASTE_MATRIX.get(opening_type, {}).get(
+        waste_pct = rules.waste_matrix.get(opening_type, {}).get(
             product_type,
-            Decimal("0.15")  # Default 15%
+            rules.default_waste
         )
         
         # Ajustes adicionales por complejidad
-        if specifications.get("difficult_access", False):
-            waste_pct += Decimal("0.05")  # +5% por acceso difícil
+        for key, adjustment in rules.waste_adjustments:
+            if specifications.get(key, False):
+                waste_pct += adjustment
         
-        if specifications.get("irregular_shape", False):
-            waste_pct += Decimal("0.08")  # +8% por forma irregular
-        
-        # Tope máximo de 35%
-        return min(waste_pct, Decimal("0.35"))
+        # Tope máximo
+        return min(waste_pct, rules.max_waste)
     
     def calculate_complexity_factor(
         self,
@@ -258,34 +374,20 @@ class QuotationCalculator:
         Returns:
             Factor multiplicador (1.0 = normal, >1.0 = más complejo)
         """
+        rules = self.rules
         factor = Decimal("1.0")
         
-        # Altura de instalación (por piso)
+        # Altura de instalación (por piso), el escalón más alto que aplique
         floor = specifications.get("floor", 1)
-        if floor > 3:
-            factor *= Decimal("1.2")  # +20% por altura
-        elif floor > 6:
-            factor *= Decimal("1.4")  # +40% por mucha altura
-        
-        # Acceso difícil
-        if specifications.get("difficult_access", False):
-            factor *= Decimal("1.3")  # +30%
-        
-        # Vidrio curvo
-        if specifications.get("curved", False):
-            factor *= Decimal("1.5")  # +50%
-        
-        # Condiciones extremas
-        if specifications.get("extreme_weather", False):
-            factor *= Decimal("1.15")  # +15%
-        
-        # Instalación en horario nocturno
-        if specifications.get("night_install", False):
-            factor *= Decimal("1.25")  # +25%
+        for min_floor, height_factor in rules.height_factors:
+            if floor > min_floor:
+                factor *= height_factor
+                break
         
-        # Requiere andamios o equipos especiales
-        if specifications.get("requires_scaffolding", False):
-            factor *= Decimal("1.4")  # +40%
+        # Acceso difícil, vidrio curvo, clima, horario, andamios...
+        for key, complexity in rules.complexity_factors:
+            if specifications.get(key, False):
+                factor *= complexity
         
         return factor
     
@@ -302,7 +404,7 @@ class QuotationCalculator:
         Returns:
             Tuple (porcentaje_descuento, monto_descuento)
         """
-        for threshold, discount_pct in VOLUME_DISCOUNTS:
+        for threshold, discount_pct in self.rules.volume_discounts:
             if total_area >= threshold:
                 return discount_pct, discount_pct
         
@@ -449,14 +551,36 @@ class QuotationCalculator:
             item = self.calculate_item(opening, product)
             items.append(item)
         
+        return self.finalize_quotation(items, ItemTotals.from_items(items), tax_rate)
+    
+    def finalize_quotation(
+        self,
+        items: List[CalculationItem],
+        totals: ItemTotals,
+        tax_rate: Decimal
+    ) -> QuotationCalculationResult:
+        """
+        Aplicar descuento por volumen, impuestos y redondeo final
+        
+        Separado de calculate_quotation para poder calcular los items por
+        fragmentos (ver parallel_calculation) y cerrar una sola vez.
+        
+        Args:
+            items: Items calculados, en el orden de las aberturas
+            totals: Sumas de los items (ItemTotals.from_items o merge)
+            tax_rate: Tasa de impuesto efectiva
+        
+        Returns:
+            Resultado completo del cálculo
+        """
         # Totales de áreas
-        total_base_area = sum(item.base_area for item in items)
-        total_waste_area = sum(item.waste_area for item in items)
-        total_final_area = sum(item.final_area for item in items)
+        total_base_area = totals.base_area
+        total_waste_area = totals.waste_area
+        total_final_area = totals.final_area
         
         # Totales de montos
-        material_subtotal = sum(item.material_subtotal for item in items)
-        installation_subtotal = sum(item.installation_subtotal for item in items)
+        material_subtotal = totals.material_subtotal
+        installation_subtotal = totals.installation_subtotal
         subtotal_before_discount = material_subtotal + installation_subtotal
         
         # Descuento por volumen
@@ -485,15 +609,18 @@ class QuotationCalculator:
         total = total.quantize(Decimal("0.01"), ROUND_HALF_UP)
         
         # Detalles adicionales
+        min_discount_area = self.rules.min_discount_area
         calculation_details = {
-            "items_count": len(items),
+            "items_count": totals.items_count,
+            # Lo leen los rollups del panel (rollups.area_from_details)
+            "total_area_sqm": float(total_final_area),
+            "volume_discount_percentage": float(volume_discount_pct),
             "average_waste_percentage": float(total_waste_area / total_base_area) if total_base_area > 0 else 0.0,
-            "volume_discount_threshold_reached": total_final_area >= Decimal("50"),
+            "volume_discount_threshold_reached": min_discount_area is not None and total_final_area >= min_discount_area,
             "tax_rate": float(tax_rate),
-            "has_complex_installation": any(
-                item.complexity_factor > Decimal("1.0") for item in items
-            ),
-            "total_rooms": len(set(item.opening_name.split(" - ")[0] for item in items)),
+            "has_complex_installation": totals.has_complex_installation,
+            "total_rooms": len(totals.rooms),
+            "rules_version": self.rules.version,
         }
         
         return QuotationCalculationResult(
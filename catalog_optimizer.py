@@ -0,0 +1,321 @@
+"""
+Catalog Optimizer
+Asignación de productos más barata para un conjunto de aberturas, teniendo
+en cuenta que el descuento por volumen (VOLUME_DISCOUNTS) es escalonado
+sobre el área total: poda de productos dominados y programación dinámica
+exacta sobre el área que falta para cada escalón de descuento
+"""
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .calculator import (
+    OpeningData,
+    ProductData,
+    QuotationCalculationResult,
+    QuotationCalculator,
+)
+
+
+DEFAULT_ALTERNATIVES = 3
+
+# Productos más baratos por abertura considerados para alternativas
+RUNNER_UPS_PER_OPENING = 2
+
+CENT = Decimal("0.01")
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class OptimizationConstraints:
+    """Restricciones sobre los productos elegibles"""
+    # Valor mínimo de especificaciones numéricas (ej: {"heat_rejection": 50})
+    min_specifications: Dict[str, Decimal] = field(default_factory=dict)
+    # Tipos de producto permitidos en todas las aberturas (None = todos)
+    product_types: Optional[Set[str]] = None
+    # Tipos de producto permitidos por ambiente (OpeningData.room_name)
+    room_product_types: Dict[str, Set[str]] = field(default_factory=dict)
+
+    def allows(self, opening: OpeningData, product: ProductData) -> bool:
+        if self.product_types is not None and product.product_type not in self.product_types:
+            return False
+        room_types = self.room_product_types.get(opening.room_name)
+        if room_types is not None and product.product_type not in room_types:
+            return False
+        specifications = product.specifications or {}
+        for key, minimum in self.min_specifications.items():
+            value = specifications.get(key)
+            try:
+                if value is None or Decimal(str(value)) < Decimal(str(minimum)):
+                    return False
+            except ArithmeticError:
+                return False
+        return True
+
+
+@dataclass
+class CatalogAssignment:
+    """Un producto por abertura y su cálculo completo"""
+    products: List[ProductData]
+    result: QuotationCalculationResult
+    target_area: Decimal  # escalón de descuento para el que se optimizó
+
+    @property
+    def total(self) -> Decimal:
+        return self.result.total
+
+    @property
+    def product_ids(self) -> List[str]:
+        return [product.product_id for product in self.products]
+
+
+@dataclass
+class OptimizationResult:
+    """Asignación óptima y alternativas más caras"""
+    best: CatalogAssignment
+    alternatives: List[CatalogAssignment]
+    candidates: int  # pares abertura-producto permitidos
+    candidates_after_pruning: int
+    states: int  # celdas calculadas de la programación dinámica
+    duration_s: float
+
+
+@dataclass
+class _Option:
+    product: ProductData
+    area: int  # centésimas de m²
+    cost: int  # centavos
+
+
+# ============================================================================
+# OPTIMIZER
+# ============================================================================
+
+def _cents(value: Decimal) -> int:
+    return int(value.quantize(CENT, ROUND_HALF_UP) * 100)
+
+
+class _CoverSolver:
+    """
+    Costo mínimo eligiendo una opción por abertura con área total >= objetivo
+    (mochila de elección múltiple de cobertura)
+
+    Programación dinámica exacta sobre el déficit en centésimas de m²: la
+    capa i tiene, para cada déficit d, el costo extra mínimo para ganar al
+    menos d de área sobre la opción más barata de las primeras i aberturas.
+    El déficit se acota por el área extra alcanzable (las opciones no
+    dominadas de una abertura difieren sólo en el desperdicio), así que la
+    tabla es chica; se construye una vez hasta el mayor déficit pedido y
+    resuelve todos los escalones.
+    """
+
+    def __init__(self, options: List[List[_Option]]):
+        self.options = options
+        self.base_area = sum(opening_options[0].area for opening_options in options)
+        self.base_cost = sum(opening_options[0].cost for opening_options in options)
+        self.reachable = sum(opening_options[-1].area - opening_options[0].area for opening_options in options)
+        self.states = 0
+        self._layers: List[List[float]] = []
+
+    def prepare(self, targets: Sequence[int]) -> None:
+        """Construir las capas hasta el mayor déficit alcanzable de targets"""
+        limit = min(max(targets, default=0) - self.base_area, self.reachable)
+        if limit <= 0 or (self._layers and len(self._layers[0]) > limit):
+            return
+        size = limit + 1
+        layer: List[float] = [0] + [float("inf")] * limit
+        layers = [layer]
+        for opening_options in self.options:
+            base = opening_options[0]
+            current = layer
+            for option in opening_options[1:]:
+                gain, extra = min(option.area - base.area, size), option.cost - base.cost
+                # Déficit d con esta opción: el de d - gain (al menos 0) de la capa previa
+                shifted = [layer[0]] * gain + layer[:size - gain]
+                current = list(map(min, current, [cost + extra for cost in shifted]))
+                self.states += size
+            layer = current
+            layers.append(layer)
+        self._layers = layers
+
+    def solve(self, target: int) -> Optional[Tuple[int, List[int]]]:
+        """
+        Returns:
+            Tuple (costo, índice de opción por abertura) o None si es inalcanzable
+        """
+        deficit = target - self.base_area
+        choice = [0] * len(self.options)
+        if deficit <= 0:
+            return self.base_cost, choice
+        if deficit > self.reachable:
+            return None
+        self.prepare([target])
+
+        layers = self._layers
+        extra = layers[-1][deficit]
+        # Reconstrucción desde la última abertura: una opción que explica el costo de la capa
+        remaining = deficit
+        for opening in range(len(self.options) - 1, -1, -1):
+            previous, cost = layers[opening], layers[opening + 1][remaining]
+            opening_options = self.options[opening]
+            base = opening_options[0]
+            for index, option in enumerate(opening_options):
+                rest = max(remaining - (option.area - base.area), 0)
+                if previous[rest] + option.cost - base.cost == cost:
+                    choice[opening] = index
+                    remaining = rest
+                    break
+        return self.base_cost + int(extra), choice
+
+
+class CatalogOptimizer:
+    """Optimizador de la asignación de productos sobre QuotationCalculator"""
+
+    def __init__(self, calculator: Optional[QuotationCalculator] = None):
+        """
+        Inicializar
+
+        Args:
+            calculator: Calculadora (None para una con la tasa por defecto)
+        """
+        self.calculator = calculator or QuotationCalculator()
+
+    def _options(
+        self,
+        opening: OpeningData,
+        products: Sequence[ProductData],
+        constraints: OptimizationConstraints
+    ) -> Tuple[List[_Option], List[_Option], int]:
+        """
+        Opciones de una abertura
+
+        Returns:
+            Tuple (no dominadas por área y costo crecientes, las más baratas
+            sin podar para alternativas, cantidad de permitidas)
+        """
+        calculator = self.calculator
+        base_area, _, _ = calculator.calculate_opening_area(opening)
+        complexity = calculator.calculate_complexity_factor(opening.specifications)
+        areas: Dict[str, Decimal] = {}
+        cheapest: Dict[int, _Option] = {}
+        ranked: List[_Option] = []
+        allowed = 0
+        for product in products:
+            if not constraints.allows(opening, product):
+                continue
+            allowed += 1
+            final_area = areas.get(product.product_type)
+            if final_area is None:
+                waste = calculator.calculate_waste_percentage(
+                    opening.opening_type, product.product_type, opening.specifications
+                )
+                final_area = areas[product.product_type] = (base_area + base_area * waste).quantize(CENT, ROUND_HALF_UP)
+            # Mismo redondeo que calculate_item: material e instalación por separado
+            cost = _cents(final_area * product.price_per_sqm) + _cents(final_area * product.installation_per_sqm * complexity)
+            option = _Option(product, int(final_area * 100), cost)
+            current = cheapest.get(option.area)
+            if current is None or cost < current.cost:
+                cheapest[option.area] = option
+            ranked.append(option)
+
+        # Dominada: otra opción con igual o más área cuesta lo mismo o menos
+        frontier: List[_Option] = []
+        for option in sorted(cheapest.values(), key=lambda option: -option.area):
+            if not frontier or option.cost < frontier[-1].cost:
+                frontier.append(option)
+        frontier.reverse()  # área y costo crecientes
+        ranked.sort(key=lambda option: option.cost)
+        return frontier, ranked[:RUNNER_UPS_PER_OPENING + 1], allowed
+
+    def optimize(
+        self,
+        openings: Sequence[OpeningData],
+        products: Sequence[ProductData],
+        constraints: Optional[OptimizationConstraints] = None,
+        alternatives: int = DEFAULT_ALTERNATIVES
+    ) -> OptimizationResult:
+        """
+        Asignación de productos de menor total
+
+        Para cada escalón de descuento por volumen de las reglas (y sin descuento) se resuelve
+        el costo mínimo exacto con área total >= umbral; el total de cada
+        escalón es ese costo con su descuento. Las alternativas salen de los
+        óptimos de los demás escalones y de cambiar el producto de una
+        abertura por el siguiente más barato.
+
+        Args:
+            openings: Aberturas a cotizar
+            products: Catálogo de productos
+            constraints: Restricciones (None para ninguna)
+            alternatives: Cantidad máxima de alternativas
+
+        Returns:
+            Mejor asignación, alternativas y estadísticas de la búsqueda
+        """
+        if not openings:
+            raise ValueError("Se requiere al menos una abertura")
+        start = time.perf_counter()
+        constraints = constraints or OptimizationConstraints()
+
+        options: List[List[_Option]] = []
+        runner_ups: List[List[_Option]] = []
+        candidates = 0
+        for opening in openings:
+            opening_options, ranked, allowed = self._options(opening, products, constraints)
+            if not opening_options:
+                raise ValueError(f"Ningún producto cumple las restricciones para la abertura {opening.opening_id}")
+            options.append(opening_options)
+            runner_ups.append(ranked)
+            candidates += allowed
+
+        solver = _CoverSolver(options)
+        thresholds = [Decimal("0")] + sorted(threshold for threshold, _ in self.calculator.rules.volume_discounts)
+        solver.prepare([int(threshold * 100) for threshold in thresholds])
+
+        # (total estimado, escalón, opción por abertura)
+        solutions: Dict[Tuple[int, ...], Tuple[float, Decimal, List[_Option]]] = {}
+
+        def add(chosen: List[_Option], threshold: Decimal) -> None:
+            key = tuple(id(option.product) for option in chosen)
+            if key not in solutions:
+                solutions[key] = (self._estimate(chosen), threshold, chosen)
+
+        for threshold in thresholds:
+            solved = solver.solve(int(threshold * 100))
+            if solved is None:
+                continue
+            add([opening_options[index] for opening_options, index in zip(options, solved[1])], threshold)
+
+        # Alternativas: un cambio de producto sobre la mejor asignación
+        _, best_threshold, best_chosen = min(solutions.values(), key=lambda solution: solution[0])
+        for position, ranked in enumerate(runner_ups):
+            for option in ranked:
+                if option.product is not best_chosen[position].product:
+                    add(best_chosen[:position] + [option] + best_chosen[position + 1:], best_threshold)
+
+        ordered = sorted(solutions.values(), key=lambda solution: solution[0])
+        assignments = []
+        for _, threshold, chosen in ordered[:alternatives + 1]:
+            products_chosen = [option.product for option in chosen]
+            result = self.calculator.calculate_quotation(list(openings), products_chosen)
+            assignments.append(CatalogAssignment(products_chosen, result, threshold))
+        assignments.sort(key=lambda assignment: assignment.total)
+
+        return OptimizationResult(
+            best=assignments[0],
+            alternatives=assignments[1:],
+            candidates=candidates,
+            candidates_after_pruning=sum(len(opening_options) for opening_options in options),
+            states=solver.states,
+            duration_s=time.perf_counter() - start,
+        )
+
+    def _estimate(self, chosen: List[_Option]) -> float:
+        """Subtotal con descuento (sin impuestos) de una asignación"""
+        area = sum(option.area for option in chosen)
+        discount = self.calculator.calculate_volume_discount(Decimal(area) / 100)[0]
+        return sum(option.cost for option in chosen) * float(1 - discount)
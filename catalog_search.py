@@ -0,0 +1,361 @@
+"""
+Catalog Search
+Búsqueda facetada de productos sobre las columnas generadas a partir de
+Product.specifications, con conteos de facetas precalculados por tipo de
+producto y vertical
+"""
+import argparse
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, String, cast, create_engine, func, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from .models import Product, ProductCategory, ProductFacetCount, ProductType, VerticalType
+from .tracking import has_changes, listen_once, previous_value
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Ancho de los rangos de cada faceta numérica; el bucket es el límite inferior
+NUMERIC_FACETS: Dict[str, int] = {
+    "heat_rejection": 10,
+    "visible_light_transmission": 10,
+    "uv_protection": 10,
+    "opacity": 10,
+    "thickness_microns": 50,
+    "warranty_years": 1,
+}
+
+CATEGORICAL_FACETS = ("color", "material")
+
+PRODUCTS_TABLE = Product.__table__
+CATEGORIES_TABLE = ProductCategory.__table__
+FACET_COUNTS_TABLE = ProductFacetCount.__table__
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class CatalogFilters:
+    """
+    Filtros de búsqueda
+
+    ranges: {"heat_rejection": (60, None), "visible_light_transmission": (None, 20)}
+    values: {"color": ["charcoal", "bronze"]}
+    """
+    vertical: Optional[VerticalType] = None
+    product_type: Optional[ProductType] = None
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    values: Dict[str, List[str]] = field(default_factory=dict)
+
+    def validate(self) -> None:
+        for name in self.ranges:
+            if name not in NUMERIC_FACETS:
+                raise ValueError(f"Faceta numérica desconocida: {name}")
+        for name in self.values:
+            if name not in CATEGORICAL_FACETS:
+                raise ValueError(f"Faceta categórica desconocida: {name}")
+
+    @property
+    def has_spec_filters(self) -> bool:
+        return bool(self.ranges or self.values)
+
+
+@dataclass
+class CatalogHit:
+    """Producto encontrado"""
+    product_id: UUID
+    sku: str
+    name: str
+    product_type: ProductType
+    vertical: VerticalType
+    heat_rejection: Optional[Decimal]
+    visible_light_transmission: Optional[Decimal]
+    uv_protection: Optional[Decimal]
+    warranty_years: Optional[Decimal]
+    color: Optional[str]
+
+
+@dataclass
+class CatalogSearchResult:
+    """Página de productos y conteos por faceta ({faceta: {bucket: cantidad}})"""
+    hits: List[CatalogHit]
+    facets: Dict[str, Dict[str, int]]
+    next_sku: Optional[str]
+
+
+# ============================================================================
+# EXPRESSIONS
+# ============================================================================
+
+def _base_conditions(filters: CatalogFilters, exclude: Optional[str] = None) -> list:
+    """
+    Condiciones WHERE de los filtros
+
+    Args:
+        filters: Filtros de búsqueda
+        exclude: Faceta cuyo propio filtro se omite (conteo disyuntivo)
+    """
+    p = PRODUCTS_TABLE.c
+    conditions = [p.active.is_(True)]
+    if filters.vertical is not None:
+        conditions.append(CATEGORIES_TABLE.c.vertical == filters.vertical)
+    if filters.product_type is not None:
+        conditions.append(p.product_type == filters.product_type)
+
+    for name, (low, high) in filters.ranges.items():
+        if name == exclude:
+            continue
+        if low is not None:
+            conditions.append(p[name] >= low)
+        if high is not None:
+            conditions.append(p[name] <= high)
+    for name, values in filters.values.items():
+        if name != exclude and values:
+            conditions.append(p[name].in_(values))
+    return conditions
+
+
+def bucket_expression(facet: str):
+    """Bucket de una faceta como texto (límite inferior del rango o el valor)"""
+    column = PRODUCTS_TABLE.c[facet]
+    if facet in CATEGORICAL_FACETS:
+        return column
+    width = NUMERIC_FACETS[facet]
+    return cast(cast(func.floor(column / width) * width, Integer), String)
+
+
+def _facet_select(facet: str, conditions: list, group_columns=()):
+    bucket = bucket_expression(facet)
+    return (
+        select(*group_columns, literal(facet).label("facet"), bucket.label("bucket"), func.count().label("product_count"))
+        .select_from(PRODUCTS_TABLE.join(CATEGORIES_TABLE))
+        .where(*conditions, PRODUCTS_TABLE.c[facet].is_not(None))
+        .group_by(*group_columns, bucket)
+    )
+
+
+def _all_facets() -> Tuple[str, ...]:
+    return tuple(NUMERIC_FACETS) + CATEGORICAL_FACETS
+
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+def _precomputed_facets(session: Session, filters: CatalogFilters) -> Dict[str, Dict[str, int]]:
+    f = FACET_COUNTS_TABLE.c
+    stmt = select(f.facet, f.bucket, func.sum(f.product_count)).group_by(f.facet, f.bucket)
+    if filters.vertical is not None:
+        stmt = stmt.where(f.vertical == filters.vertical)
+    if filters.product_type is not None:
+        stmt = stmt.where(f.product_type == filters.product_type)
+
+    facets: Dict[str, Dict[str, int]] = {name: {} for name in _all_facets()}
+    for facet, bucket, count in session.execute(stmt):
+        facets.setdefault(facet, {})[bucket] = int(count)
+    return facets
+
+
+def _dynamic_facets(session: Session, filters: CatalogFilters) -> Dict[str, Dict[str, int]]:
+    """
+    Conteos sobre el conjunto filtrado en una sola sentencia (UNION ALL)
+
+    Cada faceta se cuenta sin su propio filtro, para que la interfaz muestre
+    las alternativas disponibles dentro de esa faceta.
+    """
+    selects = [_facet_select(name, _base_conditions(filters, exclude=name)) for name in _all_facets()]
+    facets: Dict[str, Dict[str, int]] = {name: {} for name in _all_facets()}
+    for facet, bucket, count in session.execute(union_all(*selects)):
+        facets[facet][bucket] = int(count)
+    return facets
+
+
+def search_catalog(
+    session: Session,
+    filters: Optional[CatalogFilters] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after_sku: Optional[str] = None,
+    with_facets: bool = True
+) -> CatalogSearchResult:
+    """
+    Buscar productos activos por rangos y valores de especificaciones
+
+    Sin filtros de especificaciones los conteos salen de product_facet_counts;
+    con filtros se calculan sobre el conjunto filtrado.
+
+    Args:
+        session: Sesión de base de datos
+        filters: Filtros de búsqueda (None para todo el catálogo)
+        limit: Productos por página (máximo MAX_PAGE_SIZE)
+        after_sku: Último SKU de la página anterior (paginación por keyset)
+        with_facets: Incluir conteos por faceta
+
+    Returns:
+        Productos ordenados por SKU, conteos y SKU para la página siguiente
+    """
+    filters = filters or CatalogFilters()
+    filters.validate()
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    p = PRODUCTS_TABLE.c
+    stmt = (
+        select(
+            p.id, p.sku, p.name, p.product_type, CATEGORIES_TABLE.c.vertical,
+            p.heat_rejection, p.visible_light_transmission, p.uv_protection,
+            p.warranty_years, p.color,
+        )
+        .select_from(PRODUCTS_TABLE.join(CATEGORIES_TABLE))
+        .where(*_base_conditions(filters))
+        .order_by(p.sku)
+        .limit(limit + 1)
+    )
+    if after_sku is not None:
+        stmt = stmt.where(p.sku > after_sku)
+
+    rows = session.execute(stmt).all()
+    hits = [
+        CatalogHit(
+            product_id=row.id,
+            sku=row.sku,
+            name=row.name,
+            product_type=row.product_type,
+            vertical=row.vertical,
+            heat_rejection=row.heat_rejection,
+            visible_light_transmission=row.visible_light_transmission,
+            uv_protection=row.uv_protection,
+            warranty_years=row.warranty_years,
+            color=row.color,
+        )
+        for row in rows[:limit]
+    ]
+
+    facets: Dict[str, Dict[str, int]] = {}
+    if with_facets:
+        if filters.has_spec_filters:
+            facets = _dynamic_facets(session, filters)
+        else:
+            facets = _precomputed_facets(session, filters)
+
+    next_sku = hits[-1].sku if len(rows) > limit else None
+    return CatalogSearchResult(hits=hits, facets=facets, next_sku=next_sku)
+
+
+# ============================================================================
+# FACET COUNTS
+# ============================================================================
+
+def rebuild_facet_counts(session: Session, product_types: Optional[Iterable[ProductType]] = None) -> int:
+    """
+    Reconstruir product_facet_counts con INSERT ... SELECT
+
+    Args:
+        session: Sesión de base de datos (el commit queda a cargo del llamador)
+        product_types: Tipos a reconstruir (None para todos)
+
+    Returns:
+        Cantidad de filas de conteo escritas
+    """
+    connection = session.connection()
+    p = PRODUCTS_TABLE.c
+    conditions = [p.active.is_(True)]
+    delete = FACET_COUNTS_TABLE.delete()
+    if product_types is not None:
+        product_types = list(product_types)
+        if not product_types:
+            return 0
+        conditions.append(p.product_type.in_(product_types))
+        delete = delete.where(FACET_COUNTS_TABLE.c.product_type.in_(product_types))
+
+    group_columns = (p.product_type, CATEGORIES_TABLE.c.vertical)
+    counts = union_all(*(_facet_select(name, conditions, group_columns) for name in _all_facets()))
+
+    connection.execute(delete)
+    return connection.execute(
+        FACET_COUNTS_TABLE.insert().from_select(
+            ["product_type", "vertical", "facet", "bucket", "product_count"], counts
+        )
+    ).rowcount
+
+
+def get_facet_counts(
+    session: Session,
+    vertical: Optional[VerticalType] = None,
+    product_type: Optional[ProductType] = None
+) -> Dict[str, Dict[str, int]]:
+    """Conteos precalculados por faceta para un tipo de producto y vertical"""
+    return _precomputed_facets(session, CatalogFilters(vertical=vertical, product_type=product_type))
+
+
+# ============================================================================
+# EVENTS
+# ============================================================================
+
+WATCHED_ATTRIBUTES = ("specifications", "active", "product_type", "category_id")
+
+
+def _changed_product_types(session: Session) -> Set[ProductType]:
+    product_types: Set[ProductType] = set()
+    for obj in session.new:
+        if isinstance(obj, Product):
+            product_types.add(obj.product_type)
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Product):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or has_changes(state, WATCHED_ATTRIBUTES):
+            product_types.update((previous_value(state, "product_type"), obj.product_type))
+    product_types.discard(None)
+    return product_types
+
+
+def _refresh_after_flush(session: Session, flush_context) -> None:
+    product_types = _changed_product_types(session)
+    if product_types:
+        rebuild_facet_counts(session, product_types)
+
+
+def register_facet_refresh(session_target=Session) -> None:
+    """
+    Reconstruir los conteos de los tipos afectados en cada flush que
+    modifique productos (el catálogo cambia poco; para importaciones
+    masivas conviene no registrarlo y correr el CLI al final)
+
+    Args:
+        session_target: Clase Session, sessionmaker o instancia a instrumentar
+    """
+    listen_once(session_target, "after_flush", _refresh_after_flush)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstrucción de product_facet_counts")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument(
+        "--product-type", action="append", type=ProductType,
+        help="Tipo de producto a reconstruir (repetible; por defecto todos)",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session, session.begin():
+        rows = rebuild_facet_counts(session, args.product_type)
+    print(f"product_facet_counts reconstruida: {rows} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
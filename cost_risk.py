@@ -0,0 +1,287 @@
+"""
+Cost Risk
+Estimación Monte Carlo del riesgo de costo por incertidumbre de medición y
+de desperdicio: muestras vectorizadas con NumPy que pasan por la misma
+lógica de área, desperdicio, descuento e impuestos que calculate_quotation
+"""
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Optional, Sequence
+
+from .calculator import (
+    OpeningData,
+    ProductData,
+    QuotationCalculator,
+)
+
+
+# Medido: ~70 ms por cada 10.000 muestras con 500 items en un núcleo; el
+# default entra en el presupuesto de 100 ms de una cotización interactiva
+DEFAULT_DRAWS = 10000
+
+# Elementos (muestras × items) por bloque: acota la memoria y entra en caché
+CHUNK_ELEMENTS = 32_000
+
+# Ancho estándar del film para franjas (calculate_opening_area)
+STRIP_FILM_WIDTH = 1.52
+
+PERCENTILES = (50, 90, 95)
+
+SQRT3 = 3 ** 0.5
+
+# Bits de cada uniforme: un entero aleatorio de 64 bits da las tres muestras
+# de un item (ancho, alto, desperdicio); generar los bits es el paso más caro
+UNIFORM_BITS = 21
+UNIFORM_MASK = (1 << UNIFORM_BITS) - 1
+UNIFORM_SCALE = 1.0 / (1 << UNIFORM_BITS)
+
+# floor(x + HALF) es ROUND_HALF_UP en centésimas ya escaladas; el épsilon
+# compensa los decimales no representables (97.75 -> 97.7499...)
+HALF = 0.5 + 1e-7
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - depende del entorno
+        raise ImportError("cost_risk requiere numpy (pip install numpy)") from exc
+    return numpy
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class UncertaintyModel:
+    """Desvíos estándar de la incertidumbre por item (errores uniformes con ese desvío)"""
+    measurement_sd_m: float = 0.01  # error de medición de ancho y alto (metros)
+    waste_sd: float = 0.02  # variación del desperdicio (absoluta)
+    # Desvío adicional del desperdicio por especificación
+    specification_waste_sd: Dict[str, float] = field(default_factory=lambda: {
+        "irregular_shape": 0.04,
+        "curved": 0.05,
+    })
+
+    def item_waste_sd(self, specifications: Optional[Dict]) -> float:
+        specifications = specifications or {}
+        variance = self.waste_sd ** 2
+        for key, sd in self.specification_waste_sd.items():
+            if specifications.get(key):
+                variance += sd ** 2
+        return variance ** 0.5
+
+
+@dataclass
+class RiskEstimate:
+    """Distribución del total cotizado"""
+    quoted_total: Decimal
+    draws: int
+    mean: Decimal
+    std: Decimal
+    percentiles: Dict[int, Decimal]  # {50: ..., 90: ..., 95: ...}
+    overrun_probability: float  # P(total > cotizado)
+    quoted_discount: Decimal
+    tier_probabilities: Dict[Decimal, float]  # porcentaje de descuento -> probabilidad
+    tier_up_probability: float  # cae en un escalón de mayor descuento
+    tier_down_probability: float  # cae en un escalón de menor descuento
+    duration_s: float
+
+    @property
+    def contingency_p90(self) -> Decimal:
+        """Margen sobre el total cotizado para cubrir el percentil 90"""
+        return max(self.percentiles[90] - self.quoted_total, Decimal("0"))
+
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def _round_units(np, values) -> None:
+    """ROUND_HALF_UP a enteros de centésimas, en el lugar (valores positivos)"""
+    values += HALF
+    np.floor(values, out=values)
+
+
+def estimate_cost_risk(
+    openings: Sequence[OpeningData],
+    products: Sequence[ProductData],
+    draws: int = DEFAULT_DRAWS,
+    model: Optional[UncertaintyModel] = None,
+    seed: Optional[int] = None,
+    calculator: Optional[QuotationCalculator] = None
+) -> RiskEstimate:
+    """
+    Distribución del total ante errores de medición y de desperdicio
+
+    Cada muestra perturba ancho, alto y desperdicio de cada item y recalcula
+    área, redondeos, descuento por volumen e impuestos igual que
+    calculate_quotation (en punto flotante). El desperdicio muestreado solo
+    se acota en 0: el tope de facturación (max_waste) limita lo que se
+    cotiza, no el material que realmente se usa, y ese excedente es parte
+    del sobrecosto.
+
+    Args:
+        openings: Aberturas de la cotización
+        products: Producto de cada abertura
+        draws: Cantidad de muestras
+        model: Desvíos de la incertidumbre (None para los por defecto)
+        seed: Semilla para resultados reproducibles
+        calculator: Calculadora (None para una por defecto)
+
+    Returns:
+        Percentiles, probabilidad de sobrecosto y de cambio de escalón
+    """
+    if draws <= 0:
+        raise ValueError("draws debe ser positivo")
+    np = _numpy()
+    start = time.perf_counter()
+    calculator = calculator or QuotationCalculator()
+    model = model or UncertaintyModel()
+
+    quoted = calculator.calculate_quotation(list(openings), list(products))
+    items = quoted.items
+
+    width = np.array([float(item.base_width) for item in items])
+    height = np.array([float(item.base_height) for item in items])
+    quantity = np.array([float(item.quantity) for item in items])
+    waste = np.array([float(item.waste_percentage) for item in items])
+    waste_sd = np.array([model.item_waste_sd(opening.specifications) for opening in openings])
+    material_price = np.array([float(item.material_cost_per_sqm) for item in items])
+    installation_price = np.array([float(item.installation_cost_per_sqm) for item in items])
+    strip_horizontal = np.array([opening.opening_type == "strip_horizontal" for opening in openings])
+    strip_vertical = np.array([opening.opening_type == "strip_vertical" for opening in openings])
+
+    rules = calculator.rules
+    tiers = rules.volume_discounts
+    thresholds = [float(threshold) for threshold, _ in tiers]
+    discounts = [float(discount) for _, discount in tiers]
+    tax_rate = float(quoted.tax_rate)
+
+    # Errores uniformes acotados con el desvío del modelo (sd = semiancho / √3):
+    # muestrear uniformes es varias veces más rápido que normales y, sumados
+    # sobre los items, el total tiene la misma dispersión
+    half_width = model.measurement_sd_m * SQRT3
+    waste_half_width = waste_sd * SQRT3
+    # El factor de área final (1 + desperdicio) se muestrea directamente
+    factor_low = 1 + waste - waste_half_width
+    factor_span = 2 * waste_half_width
+    needs_clip = bool(np.any(waste - waste_half_width < 0))
+    needs_floor = bool(np.any(np.minimum(width, height) - half_width < 0.01))
+    has_strips = bool(strip_horizontal.any() or strip_vertical.any())
+
+    # Áreas y montos en centésimas (m² y centavos): redondear es un floor,
+    # sin escalar y desescalar en cada paso
+    quantity_units = quantity * 100
+    strip_units = quantity_units * STRIP_FILM_WIDTH
+    width_low, height_low = width - half_width, height - half_width
+
+    rng = np.random.default_rng(seed)
+    count = len(items)
+    chunk = max(1, CHUNK_ELEMENTS // max(count, 1))
+    first_rows = min(chunk, draws)
+    bits = np.empty((first_rows, count), dtype=np.uint64)
+    sampled_width = np.empty((first_rows, count))
+    sampled_height = np.empty((first_rows, count))
+    sampled_factor = np.empty((first_rows, count))
+    scratch = np.empty((first_rows, count))
+    totals = np.empty(draws)
+    total_areas = np.empty(draws)
+    for offset in range(0, draws, chunk):
+        rows = min(chunk, draws - offset)
+        w, h, f, t, b = (
+            sampled_width[:rows], sampled_height[:rows], sampled_factor[:rows], scratch[:rows], bits[:rows]
+        )
+        raw = rng.bit_generator.random_raw(rows * count).reshape(rows, count)
+        np.bitwise_and(raw, UNIFORM_MASK, out=b)
+        np.multiply(b, 2 * half_width * UNIFORM_SCALE, out=w)
+        w += width_low
+        np.right_shift(raw, UNIFORM_BITS, out=b)
+        b &= UNIFORM_MASK
+        np.multiply(b, 2 * half_width * UNIFORM_SCALE, out=h)
+        h += height_low
+        if needs_floor:
+            np.maximum(w, 0.01, out=w)
+            np.maximum(h, 0.01, out=h)
+
+        # Área base en centésimas de m², redondeada (queda en w)
+        if has_strips:
+            np.multiply(w, h, out=t)
+            t *= quantity_units
+            w *= strip_units
+            h *= strip_units
+            np.copyto(t, w, where=strip_horizontal)
+            np.copyto(t, h, where=strip_vertical)
+            w, t = t, w
+        else:
+            w *= h
+            w *= quantity_units
+        _round_units(np, w)
+
+        np.right_shift(raw, 2 * UNIFORM_BITS, out=b)
+        b &= UNIFORM_MASK
+        np.multiply(b, factor_span * UNIFORM_SCALE, out=f)
+        f += factor_low
+        if needs_clip:
+            np.maximum(f, 1.0, out=f)
+        # Área final = base × (1 + desperdicio), redondeada (queda en f)
+        f *= w
+        _round_units(np, f)
+
+        # Material e instalación en centavos, redondeados por separado como calculate_item
+        np.multiply(f, material_price, out=h)
+        _round_units(np, h)
+        np.multiply(f, installation_price, out=t)
+        _round_units(np, t)
+        h += t
+
+        total_areas[offset:offset + rows] = f.sum(axis=1)
+        totals[offset:offset + rows] = h.sum(axis=1)
+
+    total_areas /= 100
+    applied = np.select([total_areas >= threshold for threshold in thresholds], discounts, default=0.0)
+    totals -= totals * applied
+    totals += totals * tax_rate
+    _round_units(np, totals)
+    totals /= 100
+
+    quoted_total = quoted.total
+    quoted_discount = float(quoted.volume_discount_percentage)
+    tier_probabilities = {
+        discount_pct: float(np.mean(np.isclose(applied, float(discount_pct))))
+        for discount_pct in [Decimal("0.0")] + [discount for _, discount in sorted(rules.volume_discounts)]
+    }
+    values = np.percentile(totals, PERCENTILES)
+
+    def money(value) -> Decimal:
+        return Decimal(str(round(float(value), 2)))
+
+    return RiskEstimate(
+        quoted_total=quoted_total,
+        draws=draws,
+        mean=money(totals.mean()),
+        std=money(totals.std()),
+        percentiles={percentile: money(value) for percentile, value in zip(PERCENTILES, values)},
+        overrun_probability=float(np.mean(totals > float(quoted_total))),
+        quoted_discount=quoted.volume_discount_percentage,
+        tier_probabilities={tier: probability for tier, probability in tier_probabilities.items() if probability},
+        tier_up_probability=float(np.mean(applied > quoted_discount + 1e-9)),
+        tier_down_probability=float(np.mean(applied < quoted_discount - 1e-9)),
+        duration_s=time.perf_counter() - start,
+    )
+
+
+def risk_summary(estimate: RiskEstimate) -> Dict:
+    """Resumen serializable (ej: para calculation_details o la UI)"""
+    return {
+        "quoted_total": float(estimate.quoted_total),
+        "draws": estimate.draws,
+        "mean": float(estimate.mean),
+        "std": float(estimate.std),
+        "percentiles": {f"p{percentile}": float(value) for percentile, value in estimate.percentiles.items()},
+        "overrun_probability": round(estimate.overrun_probability, 4),
+        "contingency_p90": float(estimate.contingency_p90),
+        "tier_up_probability": round(estimate.tier_up_probability, 4),
+        "tier_down_probability": round(estimate.tier_down_probability, 4),
+    }
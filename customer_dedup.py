@@ -0,0 +1,542 @@
+"""
+Customer Deduplication
+Detección de clientes duplicados (formulario web y WhatsApp) por claves de
+bloqueo, propuestas de fusión revisables y fusión masiva que reasigna
+cotizaciones y conversaciones al cliente que se conserva
+"""
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import case, create_engine, select
+from sqlalchemy.orm import Session
+
+from .models import AuditLog, Customer, CustomerPurchaseTotals, Quotation, WhatsAppConversation
+from .purchase_totals import rebuild_purchase_totals
+from .whatsapp_matching import invalidate_senders
+
+
+DEFAULT_THRESHOLD = 0.6
+
+# Bloques más grandes se descartan (claves poco informativas: "info@", "Juan")
+MAX_BLOCK_SIZE = 100
+
+# Grupos más grandes no se proponen: suelen ser cadenas de coincidencias débiles
+MAX_CLUSTER_SIZE = 20
+
+LOAD_BATCH_SIZE = 50000
+MERGE_BATCH_SIZE = 1000
+
+DEDUP_USER_EMAIL = "system@customer-dedup"
+
+# Pesos del puntaje de un par
+WEIGHT_PHONE = 0.55
+WEIGHT_EMAIL = 0.6
+WEIGHT_EMAIL_LOCAL = 0.25
+WEIGHT_TAX_ID = 0.6
+WEIGHT_NAME = 0.35
+WEIGHT_COMPANY = 0.1
+PENALTY_TAX_ID = -0.6
+PENALTY_NAME = -0.2
+
+# Datos que el cliente conservado toma de los duplicados si no los tiene
+FILL_COLUMNS = (
+    "email",
+    "whatsapp",
+    "whatsapp_normalized",
+    "company_name",
+    "tax_id",
+    "address",
+    "city",
+    "state",
+    "country",
+    "postal_code",
+)
+
+CUSTOMERS_TABLE = Customer.__table__
+QUOTATIONS_TABLE = Quotation.__table__
+CONVERSATIONS_TABLE = WhatsAppConversation.__table__
+TOTALS_TABLE = CustomerPurchaseTotals.__table__
+AUDIT_TABLE = AuditLog.__table__
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+class CustomerRecord(NamedTuple):
+    """Datos normalizados de un cliente para comparar"""
+    customer_id: UUID
+    created_at: Optional[datetime]
+    name_tokens: FrozenSet[str]
+    email: Optional[str]
+    email_local: Optional[str]
+    phones: Tuple[str, ...]
+    tax_id: Optional[str]
+    company: Optional[str]
+
+
+@dataclass
+class MergeProposal:
+    """Grupo de clientes a fusionar en survivor_id"""
+    survivor_id: UUID
+    duplicate_ids: List[UUID]
+    score: float  # puntaje mínimo de los pares que unen el grupo
+    reasons: List[str]
+
+    def to_dict(self) -> Dict:
+        return {
+            "survivor_id": str(self.survivor_id),
+            "duplicate_ids": [str(customer_id) for customer_id in self.duplicate_ids],
+            "score": round(self.score, 3),
+            "reasons": self.reasons,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MergeProposal":
+        return cls(
+            survivor_id=UUID(data["survivor_id"]),
+            duplicate_ids=[UUID(customer_id) for customer_id in data["duplicate_ids"]],
+            score=float(data["score"]),
+            reasons=list(data.get("reasons", [])),
+        )
+
+
+@dataclass
+class DedupReport:
+    """Estadísticas de la detección"""
+    customers: int = 0
+    blocks: int = 0
+    skipped_blocks: int = 0
+    candidate_pairs: int = 0
+    matched_pairs: int = 0
+    skipped_clusters: int = 0
+    proposals: List[MergeProposal] = field(default_factory=list)
+    duration_s: float = 0.0
+
+
+@dataclass
+class MergeReport:
+    """Resultado de aplicar propuestas"""
+    customers_merged: int = 0
+    quotations_reassigned: int = 0
+    conversations_reassigned: int = 0
+    statements: int = 0
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def fold_text(value: Optional[str]) -> str:
+    """Minúsculas sin acentos ni signos"""
+    if not value:
+        return ""
+    if not value.isascii():
+        decomposed = unicodedata.normalize("NFKD", value)
+        value = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", value.casefold()).strip()
+
+
+def email_local_part(email: Optional[str]) -> Optional[str]:
+    """Parte local comparable: sin "+etiqueta", puntos ni guiones"""
+    if not email or "@" not in email:
+        return None
+    local = email.strip().lower().split("@", 1)[0].split("+", 1)[0]
+    local = local.replace(".", "").replace("-", "").replace("_", "")
+    return local or None
+
+
+def customer_record(
+    customer_id: UUID,
+    created_at: Optional[datetime],
+    name: Optional[str],
+    email: Optional[str],
+    phone_normalized: Optional[str],
+    whatsapp_normalized: Optional[str],
+    tax_id: Optional[str],
+    company_name: Optional[str]
+) -> CustomerRecord:
+    email = email.strip().lower() if email else None
+    tax_digits = _NON_DIGITS.sub("", tax_id) if tax_id else ""
+    return CustomerRecord(
+        customer_id=customer_id,
+        created_at=created_at,
+        name_tokens=frozenset(token for token in fold_text(name).split() if len(token) > 1),
+        email=email or None,
+        email_local=email_local_part(email),
+        phones=tuple(sorted({phone for phone in (phone_normalized, whatsapp_normalized) if phone})),
+        tax_id=tax_digits or None,
+        company=fold_text(company_name) or None,
+    )
+
+
+def blocking_keys(record: CustomerRecord) -> Iterator[str]:
+    """
+    Claves de bloqueo: solo se comparan clientes que comparten alguna
+
+    Teléfono y WhatsApp comparten espacio de claves para cruzar un alta
+    por formulario con una por WhatsApp.
+    """
+    for phone in record.phones:
+        yield f"p:{phone}"
+    if record.email_local:
+        yield f"e:{record.email_local}"
+    if record.tax_id:
+        yield f"t:{record.tax_id}"
+    if len(record.name_tokens) >= 2:
+        yield "n:" + " ".join(sorted(record.name_tokens))
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+def score_pair(a: CustomerRecord, b: CustomerRecord) -> Tuple[float, List[str]]:
+    """
+    Puntaje de que dos clientes sean la misma persona
+
+    Returns:
+        Tuple (puntaje entre 0 y 1, motivos)
+    """
+    score = 0.0
+    reasons: List[str] = []
+
+    if a.phones and b.phones and not set(a.phones).isdisjoint(b.phones):
+        score += WEIGHT_PHONE
+        reasons.append("phone")
+
+    if a.email and a.email == b.email:
+        score += WEIGHT_EMAIL
+        reasons.append("email")
+    elif a.email_local and a.email_local == b.email_local:
+        score += WEIGHT_EMAIL_LOCAL
+        reasons.append("email_local")
+
+    if a.tax_id and b.tax_id:
+        if a.tax_id == b.tax_id:
+            score += WEIGHT_TAX_ID
+            reasons.append("tax_id")
+        else:
+            score += PENALTY_TAX_ID
+
+    if a.name_tokens and b.name_tokens:
+        shared = len(a.name_tokens & b.name_tokens)
+        if shared:
+            score += WEIGHT_NAME * shared / len(a.name_tokens | b.name_tokens)
+            reasons.append("name")
+        else:
+            score += PENALTY_NAME
+
+    if a.company and a.company == b.company:
+        score += WEIGHT_COMPANY
+        reasons.append("company")
+
+    return round(max(0.0, min(1.0, score)), 6), reasons
+
+
+# ============================================================================
+# DETECTION
+# ============================================================================
+
+class _DisjointSet:
+    """Unión de conjuntos sobre índices de registros"""
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _survivor_order(record: CustomerRecord):
+    # El alta más antigua se conserva; sin fecha, al final
+    return (record.created_at is None, record.created_at or datetime.min, str(record.customer_id))
+
+
+def find_duplicates(
+    records: Sequence[CustomerRecord],
+    threshold: float = DEFAULT_THRESHOLD,
+    max_block_size: int = MAX_BLOCK_SIZE
+) -> DedupReport:
+    """
+    Detectar grupos de duplicados
+
+    Cada par candidato (que comparte una clave de bloqueo) se puntúa una
+    sola vez; los pares sobre el umbral se agrupan por unión de conjuntos.
+
+    Args:
+        records: Clientes normalizados (ver customer_record)
+        threshold: Puntaje mínimo para unir un par
+        max_block_size: Bloques más grandes se descartan
+
+    Returns:
+        Reporte con las propuestas de fusión
+    """
+    start = time.perf_counter()
+    report = DedupReport(customers=len(records))
+
+    blocks: Dict[str, List[int]] = {}
+    for index, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks.setdefault(key, []).append(index)
+
+    seen: Set[int] = set()
+    count = len(records)
+    clusters = _DisjointSet()
+    edge_scores: Dict[int, float] = {}
+    edge_reasons: Dict[int, Set[str]] = {}
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        report.blocks += 1
+        if len(members) > max_block_size:
+            report.skipped_blocks += 1
+            continue
+        for i, j in combinations(members, 2):
+            pair = i * count + j
+            if pair in seen:
+                continue
+            seen.add(pair)
+            score, reasons = score_pair(records[i], records[j])
+            if score >= threshold:
+                report.matched_pairs += 1
+                clusters.union(i, j)
+                edge_scores[i] = min(edge_scores.get(i, 1.0), score)
+                edge_reasons.setdefault(i, set()).update(reasons)
+                edge_scores[j] = min(edge_scores.get(j, 1.0), score)
+                edge_reasons.setdefault(j, set()).update(reasons)
+    report.candidate_pairs = len(seen)
+
+    groups: Dict[int, List[int]] = {}
+    for index in clusters.parent:
+        groups.setdefault(clusters.find(index), []).append(index)
+
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_CLUSTER_SIZE:
+            report.skipped_clusters += 1
+            continue
+        ordered = sorted(members, key=lambda index: _survivor_order(records[index]))
+        report.proposals.append(MergeProposal(
+            survivor_id=records[ordered[0]].customer_id,
+            duplicate_ids=[records[index].customer_id for index in ordered[1:]],
+            score=min(edge_scores[index] for index in members),
+            reasons=sorted(set().union(*(edge_reasons[index] for index in members))),
+        ))
+
+    report.duration_s = time.perf_counter() - start
+    return report
+
+
+def load_customer_records(session: Session, batch_size: int = LOAD_BATCH_SIZE) -> List[CustomerRecord]:
+    """Leer todos los clientes por keyset sobre id"""
+    c = CUSTOMERS_TABLE.c
+    records: List[CustomerRecord] = []
+    last_id = None
+    while True:
+        stmt = (
+            select(
+                c.id, c.created_at, c.name, c.email, c.phone_normalized,
+                c.whatsapp_normalized, c.tax_id, c.company_name,
+            )
+            .order_by(c.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(c.id > last_id)
+        rows = session.execute(stmt).all()
+        if not rows:
+            break
+        records.extend(customer_record(*row) for row in rows)
+        last_id = rows[-1].id
+    return records
+
+
+# ============================================================================
+# MERGE
+# ============================================================================
+
+def _merge_batch(session: Session, proposals: List[MergeProposal], report: MergeReport) -> Set[UUID]:
+    """Fusionar un lote sin confirmar; devuelve los clientes eliminados o modificados"""
+    survivor_of = {
+        duplicate_id: proposal.survivor_id
+        for proposal in proposals
+        for duplicate_id in proposal.duplicate_ids
+    }
+    c = CUSTOMERS_TABLE.c
+    rows = {
+        row.id: row
+        for row in session.execute(
+            select(c.id, *(c[name] for name in FILL_COLUMNS))
+            .where(c.id.in_(list(survivor_of) + [proposal.survivor_id for proposal in proposals]))
+        )
+    }
+    report.statements += 1
+
+    # Propuestas vencidas (cliente ya fusionado o eliminado) se omiten
+    survivor_of = {
+        duplicate_id: survivor_id
+        for duplicate_id, survivor_id in survivor_of.items()
+        if duplicate_id in rows and survivor_id in rows
+    }
+    if not survivor_of:
+        return set()
+    duplicate_ids = list(survivor_of)
+
+    for table, counter in (
+        (QUOTATIONS_TABLE, "quotations_reassigned"),
+        (CONVERSATIONS_TABLE, "conversations_reassigned"),
+    ):
+        result = session.execute(
+            table.update()
+            .where(table.c.customer_id.in_(duplicate_ids))
+            .values(customer_id=case(survivor_of, value=table.c.customer_id))
+        )
+        setattr(report, counter, getattr(report, counter) + result.rowcount)
+        report.statements += 1
+
+    session.execute(AUDIT_TABLE.insert(), [
+        {
+            "id": uuid4(),
+            "action": "MERGE",
+            "entity_type": "Customer",
+            "entity_id": duplicate_id,
+            "user_email": DEDUP_USER_EMAIL,
+            "changes": {"merged_into": str(survivor_id)},
+        }
+        for duplicate_id, survivor_id in survivor_of.items()
+    ])
+    session.execute(TOTALS_TABLE.delete().where(TOTALS_TABLE.c.customer_id.in_(duplicate_ids)))
+    session.execute(CUSTOMERS_TABLE.delete().where(c.id.in_(duplicate_ids)))
+    report.statements += 3
+
+    # Completar datos faltantes del conservado (después de borrar: email es único)
+    fills: Dict[UUID, Dict] = {}
+    for duplicate_id, survivor_id in survivor_of.items():
+        survivor, duplicate = rows[survivor_id], rows[duplicate_id]
+        values = fills.setdefault(survivor_id, {})
+        for name in FILL_COLUMNS:
+            if getattr(survivor, name) is None and name not in values and getattr(duplicate, name) is not None:
+                values[name] = getattr(duplicate, name)
+    for survivor_id, values in fills.items():
+        if values:
+            session.execute(CUSTOMERS_TABLE.update().where(c.id == survivor_id).values(**values))
+            report.statements += 1
+
+    survivors = set(survivor_of.values())
+    rebuild_purchase_totals(session, survivors)
+    report.statements += 2
+    report.customers_merged += len(duplicate_ids)
+    return survivors.union(duplicate_ids)
+
+
+def apply_merge_proposals(
+    session: Session,
+    proposals: Iterable[MergeProposal],
+    batch_size: int = MERGE_BATCH_SIZE
+) -> MergeReport:
+    """
+    Fusionar clientes por lotes, confirmando cada lote
+
+    Por lote: reasignación de quotations y whatsapp_conversations con un
+    UPDATE ... CASE cada una, auditoría, borrado de los duplicados y
+    reconstrucción de los totales de compras de los conservados. Después
+    de cada lote se invalidan los WhatsAppSenderResolver de este proceso
+    (invalidate_senders); los de otros procesos ven la fusión al vencer su
+    TTL.
+
+    Args:
+        session: Sesión de base de datos
+        proposals: Propuestas de find_duplicates (revisadas)
+        batch_size: Propuestas por lote
+
+    Returns:
+        Totales de la fusión
+    """
+    report = MergeReport()
+    batch: List[MergeProposal] = []
+    for proposal in proposals:
+        batch.append(proposal)
+        if len(batch) >= batch_size:
+            changed = _merge_batch(session, batch, report)
+            session.commit()
+            invalidate_senders(customer_ids=changed)
+            batch = []
+    if batch:
+        changed = _merge_batch(session, batch, report)
+        session.commit()
+        invalidate_senders(customer_ids=changed)
+    return report
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Deduplicación de clientes")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    propose = subparsers.add_parser("propose", help="Detectar duplicados y escribir propuestas (JSONL)")
+    propose.add_argument("--output", required=True)
+    propose.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    apply = subparsers.add_parser("apply", help="Aplicar propuestas revisadas")
+    apply.add_argument("--input", required=True)
+    apply.add_argument("--batch-size", type=int, default=MERGE_BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        if args.command == "propose":
+            records = load_customer_records(session)
+            report = find_duplicates(records, args.threshold)
+            with open(args.output, "w", encoding="utf-8") as output:
+                for proposal in report.proposals:
+                    output.write(json.dumps(proposal.to_dict()) + "\n")
+            print(
+                f"Clientes: {report.customers}, pares candidatos: {report.candidate_pairs}, "
+                f"coincidencias: {report.matched_pairs}, propuestas: {len(report.proposals)}, "
+                f"bloques descartados: {report.skipped_blocks}, grupos descartados: {report.skipped_clusters}, "
+                f"{report.duration_s:.1f}s"
+            )
+        else:
+            with open(args.input, encoding="utf-8") as source:
+                proposals = [MergeProposal.from_dict(json.loads(line)) for line in source if line.strip()]
+            report = apply_merge_proposals(session, proposals, args.batch_size)
+            print(
+                f"Clientes fusionados: {report.customers_merged}, "
+                f"cotizaciones reasignadas: {report.quotations_reassigned}, "
+                f"conversaciones reasignadas: {report.conversations_reassigned}, "
+                f"sentencias: {report.statements}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+"""
+Customer Search
+Búsqueda difusa de clientes por nombre, empresa, email, teléfono y WhatsApp,
+con ranking por similitud (pg_trgm) y paginación por keyset
+"""
+import base64
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, bindparam, case, func, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from .models import Customer
+from .phones import ARGENTINA_LOCAL_DIGITS, normalize_phone, phone_digits
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# pg_trgm trabaja con trigramas: consultas más cortas no usan el índice
+MIN_QUERY_LENGTH = 3
+
+# Dígitos mínimos para tratar la consulta como teléfono
+PHONE_QUERY_MIN_DIGITS = 4
+
+BACKFILL_BATCH_SIZE = 5000
+
+_PHONE_QUERY = re.compile(r"^[\d\s()+\-./]+$")
+
+CUSTOMERS_TABLE = Customer.__table__
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class CustomerSearchHit:
+    """Cliente encontrado"""
+    customer_id: UUID
+    name: str
+    company_name: Optional[str]
+    email: Optional[str]
+    phone: str
+    whatsapp: Optional[str]
+    score: float
+
+
+@dataclass
+class CustomerSearchPage:
+    """Página de resultados"""
+    hits: List[CustomerSearchHit]
+    next_cursor: Optional[str]
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def ensure_search_extensions(connection) -> None:
+    """Crear la extensión pg_trgm requerida por los índices de búsqueda"""
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(score: float, customer_id: UUID) -> str:
+    payload = json.dumps([score, str(customer_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, UUID]:
+    try:
+        score, customer_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), UUID(customer_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Cursor de búsqueda inválido") from exc
+
+
+def is_phone_query(query: str) -> bool:
+    return bool(_PHONE_QUERY.match(query)) and len(phone_digits(query)) >= PHONE_QUERY_MIN_DIGITS
+
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+def _phone_criteria(query: str):
+    """
+    Coincidencia por fragmento sobre los teléfonos normalizados
+
+    Los prefijos troncales ("0", "15") y el "9" de celular no aparecen en
+    la clave normalizada: un número completo se busca por los dígitos de su
+    clave (y si coincide exactamente puntúa 1.0); un fragmento, sin ceros
+    iniciales.
+    """
+    c = CUSTOMERS_TABLE.c
+    digits = phone_digits(query)
+    normalized = normalize_phone(query)
+    if normalized and len(digits) >= ARGENTINA_LOCAL_DIGITS:
+        fragment = normalized[1:]
+    else:
+        fragment = digits.lstrip("0") or "0"
+    pattern = f"%{_escape_like(fragment)}%"
+
+    condition = or_(
+        c.phone_normalized.like(pattern, escape="\\"),
+        c.whatsapp_normalized.like(pattern, escape="\\"),
+    )
+    score = func.greatest(
+        func.similarity(fragment, func.coalesce(c.phone_normalized, "")),
+        func.similarity(fragment, func.coalesce(c.whatsapp_normalized, "")),
+    )
+    if normalized:
+        exact = or_(c.phone_normalized == normalized, c.whatsapp_normalized == normalized)
+        score = case((exact, literal(1.0)), else_=score)
+    return condition, score
+
+
+def _text_criteria(query: str):
+    """Coincidencia por fragmento o similitud de palabras en nombre, empresa y email"""
+    c = CUSTOMERS_TABLE.c
+    term = query.lower()
+    pattern = f"%{_escape_like(term)}%"
+
+    condition = or_(
+        c.name.ilike(pattern, escape="\\"),
+        c.company_name.ilike(pattern, escape="\\"),
+        c.email.ilike(pattern, escape="\\"),
+        c.name.op("%>")(term),
+        c.company_name.op("%>")(term),
+    )
+    score = func.greatest(
+        func.word_similarity(term, c.name),
+        func.word_similarity(term, func.coalesce(c.company_name, "")),
+        func.similarity(term, func.coalesce(c.email, "")),
+    )
+    score = case((func.lower(c.email) == term, literal(1.0)), else_=score)
+    return condition, score
+
+
+def search_customers(
+    session: Session,
+    query: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+) -> CustomerSearchPage:
+    """
+    Buscar clientes ordenados por relevancia
+
+    Args:
+        session: Sesión de base de datos
+        query: Nombre, empresa, fragmento de email o teléfono en cualquier formato
+        limit: Resultados por página (máximo MAX_PAGE_SIZE)
+        cursor: Cursor devuelto por la página anterior
+
+    Returns:
+        Página de resultados y cursor de la siguiente (None si no hay más)
+    """
+    query = (query or "").strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return CustomerSearchPage(hits=[], next_cursor=None)
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if is_phone_query(query):
+        condition, score = _phone_criteria(query)
+    else:
+        condition, score = _text_criteria(query)
+
+    c = CUSTOMERS_TABLE.c
+    score = score.label("score")
+    stmt = (
+        select(c.id, c.name, c.company_name, c.email, c.phone, c.whatsapp, score)
+        .where(condition)
+        .order_by(score.desc(), c.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            score.element < last_score,
+            and_(score.element == last_score, c.id > last_id),
+        ))
+
+    rows = session.execute(stmt).all()
+    hits = [
+        CustomerSearchHit(
+            customer_id=row.id,
+            name=row.name,
+            company_name=row.company_name,
+            email=row.email,
+            phone=row.phone,
+            whatsapp=row.whatsapp,
+            score=float(row.score),
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = hits[-1]
+        next_cursor = encode_cursor(last.score, last.customer_id)
+    return CustomerSearchPage(hits=hits, next_cursor=next_cursor)
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+def backfill_normalized_phones(session: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Completar phone_normalized/whatsapp_normalized en clientes existentes
+
+    Recorre la tabla por keyset sobre id y confirma cada lote.
+
+    Args:
+        session: Sesión de base de datos
+        batch_size: Clientes por lote
+
+    Returns:
+        Cantidad de clientes actualizados
+    """
+    c = CUSTOMERS_TABLE.c
+    update = (
+        CUSTOMERS_TABLE.update()
+        .where(c.id == bindparam("b_id"))
+        .values(
+            phone_normalized=bindparam("b_phone"),
+            whatsapp_normalized=bindparam("b_whatsapp"),
+        )
+    )
+
+    updated = 0
+    last_id = None
+    while True:
+        stmt = (
+            select(c.id, c.phone, c.whatsapp, c.phone_normalized, c.whatsapp_normalized)
+            .order_by(c.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(c.id > last_id)
+        rows = session.execute(stmt).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            phone = normalize_phone(row.phone)
+            whatsapp = normalize_phone(row.whatsapp)
+            if phone != row.phone_normalized or whatsapp != row.whatsapp_normalized:
+                params.append({"b_id": row.id, "b_phone": phone, "b_whatsapp": whatsapp})
+        if params:
+            session.execute(update, params)
+        session.commit()
+
+        updated += len(params)
+        last_id = rows[-1].id
+    return updated
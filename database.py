@@ -0,0 +1,359 @@
+"""
+Database
+Configuración compartida de engines (sync y async) con pools dimensionados,
+caché de sentencias compiladas, sesiones por request y métricas del pool
+"""
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .purchase_totals import register_purchase_totals_tracking
+from .rollups import register_rollup_tracking
+
+
+# Tamaño de la caché de SQL compilado por engine (default de SQLAlchemy: 500)
+DEFAULT_QUERY_CACHE_SIZE = 1200
+
+# Sentencias preparadas por conexión en asyncpg
+DEFAULT_PREPARED_STATEMENT_CACHE_SIZE = 256
+
+
+# ============================================================================
+# SETTINGS
+# ============================================================================
+
+@dataclass
+class DatabaseSettings:
+    """Parámetros de conexión y del pool"""
+    url: str
+    async_url: Optional[str] = None
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800  # segundos; menor que el idle timeout del proxy/servidor
+    pool_pre_ping: bool = True
+    query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE
+    prepared_statement_cache_size: int = DEFAULT_PREPARED_STATEMENT_CACHE_SIZE
+    application_name: str = "glass-film-quotations"
+    echo: bool = False
+
+    @classmethod
+    def from_env(cls, prefix: str = "DATABASE_") -> "DatabaseSettings":
+        """
+        Leer la configuración de variables de entorno
+
+        DATABASE_URL (obligatoria), DATABASE_ASYNC_URL, DATABASE_POOL_SIZE,
+        DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT, DATABASE_POOL_RECYCLE,
+        DATABASE_QUERY_CACHE_SIZE y DATABASE_ECHO
+        """
+        url = os.environ.get(f"{prefix}URL")
+        if not url:
+            raise ValueError(f"Falta la variable de entorno {prefix}URL")
+
+        def number(name: str, default, kind=int):
+            value = os.environ.get(f"{prefix}{name}")
+            return kind(value) if value else default
+
+        return cls(
+            url=url,
+            async_url=os.environ.get(f"{prefix}ASYNC_URL"),
+            pool_size=number("POOL_SIZE", cls.pool_size),
+            max_overflow=number("MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=number("POOL_TIMEOUT", cls.pool_timeout, float),
+            pool_recycle=number("POOL_RECYCLE", cls.pool_recycle),
+            query_cache_size=number("QUERY_CACHE_SIZE", cls.query_cache_size),
+            echo=os.environ.get(f"{prefix}ECHO", "").lower() in ("1", "true", "yes"),
+        )
+
+
+# ============================================================================
+# POOL METRICS
+# ============================================================================
+
+@dataclass
+class PoolMetrics:
+    """Métricas acumuladas de un pool"""
+    checkouts: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    timeouts: int = 0
+    wait_total_s: float = 0.0
+    wait_max_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total_s += seconds
+            self.wait_max_s = max(self.wait_max_s, seconds)
+
+    @property
+    def wait_avg_ms(self) -> float:
+        attempts = self.checkouts + self.timeouts
+        return self.wait_total_s * 1000 / attempts if attempts else 0.0
+
+
+@dataclass
+class PoolStatus:
+    """Foto del estado de un pool"""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class _MeteredPoolMixin:
+    """Mide la espera para obtener una conexión del pool"""
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool: conservar las métricas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _attach_metrics(engine: Engine) -> PoolMetrics:
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def pool_status(engine) -> PoolStatus:
+    """
+    Estado actual del pool de un engine (sync o async)
+
+    Args:
+        engine: Engine o AsyncEngine
+
+    Returns:
+        Conexiones en uso, overflow y espera acumulada
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None) or PoolMetrics()
+    sized = isinstance(pool, QueuePool)
+    return PoolStatus(
+        size=pool.size() if sized else 0,
+        checked_in=pool.checkedin() if sized else 0,
+        checked_out=pool.checkedout() if sized else 0,
+        overflow=max(pool.overflow(), 0) if sized else 0,
+        checkouts=metrics.checkouts,
+        connects=metrics.connects,
+        invalidations=metrics.invalidations,
+        timeouts=metrics.timeouts,
+        wait_avg_ms=metrics.wait_avg_ms,
+        wait_max_ms=metrics.wait_max_s * 1000,
+    )
+
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(settings: DatabaseSettings, url, pool_class) -> Dict:
+    options = {
+        "echo": settings.echo,
+        "query_cache_size": settings.query_cache_size,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+    if _is_memory_sqlite(url):
+        # SQLite en memoria usa un pool de una conexión por hilo
+        return options
+
+    options.update(
+        poolclass=pool_class,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_use_lifo=True,  # las conexiones sobrantes quedan ociosas y el recycle las cierra
+    )
+    if url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"application_name": settings.application_name}}
+        else:
+            options["connect_args"] = {"application_name": settings.application_name}
+    return options
+
+
+def create_sync_engine(settings: DatabaseSettings) -> Engine:
+    """Crear el engine sincrónico con pool dimensionado y métricas"""
+    url = make_url(settings.url)
+    engine = create_engine(url, **_engine_options(settings, url, MeteredQueuePool))
+    _attach_metrics(engine)
+    return engine
+
+
+def create_async_engine(settings: DatabaseSettings):
+    """
+    Crear el engine asíncrono (requiere greenlet y un driver async, ej: asyncpg)
+
+    Sin async_url se deriva de url con el driver asyncpg.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine as sa_create_async_engine
+
+    url = make_url(settings.async_url or settings.url)
+    if not settings.async_url and url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    if url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.prepared_statement_cache_size)}
+        )
+    engine = sa_create_async_engine(url, **_engine_options(settings, url, MeteredAsyncQueuePool))
+    _attach_metrics(engine.sync_engine)
+    return engine
+
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+class AppSession(Session):
+    """Session de la aplicación: lleva registrados los listeners de agregados"""
+
+
+register_purchase_totals_tracking(AppSession)
+register_rollup_tracking(AppSession)
+
+_request_scope: ContextVar[Optional[object]] = ContextVar("database_request_scope", default=None)
+
+
+def _current_scope():
+    scope = _request_scope.get()
+    if scope is None:
+        raise RuntimeError("No hay un request activo: usar Database.request_scope()")
+    return scope
+
+
+class Database:
+    """Engines y fábricas de sesiones compartidas por todo el proceso"""
+
+    def __init__(self, settings: DatabaseSettings):
+        """
+        Inicializar
+
+        El engine async se crea recién al usarse, para que los procesos
+        sincrónicos no requieran greenlet ni asyncpg.
+
+        Args:
+            settings: Parámetros de conexión y pool
+        """
+        self.settings = settings
+        self.engine = create_sync_engine(settings)
+        self.session_factory = sessionmaker(self.engine, class_=AppSession, expire_on_commit=False)
+        self.scoped = scoped_session(self.session_factory, scopefunc=_current_scope)
+        self._async_engine = None
+        self._async_session_factory = None
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        return cls(DatabaseSettings.from_env())
+
+    @property
+    def async_engine(self):
+        if self._async_engine is None:
+            self._async_engine = create_async_engine(self.settings)
+        return self._async_engine
+
+    @property
+    def async_session_factory(self):
+        if self._async_session_factory is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+
+            self._async_session_factory = async_sessionmaker(
+                self.async_engine, sync_session_class=AppSession, expire_on_commit=False
+            )
+        return self._async_session_factory
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """Sesión con commit al salir sin errores y rollback si hay excepción"""
+        with self.session_factory() as session:
+            with session.begin():
+                yield session
+
+    @contextmanager
+    def request_scope(self) -> Iterator[Session]:
+        """
+        Delimitar un request: Database.scoped devuelve la misma sesión dentro
+        del bloque (también entre funciones) y se cierra al salir
+        """
+        token = _request_scope.set(object())
+        try:
+            yield self.scoped()
+        finally:
+            self.scoped.remove()
+            _request_scope.reset(token)
+
+    @asynccontextmanager
+    async def async_session(self):
+        """Sesión async con commit al salir sin errores"""
+        async with self.async_session_factory() as session:
+            async with session.begin():
+                yield session
+
+    def pool_status(self) -> Dict[str, PoolStatus]:
+        status = {"sync": pool_status(self.engine)}
+        if self._async_engine is not None:
+            status["async"] = pool_status(self._async_engine)
+        return status
+
+    def dispose(self) -> None:
+        """Cerrar las conexiones (ej: en el hijo después de un fork)"""
+        self.engine.dispose()
+        if self._async_engine is not None:
+            # Cerrar conexiones async requiere el event loop: solo descartarlas
+            self._async_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,333 @@
+"""
+Quotation Documents
+Renderizado por lotes de documentos de cotización para el cliente, en un pool
+de procesos que cargan las plantillas una sola vez
+"""
+import hashlib
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from string import Template
+from typing import Dict, Iterable, List, Optional
+
+from .calculator import QuotationCalculationResult, generate_quotation_summary
+from .serialization import format_money
+
+
+# Documentos por tarea enviada al pool (amortiza la serialización entre procesos)
+DEFAULT_CHUNK_SIZE = 32
+
+QUOTATION_TEMPLATE = "quotation.html"
+ITEM_ROW_TEMPLATE = "item_row.html"
+
+DEFAULT_QUOTATION_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Cotización $quotation_number</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; font-size: 11pt; color: #222; }
+table { width: 100%; border-collapse: collapse; }
+th, td { padding: 4px 6px; border-bottom: 1px solid #ddd; text-align: left; }
+td.num, th.num { text-align: right; }
+.totals td { border: none; }
+@page { size: A4; margin: 18mm; }
+</style>
+</head>
+<body>
+<h1>Cotización $quotation_number</h1>
+<p>Cliente: $customer_name<br>Fecha: $issued_at<br>Válida hasta: $expires_at</p>
+<table>
+<thead><tr><th>Abertura</th><th>Producto</th><th class="num">Cant.</th><th class="num">Área</th><th class="num">Subtotal</th></tr></thead>
+<tbody>
+$item_rows
+</tbody>
+</table>
+<table class="totals">
+<tr><td>Área total</td><td class="num">$total_area</td></tr>
+<tr><td>Material</td><td class="num">$material</td></tr>
+<tr><td>Instalación</td><td class="num">$installation</td></tr>
+<tr><td>Subtotal</td><td class="num">$subtotal</td></tr>
+<tr><td>Descuento ($discount_percentage%)</td><td class="num">-$discount</td></tr>
+<tr><td>Impuestos ($tax_rate%)</td><td class="num">$tax</td></tr>
+<tr><td><strong>Total</strong></td><td class="num"><strong>$total</strong></td></tr>
+</table>
+<p>$notes</p>
+</body>
+</html>
+"""
+
+DEFAULT_ITEM_ROW_HTML = (
+    "<tr><td>$opening_name</td><td>$product_name</td><td class=\"num\">$quantity</td>"
+    "<td class=\"num\">$final_area m²</td><td class=\"num\">$item_subtotal</td></tr>"
+)
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class QuotationDocument:
+    """Datos para renderizar el documento de una cotización"""
+    quotation_number: str
+    customer_name: str
+    result: QuotationCalculationResult
+    issued_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    currency: str = "USD"
+    notes: str = ""
+
+
+@dataclass
+class DocumentTemplates:
+    """Plantillas precompiladas"""
+    quotation: Template
+    item_row: Template
+
+
+@dataclass
+class DocumentTiming:
+    """Métricas de un documento renderizado"""
+    quotation_number: str
+    path: str
+    render_ms: float
+    write_ms: float
+    size_bytes: int
+
+
+@dataclass
+class BatchRenderReport:
+    """Resultado de un lote de renderizado"""
+    documents: List[DocumentTiming] = field(default_factory=list)
+    wall_time_s: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.documents)
+
+    def percentile_ms(self, percentile: float) -> float:
+        """Percentil del tiempo total (render + escritura) por documento"""
+        if not self.documents:
+            return 0.0
+        durations = sorted(doc.render_ms + doc.write_ms for doc in self.documents)
+        index = min(len(durations) - 1, int(round(percentile / 100 * (len(durations) - 1))))
+        return durations[index]
+
+    def summary(self) -> Dict:
+        return {
+            "documents": self.count,
+            "wall_time_s": round(self.wall_time_s, 3),
+            "documents_per_second": round(self.count / self.wall_time_s, 1) if self.wall_time_s else 0.0,
+            "p50_ms": round(self.percentile_ms(50), 2),
+            "p95_ms": round(self.percentile_ms(95), 2),
+            "max_ms": round(self.percentile_ms(100), 2),
+            "total_bytes": sum(doc.size_bytes for doc in self.documents),
+        }
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def load_templates(template_dir: Optional[str] = None) -> DocumentTemplates:
+    """
+    Cargar plantillas desde un directorio (o las incluidas por defecto)
+
+    Args:
+        template_dir: Directorio con quotation.html e item_row.html
+
+    Returns:
+        Plantillas listas para usar
+    """
+    sources = {
+        QUOTATION_TEMPLATE: DEFAULT_QUOTATION_HTML,
+        ITEM_ROW_TEMPLATE: DEFAULT_ITEM_ROW_HTML,
+    }
+    if template_dir:
+        for name in sources:
+            path = os.path.join(template_dir, name)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as handle:
+                    sources[name] = handle.read()
+
+    return DocumentTemplates(
+        quotation=Template(sources[QUOTATION_TEMPLATE]),
+        item_row=Template(sources[ITEM_ROW_TEMPLATE]),
+    )
+
+
+def _format_date(value: Optional[datetime]) -> str:
+    return value.strftime("%d/%m/%Y") if value else "-"
+
+
+def render_document(document: QuotationDocument, templates: DocumentTemplates) -> str:
+    """
+    Renderizar el HTML de una cotización (apto para conversión a PDF)
+
+    Args:
+        document: Datos de la cotización
+        templates: Plantillas cargadas con load_templates
+
+    Returns:
+        HTML del documento
+    """
+    result = document.result
+    summary = generate_quotation_summary(result)
+    pricing = summary["pricing"]
+    currency = document.currency
+    escape = html.escape
+
+    row = templates.item_row.substitute
+    item_rows = "\n".join(
+        row(
+            opening_name=escape(item.opening_name),
+            product_name=escape(item.product_name),
+            quantity=item.quantity,
+            final_area=item.final_area,
+            item_subtotal=format_money(item.item_subtotal, currency),
+        )
+        for item in result.items
+    )
+
+    return templates.quotation.substitute(
+        quotation_number=escape(document.quotation_number),
+        customer_name=escape(document.customer_name),
+        issued_at=_format_date(document.issued_at or datetime.now()),
+        expires_at=_format_date(document.expires_at),
+        item_rows=item_rows,
+        total_area=summary["total_area"]["formatted"],
+        material=format_money(result.material_subtotal, currency),
+        installation=format_money(result.installation_subtotal, currency),
+        subtotal=format_money(result.subtotal_before_discount, currency),
+        discount_percentage=f"{pricing['discount']['percentage']:g}",
+        discount=format_money(result.volume_discount_amount, currency),
+        tax_rate=f"{pricing['tax']['rate']:g}",
+        tax=format_money(result.tax_amount, currency),
+        total=format_money(result.total, currency),
+        notes=escape(document.notes),
+    )
+
+
+def document_filename(quotation_number: str) -> str:
+    """
+    Nombre de archivo del documento de una cotización
+
+    Si hubo que reemplazar caracteres se agrega un hash corto del número
+    original: "COT/1" y "COT_1" no pueden pisarse en un mismo lote.
+    """
+    safe = "".join(char if char.isalnum() or char in "-_" else "_" for char in quotation_number)
+    if safe != quotation_number:
+        digest = hashlib.sha1(quotation_number.encode("utf-8")).hexdigest()[:8]
+        safe = f"{safe}~{digest}"
+    return f"{safe}.html"
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(content)
+    os.replace(temporary, path)
+
+
+def _render_and_write(
+    document: QuotationDocument,
+    templates: DocumentTemplates,
+    output_dir: str
+) -> DocumentTiming:
+    start = time.perf_counter()
+    content = render_document(document, templates).encode("utf-8")
+    rendered = time.perf_counter()
+
+    path = os.path.join(output_dir, document_filename(document.quotation_number))
+    _write_atomic(path, content)
+    written = time.perf_counter()
+
+    return DocumentTiming(
+        quotation_number=document.quotation_number,
+        path=path,
+        render_ms=(rendered - start) * 1000,
+        write_ms=(written - rendered) * 1000,
+        size_bytes=len(content),
+    )
+
+
+# ============================================================================
+# WORKER POOL
+# ============================================================================
+
+_worker_templates: Optional[DocumentTemplates] = None
+
+
+def _init_worker(template_dir: Optional[str]) -> None:
+    global _worker_templates
+    _worker_templates = load_templates(template_dir)
+
+
+def _render_chunk(documents: List[QuotationDocument], output_dir: str) -> List[DocumentTiming]:
+    return [_render_and_write(document, _worker_templates, output_dir) for document in documents]
+
+
+class DocumentRenderer:
+    """Renderizador de documentos por lotes"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        template_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        Inicializar renderizador
+
+        Args:
+            output_dir: Directorio donde se escriben los documentos
+            template_dir: Directorio de plantillas (None para las incluidas)
+            max_workers: Procesos del pool (None para la cantidad de CPUs)
+            chunk_size: Documentos por tarea enviada a cada proceso
+        """
+        self.output_dir = output_dir
+        self.template_dir = template_dir
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._templates: Optional[DocumentTemplates] = None
+
+    def render_one(self, document: QuotationDocument) -> DocumentTiming:
+        """Renderizar un documento en el proceso actual"""
+        if self._templates is None:
+            self._templates = load_templates(self.template_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+        return _render_and_write(document, self._templates, self.output_dir)
+
+    def render_batch(self, documents: Iterable[QuotationDocument]) -> BatchRenderReport:
+        """
+        Renderizar un lote de documentos en el pool de procesos
+
+        Args:
+            documents: Cotizaciones a renderizar
+
+        Returns:
+            Reporte con las métricas por documento
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        documents = list(documents)
+        chunks = [
+            documents[start:start + self.chunk_size]
+            for start in range(0, len(documents), self.chunk_size)
+        ]
+
+        report = BatchRenderReport()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.template_dir,),
+        ) as pool:
+            for timings in pool.map(_render_chunk, chunks, [self.output_dir] * len(chunks)):
+                report.documents.extend(timings)
+        report.wall_time_s = time.perf_counter() - start
+        return report
@@ -0,0 +1,101 @@
+"""
+Enums
+Enumeraciones del dominio, sin dependencias: las usan los modelos de
+SQLAlchemy y también los módulos que no necesitan la base de datos
+"""
+from enum import Enum as PyEnum
+
+
+class CustomerType(str, PyEnum):
+    """Tipo de cliente"""
+    INDIVIDUAL = "individual"
+    BUSINESS = "business"
+
+
+class VerticalType(str, PyEnum):
+    """Vertical de negocio"""
+    AUTOMOTIVE = "automotive"
+    RESIDENTIAL = "residential"
+    COMMERCIAL = "commercial"
+    ARCHITECTURAL = "architectural"
+
+
+class QuotationStatus(str, PyEnum):
+    """Estado de la cotización"""
+    DRAFT = "draft"
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    REJECTED = "rejected"
+    EXPIRED = "expired"
+
+
+class ProductType(str, PyEnum):
+    """Tipo de producto/film"""
+    LAMINATE_SECURITY = "laminate_security"
+    SOLAR_CONTROL = "solar_control"
+    VINYL_DECORATIVE = "vinyl_decorative"
+    PRIVACY = "privacy"
+    ANTI_GRAFFITI = "anti_graffiti"
+    CUSTOM = "custom"
+
+
+class PropertyType(str, PyEnum):
+    """Tipo de propiedad"""
+    HOUSE = "house"
+    APARTMENT = "apartment"
+    OFFICE = "office"
+    BUILDING = "building"
+    WAREHOUSE = "warehouse"
+    RETAIL = "retail"
+
+
+class RoomType(str, PyEnum):
+    """Tipo de habitación/área"""
+    LIVING_ROOM = "living_room"
+    BEDROOM = "bedroom"
+    KITCHEN = "kitchen"
+    BATHROOM = "bathroom"
+    OFFICE = "office"
+    MEETING_ROOM = "meeting_room"
+    LOBBY = "lobby"
+    HALLWAY = "hallway"
+    BALCONY = "balcony"
+    GARAGE = "garage"
+    OTHER = "other"
+
+
+class OpeningType(str, PyEnum):
+    """Tipo de abertura"""
+    WINDOW = "window"
+    DOOR = "door"
+    SLIDING_DOOR = "sliding_door"
+    FRENCH_DOOR = "french_door"
+    SHOWER_ENCLOSURE = "shower_enclosure"
+    PARTITION = "partition"
+    SKYLIGHT = "skylight"
+    CURTAIN_WALL = "curtain_wall"
+    STRIP_HORIZONTAL = "strip_horizontal"
+    STRIP_VERTICAL = "strip_vertical"
+
+
+class VehicleType(str, PyEnum):
+    """Tipo de vehículo"""
+    SEDAN = "sedan"
+    SUV = "suv"
+    TRUCK = "truck"
+    VAN = "van"
+    COUPE = "coupe"
+    MOTORCYCLE = "motorcycle"
+
+
+class WhatsAppConversationStatus(str, PyEnum):
+    """Estado de conversación WhatsApp"""
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    ABANDONED = "abandoned"
+
+
+class MessageDirection(str, PyEnum):
+    """Dirección del mensaje"""
+    INBOUND = "inbound"
+    OUTBOUND = "outbound"
@@ -0,0 +1,569 @@
+"""
+Installation Scheduler
+Asignación de instalaciones de cotizaciones confirmadas a cuadrillas y días:
+horas-cuadrilla estimadas por área × factor de complejidad, con restricciones
+de capacidad diaria, habilidades (andamios, vidrio curvo, nocturno) y fechas
+límite. Asignación greedy con heaps y mejora por búsqueda local
+"""
+import argparse
+import bisect
+import heapq
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from .models import Quotation, QuotationItem, QuotationStatus
+from .calculator import CalculationItem
+
+
+# Rendimiento de una cuadrilla en condiciones normales
+SQM_PER_CREW_HOUR = 4.0
+
+# Traslado, preparación y limpieza por trabajo
+SETUP_HOURS = 1.0
+
+DEFAULT_HOURS_PER_DAY = 8.0
+
+# Lunes a sábado
+WORKING_WEEKDAYS = frozenset(range(6))
+
+# Días desde la confirmación: llegada del material y plazo comprometido
+DEFAULT_LEAD_DAYS = 2
+DEFAULT_DEADLINE_DAYS = 21
+
+# Peso de un día de atraso frente al desbalance de carga en la búsqueda local
+LATE_DAY_PENALTY = 1000.0
+
+DEFAULT_IMPROVE_SECONDS = 2.0
+
+SKILL_SCAFFOLDING = "scaffolding"
+SKILL_CURVED_GLASS = "curved_glass"
+SKILL_NIGHT_INSTALL = "night_install"
+
+# Especificación de la abertura -> habilidad requerida
+SPECIFICATION_SKILLS = {
+    "requires_scaffolding": SKILL_SCAFFOLDING,
+    "curved": SKILL_CURVED_GLASS,
+    "night_install": SKILL_NIGHT_INSTALL,
+}
+
+QUOTATIONS_TABLE = Quotation.__table__
+ITEMS_TABLE = QuotationItem.__table__
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class InstallationJob:
+    """Instalación de una cotización"""
+    job_id: str
+    crew_hours: float
+    skills: FrozenSet[str] = frozenset()
+    release_day: int = 0  # primer día hábil posible (índice desde el inicio)
+    deadline_day: Optional[int] = None  # último día hábil aceptable
+    area_sqm: float = 0.0
+
+
+@dataclass
+class Crew:
+    """Cuadrilla de instaladores"""
+    crew_id: str
+    skills: FrozenSet[str] = frozenset()
+    hours_per_day: float = DEFAULT_HOURS_PER_DAY
+
+
+@dataclass
+class JobAssignment:
+    """Trabajo asignado; puede continuar al día hábil siguiente"""
+    job_id: str
+    crew_id: str
+    start_day: int
+    start_hour: float  # horas desde el inicio de la jornada
+    end_day: int
+    crew_hours: float
+    late_days: int
+
+
+@dataclass
+class Schedule:
+    """Resultado del planificador"""
+    assignments: List[JobAssignment]
+    unassigned: List[str]  # sin cuadrilla con las habilidades requeridas
+    late_jobs: int
+    total_late_days: int
+    makespan_days: int
+    greedy_cost: float
+    final_cost: float
+    moves: int
+    duration_s: float
+    crew_loads: Dict[str, float] = field(default_factory=dict)
+
+
+# ============================================================================
+# ESTIMATION
+# ============================================================================
+
+def required_skills(specifications: Optional[Dict]) -> FrozenSet[str]:
+    """Habilidades que exige una abertura según sus especificaciones"""
+    if not specifications:
+        return frozenset()
+    return frozenset(skill for key, skill in SPECIFICATION_SKILLS.items() if specifications.get(key))
+
+
+def item_crew_hours(final_area: float, complexity_factor: float) -> float:
+    """Horas-cuadrilla de un item: área final × complejidad / rendimiento"""
+    return final_area * complexity_factor / SQM_PER_CREW_HOUR
+
+
+def job_from_calculation(
+    job_id: str,
+    items: Iterable[CalculationItem],
+    release_day: int = 0,
+    deadline_day: Optional[int] = None
+) -> InstallationJob:
+    """
+    Trabajo de instalación a partir de los items calculados
+
+    Args:
+        job_id: Identificador (ej: ID de la cotización)
+        items: Items de QuotationCalculator
+        release_day: Primer día hábil posible
+        deadline_day: Último día hábil aceptable
+
+    Returns:
+        Trabajo con sus horas-cuadrilla y habilidades requeridas
+    """
+    hours, area, skills = SETUP_HOURS, 0.0, set()
+    for item in items:
+        hours += item_crew_hours(float(item.final_area), float(item.complexity_factor))
+        area += float(item.final_area)
+        skills |= required_skills(item.specifications)
+    return InstallationJob(job_id, hours, frozenset(skills), release_day, deadline_day, area)
+
+
+# ============================================================================
+# CALENDAR
+# ============================================================================
+
+def working_days(start: date, count: int, weekdays: FrozenSet[int] = WORKING_WEEKDAYS) -> List[date]:
+    """Los primeros count días hábiles desde start (inclusive)"""
+    days: List[date] = []
+    current = start
+    while len(days) < count:
+        if current.weekday() in weekdays:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def day_index(calendar: Sequence[date], day: date) -> int:
+    """Índice del primer día hábil igual o posterior a day"""
+    return bisect.bisect_left(calendar, day)
+
+
+# ============================================================================
+# SCHEDULING
+# ============================================================================
+
+class _Problem:
+    """Datos de los trabajos en listas paralelas para simular rápido"""
+
+    def __init__(self, jobs: Sequence[InstallationJob], crews: Sequence[Crew]):
+        self.jobs = jobs
+        self.crews = crews
+        self.hours = [job.crew_hours for job in jobs]
+        self.release = [job.release_day for job in jobs]
+        self.deadline = [job.deadline_day if job.deadline_day is not None else math.inf for job in jobs]
+        self.order_key = [(self.deadline[j], self.release[j], -self.hours[j]) for j in range(len(jobs))]
+        self.hours_per_day = [crew.hours_per_day for crew in crews]
+
+        # Cuadrillas habilitadas por conjunto de habilidades (se repiten mucho)
+        eligible_by_skills: Dict[FrozenSet[str], List[int]] = {}
+        self.eligible: List[List[int]] = []
+        for job in jobs:
+            if job.skills not in eligible_by_skills:
+                eligible_by_skills[job.skills] = [
+                    index for index, crew in enumerate(crews) if job.skills <= crew.skills
+                ]
+            self.eligible.append(eligible_by_skills[job.skills])
+
+    def simulate(self, crew: int, sequence: Sequence[int]) -> Tuple[float, int, float]:
+        """
+        Ejecutar una secuencia de trabajos en una cuadrilla
+
+        Returns:
+            Tuple (costo, días de atraso, horas al terminar)
+        """
+        per_day = self.hours_per_day[crew]
+        hours, release, deadline = self.hours, self.release, self.deadline
+        cursor, late = 0.0, 0
+        for job in sequence:
+            start = release[job] * per_day
+            if cursor > start:
+                start = cursor
+            cursor = start + hours[job]
+            finish_day = math.ceil(cursor / per_day) - 1
+            if finish_day > deadline[job]:
+                late += finish_day - deadline[job]
+        # Los días de atraso dominan; el cuadrado de la ocupación reparte la carga
+        return late * LATE_DAY_PENALTY + (cursor / per_day) ** 2, late, cursor
+
+
+def _greedy(problem: _Problem, assignable: List[int]) -> List[List[int]]:
+    """
+    Fecha límite más próxima primero, a la cuadrilla habilitada que lo
+    termina antes
+
+    Las cuadrillas se agrupan por (habilidades, horas por día); cada grupo
+    es un heap por hora de disponibilidad, así que para cada trabajo basta
+    mirar el tope de los grupos habilitados.
+    """
+    groups: Dict[Tuple[FrozenSet[str], float], List[Tuple[float, int]]] = {}
+    for index, crew in enumerate(problem.crews):
+        groups.setdefault((crew.skills, crew.hours_per_day), []).append((0.0, index))
+    for heap in groups.values():
+        heapq.heapify(heap)
+
+    group_cache: Dict[FrozenSet[str], List[Tuple[float, list]]] = {}
+    sequences: List[List[int]] = [[] for _ in problem.crews]
+    for job in sorted(assignable, key=problem.order_key.__getitem__):
+        skills = problem.jobs[job].skills
+        eligible_groups = group_cache.get(skills)
+        if eligible_groups is None:
+            eligible_groups = group_cache[skills] = [
+                (per_day, heap) for (crew_skills, per_day), heap in groups.items() if skills <= crew_skills
+            ]
+
+        best = None
+        for per_day, heap in eligible_groups:
+            cursor, _ = heap[0]
+            finish = max(cursor, problem.release[job] * per_day) + problem.hours[job]
+            key = (math.ceil(finish / per_day), finish / per_day)
+            if best is None or key < best[0]:
+                best = (key, heap, finish)
+        _, heap, finish = best
+        _, crew = heapq.heappop(heap)
+        sequences[crew].append(job)
+        heapq.heappush(heap, (finish, crew))
+    return sequences
+
+
+class _CrewState:
+    """Secuencia de una cuadrilla con la hora y el atraso acumulados por posición"""
+
+    def __init__(self, problem: _Problem, crew: int, sequence: List[int]):
+        self.problem = problem
+        self.crew = crew
+        self.per_day = problem.hours_per_day[crew]
+        self.rebuild(sequence)
+
+    def rebuild(self, sequence: List[int]) -> None:
+        self.sequence = sequence
+        self.keys = [self.problem.order_key[job] for job in sequence]
+        self.cursors, self.lates = [0.0], [0]
+        cursor, late = 0.0, 0
+        for job in sequence:
+            cursor, late = self._step(job, cursor, late)
+            self.cursors.append(cursor)
+            self.lates.append(late)
+        self.cost = self._cost(cursor, late)
+
+    def _step(self, job: int, cursor: float, late: int) -> Tuple[float, int]:
+        problem, per_day = self.problem, self.per_day
+        start = problem.release[job] * per_day
+        if cursor > start:
+            start = cursor
+        cursor = start + problem.hours[job]
+        finish_day = math.ceil(cursor / per_day) - 1
+        if finish_day > problem.deadline[job]:
+            late += finish_day - problem.deadline[job]
+        return cursor, late
+
+    def _cost(self, cursor: float, late: int) -> float:
+        return late * LATE_DAY_PENALTY + (cursor / self.per_day) ** 2
+
+    def _tail(self, index: int, cursor: float, late: int) -> float:
+        # Simular desde index; si la hora vuelve a coincidir (un hueco por
+        # release_day absorbió el cambio) el resto de la secuencia no cambia
+        cursors, lates = self.cursors, self.lates
+        for position in range(index, len(self.sequence)):
+            cursor, late = self._step(self.sequence[position], cursor, late)
+            if cursor == cursors[position + 1]:
+                return self._cost(cursors[-1], late + lates[-1] - lates[position + 1])
+        return self._cost(cursor, late)
+
+    def cost_without(self, position: int) -> float:
+        return self._tail(position + 1, self.cursors[position], self.lates[position])
+
+    def insertion(self, job: int) -> Tuple[int, float]:
+        """Posición por fecha límite y costo resultante de insertar job"""
+        position = bisect.bisect_right(self.keys, self.problem.order_key[job])
+        cursor, late = self._step(job, self.cursors[position], self.lates[position])
+        return position, self._tail(position, cursor, late)
+
+
+def _improve(problem: _Problem, sequences: List[List[int]], time_budget: float) -> int:
+    """
+    Búsqueda local por reubicación: mover un trabajo a la posición (por
+    fecha límite) de otra cuadrilla habilitada si baja el costo total.
+    Primero los trabajos atrasados, después los de las cuadrillas más cargadas.
+
+    Returns:
+        Cantidad de movimientos aplicados
+    """
+    deadline = time.perf_counter() + time_budget
+    states = [_CrewState(problem, crew, sequence) for crew, sequence in enumerate(sequences)]
+    location = {job: crew for crew, sequence in enumerate(sequences) for job in sequence}
+    moves = 0
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        late = [
+            job for state in states
+            if state.lates[-1]
+            for job, before, after in zip(state.sequence, state.lates, state.lates[1:])
+            if after > before
+        ]
+        busiest = sorted(states, key=lambda state: state.cost, reverse=True)[:3]
+        candidates = late + [job for state in busiest for job in reversed(state.sequence)]
+
+        for job in candidates:
+            if time.perf_counter() >= deadline:
+                break
+            source = states[location[job]]
+            source_cost = source.cost_without(source.sequence.index(job))
+            best_delta, best_target, best_position = -1e-9, None, None
+            for crew in problem.eligible[job]:
+                target = states[crew]
+                if target is source:
+                    continue
+                position, target_cost = target.insertion(job)
+                delta = source_cost + target_cost - source.cost - target.cost
+                if delta < best_delta:
+                    best_delta, best_target, best_position = delta, target, position
+            if best_target is None:
+                continue
+            source.rebuild([other for other in source.sequence if other != job])
+            sequence = best_target.sequence
+            best_target.rebuild(sequence[:best_position] + [job] + sequence[best_position:])
+            location[job] = best_target.crew
+            moves += 1
+            improved = True
+
+    for state in states:
+        sequences[state.crew] = state.sequence
+    return moves
+
+
+def _assignments(problem: _Problem, sequences: List[List[int]]) -> List[JobAssignment]:
+    assignments: List[JobAssignment] = []
+    for crew, sequence in enumerate(sequences):
+        per_day = problem.hours_per_day[crew]
+        cursor = 0.0
+        for job in sequence:
+            start = max(cursor, problem.release[job] * per_day)
+            cursor = start + problem.hours[job]
+            start_day = int(start // per_day)
+            end_day = math.ceil(cursor / per_day) - 1
+            deadline = problem.deadline[job]
+            assignments.append(JobAssignment(
+                job_id=problem.jobs[job].job_id,
+                crew_id=problem.crews[crew].crew_id,
+                start_day=start_day,
+                start_hour=round(start - start_day * per_day, 2),
+                end_day=end_day,
+                crew_hours=round(problem.hours[job], 2),
+                late_days=int(max(0, end_day - deadline)),
+            ))
+    return assignments
+
+
+def schedule_jobs(
+    jobs: Sequence[InstallationJob],
+    crews: Sequence[Crew],
+    improve_seconds: float = DEFAULT_IMPROVE_SECONDS
+) -> Schedule:
+    """
+    Planificar trabajos en cuadrillas
+
+    La capacidad de cada cuadrilla es hours_per_day por día hábil; un
+    trabajo que no entra en lo que queda de la jornada sigue al día
+    siguiente con la misma cuadrilla.
+
+    Args:
+        jobs: Trabajos a instalar
+        crews: Cuadrillas disponibles
+        improve_seconds: Tiempo máximo de búsqueda local (0 para solo greedy)
+
+    Returns:
+        Asignaciones, trabajos sin cuadrilla habilitada y costo antes/después
+    """
+    if not crews:
+        raise ValueError("Se requiere al menos una cuadrilla")
+
+    start = time.perf_counter()
+    problem = _Problem(jobs, crews)
+    assignable = [job for job in range(len(jobs)) if problem.eligible[job]]
+    unassigned = [jobs[job].job_id for job in range(len(jobs)) if not problem.eligible[job]]
+
+    sequences = _greedy(problem, assignable)
+    greedy_cost = sum(problem.simulate(crew, sequence)[0] for crew, sequence in enumerate(sequences))
+    moves = _improve(problem, sequences, improve_seconds) if improve_seconds > 0 else 0
+
+    final_cost, total_late, loads = 0.0, 0, {}
+    for crew, sequence in enumerate(sequences):
+        cost, late, cursor = problem.simulate(crew, sequence)
+        final_cost += cost
+        total_late += late
+        loads[crews[crew].crew_id] = round(cursor, 2)
+
+    assignments = _assignments(problem, sequences)
+    return Schedule(
+        assignments=assignments,
+        unassigned=unassigned,
+        late_jobs=sum(1 for assignment in assignments if assignment.late_days),
+        total_late_days=total_late,
+        makespan_days=max((assignment.end_day + 1 for assignment in assignments), default=0),
+        greedy_cost=greedy_cost,
+        final_cost=final_cost,
+        moves=moves,
+        duration_s=time.perf_counter() - start,
+        crew_loads=loads,
+    )
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+def load_installation_jobs(
+    session: Session,
+    calendar: Sequence[date],
+    confirmed_since: Optional[datetime] = None,
+    lead_days: int = DEFAULT_LEAD_DAYS,
+    deadline_days: int = DEFAULT_DEADLINE_DAYS
+) -> List[InstallationJob]:
+    """
+    Trabajos de las cotizaciones confirmadas
+
+    Usa los items guardados (quantity es el área final y specifications
+    lleva el complexity_factor). La fecha límite sale de
+    calculation_details["installation_deadline"] (ISO) o, si no está, de
+    confirmed_at + deadline_days.
+
+    Args:
+        session: Sesión de base de datos
+        calendar: Días hábiles del horizonte (ver working_days)
+        confirmed_since: Solo cotizaciones confirmadas desde esta fecha
+        lead_days: Días entre la confirmación y el primer día posible
+        deadline_days: Plazo por defecto desde la confirmación
+
+    Returns:
+        Trabajos con días relativos al calendario
+    """
+    q, i = QUOTATIONS_TABLE.c, ITEMS_TABLE.c
+    stmt = (
+        select(q.id, q.confirmed_at, q.calculation_details, i.quantity, i.specifications)
+        .join(ITEMS_TABLE, i.quotation_id == q.id)
+        .where(q.status == QuotationStatus.CONFIRMED)
+        .order_by(q.id)
+    )
+    if confirmed_since is not None:
+        stmt = stmt.where(q.confirmed_at >= confirmed_since)
+
+    jobs: Dict = {}
+    for quotation_id, confirmed_at, details, area, specifications in session.execute(stmt):
+        job = jobs.get(quotation_id)
+        if job is None:
+            confirmed = confirmed_at.date() if confirmed_at else calendar[0]
+            deadline = (details or {}).get("installation_deadline")
+            deadline = date.fromisoformat(deadline[:10]) if deadline else confirmed + timedelta(days=deadline_days)
+            job = jobs[quotation_id] = InstallationJob(
+                job_id=str(quotation_id),
+                crew_hours=SETUP_HOURS,
+                release_day=day_index(calendar, confirmed + timedelta(days=lead_days)),
+                # Último día hábil no posterior a la fecha límite
+                deadline_day=bisect.bisect_right(calendar, deadline) - 1,
+            )
+        specifications = specifications or {}
+        area = float(area or 0)
+        job.crew_hours += item_crew_hours(area, float(specifications.get("complexity_factor", 1.0)))
+        job.area_sqm += area
+        job.skills = job.skills | required_skills(specifications)
+    return list(jobs.values())
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def load_crews(path: str) -> List[Crew]:
+    """Cuadrillas desde JSON: [{"crew_id": ..., "skills": [...], "hours_per_day": 8}]"""
+    with open(path, encoding="utf-8") as source:
+        return [
+            Crew(
+                crew_id=str(entry["crew_id"]),
+                skills=frozenset(entry.get("skills", [])),
+                hours_per_day=float(entry.get("hours_per_day", DEFAULT_HOURS_PER_DAY)),
+            )
+            for entry in json.load(source)
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Planificación de instalaciones")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--crews", required=True, help="JSON con las cuadrillas")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--horizon-days", type=int, default=120)
+    parser.add_argument("--improve-seconds", type=float, default=DEFAULT_IMPROVE_SECONDS)
+    parser.add_argument("--output", help="Escribir las asignaciones en JSON")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    calendar = working_days(args.start, args.horizon_days)
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        jobs = load_installation_jobs(session, calendar)
+    schedule = schedule_jobs(jobs, load_crews(args.crews), args.improve_seconds)
+
+    print(
+        f"Trabajos: {len(jobs)}, sin cuadrilla habilitada: {len(schedule.unassigned)}, "
+        f"atrasados: {schedule.late_jobs} ({schedule.total_late_days} días), "
+        f"duración: {schedule.makespan_days} días hábiles, "
+        f"mejoras: {schedule.moves}, {schedule.duration_s:.2f}s"
+    )
+    if args.output:
+        extended = working_days(args.start, max(args.horizon_days, schedule.makespan_days))
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({
+                "assignments": [
+                    {
+                        "job_id": assignment.job_id,
+                        "crew_id": assignment.crew_id,
+                        "start": extended[assignment.start_day].isoformat(),
+                        "start_hour": assignment.start_hour,
+                        "end": extended[assignment.end_day].isoformat(),
+                        "crew_hours": assignment.crew_hours,
+                        "late_days": assignment.late_days,
+                    }
+                    for assignment in schedule.assignments
+                ],
+                "unassigned": schedule.unassigned,
+            }, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,308 @@
+"""
+Lifecycle Sweeper
+Transiciones automáticas por vencimiento: cotizaciones a EXPIRED y
+conversaciones de WhatsApp a ABANDONED, con UPDATEs por conjuntos y
+registros de auditoría en la misma sentencia
+"""
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import String, cast, create_engine, func, literal, select
+from sqlalchemy.orm import Session
+
+from .models import (
+    AuditLog,
+    Quotation,
+    QuotationStatus,
+    WhatsAppConversation,
+    WhatsAppConversationStatus,
+)
+from .rollups import RollupDelta, apply_rollup_deltas, area_expression, day_expression
+from .whatsapp_matching import invalidate_senders
+
+
+SWEEPER_USER_EMAIL = "system@lifecycle-sweeper"
+
+# Estados desde los que una cotización puede vencer
+EXPIRABLE_QUOTATION_STATUSES = [QuotationStatus.DRAFT, QuotationStatus.PENDING]
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_CHUNKS = 10
+DEFAULT_CONVERSATION_STALE_AFTER = timedelta(hours=24)
+
+QUOTATIONS_TABLE = Quotation.__table__
+CONVERSATIONS_TABLE = WhatsAppConversation.__table__
+AUDIT_TABLE = AuditLog.__table__
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class SweepReport:
+    """Resultado de una ejecución del sweeper"""
+    quotations_expired: int = 0
+    conversations_abandoned: int = 0
+    statements: int = 0
+    duration_s: float = 0.0
+
+
+# ============================================================================
+# STATEMENTS
+# ============================================================================
+
+def _transition_statement(table, entity_type: str, candidates, new_status, extra_values: dict, returning=()):
+    """
+    Construir UPDATE ... FROM (SELECT ... FOR UPDATE SKIP LOCKED LIMIT n)
+    como CTE, junto con el INSERT de auditoría de las filas actualizadas
+
+    Args:
+        table: Tabla a actualizar
+        entity_type: Nombre de la entidad en audit_logs
+        candidates: Subconsulta (id, status) de filas a transicionar
+        new_status: Estado destino
+        extra_values: Columnas adicionales a actualizar
+        returning: Columnas adicionales a devolver desde el CTE
+
+    Returns:
+        Tuple (CTE de filas actualizadas, INSERT ... SELECT de auditoría)
+    """
+    transitioned = (
+        table.update()
+        .where(table.c.id == candidates.c.id)
+        .values(status=new_status, **extra_values)
+        .returning(table.c.id, candidates.c.status.label("old_status"), *returning)
+        .cte("transitioned")
+    )
+
+    changes = func.jsonb_build_object(
+        "status",
+        func.jsonb_build_object(
+            "old", func.lower(cast(transitioned.c.old_status, String)),
+            "new", new_status.value,
+        ),
+    )
+    audit = AUDIT_TABLE.insert().from_select(
+        ["id", "action", "entity_type", "entity_id", "user_email", "changes", "created_at"],
+        select(
+            func.gen_random_uuid(),
+            literal("UPDATE"),
+            literal(entity_type),
+            transitioned.c.id,
+            literal(SWEEPER_USER_EMAIL),
+            changes,
+            func.now(),
+        ).select_from(transitioned),
+    )
+    return transitioned, audit
+
+
+def expire_quotations_statement(now: datetime, chunk_size: int):
+    """
+    Sentencia para vencer un bloque de cotizaciones (usa idx_quotations_status_expires)
+
+    Devuelve las filas vencidas agregadas por (día, vertical, estado previo)
+    para ajustar los rollups del panel sin otra lectura.
+    """
+    q = QUOTATIONS_TABLE
+    candidates = (
+        select(q.c.id, q.c.status)
+        .where(q.c.status.in_(EXPIRABLE_QUOTATION_STATUSES))
+        .where(q.c.expires_at < now)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .subquery("candidates")
+    )
+    transitioned, audit = _transition_statement(
+        q, "Quotation", candidates, QuotationStatus.EXPIRED, {"updated_at": func.now()},
+        returning=(
+            q.c.vertical, q.c.created_at, q.c.subtotal, q.c.discount_amount,
+            q.c.tax_amount, q.c.total, q.c.calculation_details,
+        ),
+    )
+
+    t = transitioned.c
+    day = day_expression("postgresql", t.created_at)
+    return (
+        select(
+            day.label("day"),
+            t.vertical,
+            t.old_status,
+            func.count().label("quotations_count"),
+            func.sum(t.subtotal).label("subtotal_sum"),
+            func.sum(t.discount_amount).label("discount_sum"),
+            func.sum(t.tax_amount).label("tax_sum"),
+            func.sum(t.total).label("total_sum"),
+            func.sum(area_expression(t.calculation_details)).label("total_area_sqm"),
+        )
+        .group_by(day, t.vertical, t.old_status)
+        .add_cte(audit.cte("audited"))
+    )
+
+
+def abandon_conversations_statement(stale_before: datetime, chunk_size: int):
+    """
+    Sentencia para abandonar un bloque de conversaciones (usa
+    idx_wa_conv_status_last_message); devuelve los ids abandonados
+    """
+    c = CONVERSATIONS_TABLE
+    candidates = (
+        select(c.c.id, c.c.status)
+        .where(c.c.status == WhatsAppConversationStatus.ACTIVE)
+        .where(c.c.last_message_at < stale_before)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .subquery("candidates")
+    )
+    _, audit = _transition_statement(
+        c, "WhatsAppConversation", candidates, WhatsAppConversationStatus.ABANDONED, {}
+    )
+    return audit.returning(AUDIT_TABLE.c.entity_id)
+
+
+# ============================================================================
+# SWEEPER
+# ============================================================================
+
+class LifecycleSweeper:
+    """Sweeper de vencimientos por lotes"""
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunks: int = DEFAULT_MAX_CHUNKS,
+        conversation_stale_after: timedelta = DEFAULT_CONVERSATION_STALE_AFTER
+    ):
+        """
+        Inicializar sweeper
+
+        Cada bloque es una sola sentencia (UPDATE + INSERT de auditoría), más
+        el ajuste de rollups en el caso de cotizaciones, y se confirma por
+        separado; una ejecución emite como máximo max_chunks bloques por
+        tabla, sin importar el tamaño del atraso.
+
+        Args:
+            chunk_size: Filas por sentencia
+            max_chunks: Máximo de bloques por tabla en cada ejecución
+            conversation_stale_after: Inactividad para abandonar una conversación
+        """
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.conversation_stale_after = conversation_stale_after
+
+    def _run_chunks(self, session: Session, execute_chunk, report: SweepReport) -> int:
+        transitioned = 0
+        for _ in range(self.max_chunks):
+            count = execute_chunk(session, report)
+            session.commit()
+            transitioned += count
+            if count < self.chunk_size:
+                break
+        return transitioned
+
+    def _expire_chunk(self, session: Session, now: datetime, report: SweepReport) -> int:
+        rows = session.execute(expire_quotations_statement(now, self.chunk_size)).all()
+        report.statements += 1
+
+        # Mover los importes del estado previo a EXPIRED en los rollups
+        deltas = {}
+        for row in rows:
+            sums = (
+                row.quotations_count, row.subtotal_sum, row.discount_sum,
+                row.tax_sum, row.total_sum, row.total_area_sqm,
+            )
+            deltas.setdefault((row.day, row.vertical, row.old_status), RollupDelta()).add(-1, *sums)
+            deltas.setdefault((row.day, row.vertical, QuotationStatus.EXPIRED), RollupDelta()).add(1, *sums)
+        if deltas:
+            apply_rollup_deltas(session.connection(), deltas)
+            report.statements += 1
+
+        return sum(row.quotations_count for row in rows)
+
+    def _abandon_chunk(self, session: Session, stale_before: datetime, report: SweepReport, abandoned: List) -> int:
+        ids = session.execute(abandon_conversations_statement(stale_before, self.chunk_size)).scalars().all()
+        report.statements += 1
+        abandoned.extend(ids)
+        return len(ids)
+
+    def expire_quotations(self, session: Session, now: datetime, report: SweepReport) -> int:
+        return self._run_chunks(
+            session,
+            lambda chunk_session, chunk_report: self._expire_chunk(chunk_session, now, chunk_report),
+            report,
+        )
+
+    def abandon_conversations(self, session: Session, now: datetime, report: SweepReport) -> int:
+        stale_before = now - self.conversation_stale_after
+        abandoned: List = []
+        try:
+            return self._run_chunks(
+                session,
+                lambda chunk_session, chunk_report: self._abandon_chunk(
+                    chunk_session, stale_before, chunk_report, abandoned
+                ),
+                report,
+            )
+        finally:
+            # Los resolvers de este proceso no ven estos UPDATE por conjuntos
+            # (ver invalidate_senders); los de otros procesos, al vencer su TTL
+            invalidate_senders(conversation_ids=abandoned)
+
+    def sweep(self, session: Session, now: Optional[datetime] = None) -> SweepReport:
+        """
+        Ejecutar una pasada completa
+
+        Args:
+            session: Sesión de base de datos (se confirma por bloque)
+            now: Instante de referencia (None para la hora actual)
+
+        Returns:
+            Reporte de la ejecución
+        """
+        now = now or datetime.now(timezone.utc)
+        report = SweepReport()
+        start = time.perf_counter()
+        report.quotations_expired = self.expire_quotations(session, now, report)
+        report.conversations_abandoned = self.abandon_conversations(session, now, report)
+        report.duration_s = time.perf_counter() - start
+        return report
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vencimiento de cotizaciones y conversaciones")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-chunks", type=int, default=DEFAULT_MAX_CHUNKS)
+    parser.add_argument("--stale-hours", type=float, default=DEFAULT_CONVERSATION_STALE_AFTER.total_seconds() / 3600)
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    sweeper = LifecycleSweeper(
+        chunk_size=args.chunk_size,
+        max_chunks=args.max_chunks,
+        conversation_stale_after=timedelta(hours=args.stale_hours),
+    )
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        report = sweeper.sweep(session)
+    print(
+        f"Cotizaciones vencidas: {report.quotations_expired}, "
+        f"conversaciones abandonadas: {report.conversations_abandoned}, "
+        f"sentencias: {report.statements}, {report.duration_s:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,768 @@
+"""
+SQLAlchemy Models for Films Quotation System
+Complete database models for all verticals: Automotive, Residential, Commercial
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, List
+from uuid import uuid4
+
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Enum, Float, ForeignKey, Integer,
+    JSON, Numeric, String, Text, Index, UniqueConstraint, CheckConstraint, Computed
+)
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import relationship, validates, DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.sql import ColumnElement, func, text
+
+from .enums import (
+    CustomerType,
+    VerticalType,
+    QuotationStatus,
+    ProductType,
+    PropertyType,
+    RoomType,
+    OpeningType,
+    VehicleType,
+    WhatsAppConversationStatus,
+    MessageDirection,
+)
+from .phones import normalize_phone
+
+
+class Base(DeclarativeBase):
+    """Base class for all models"""
+    pass
+
+
+# ============================================================================
+# CUSTOMER & USER MODELS
+# ============================================================================
+
+class Customer(Base):
+    """Cliente del sistema"""
+    __tablename__ = "customers"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    email: Mapped[Optional[str]] = mapped_column(String(255), unique=True, index=True)
+    phone: Mapped[str] = mapped_column(String(20), nullable=False)
+    whatsapp: Mapped[Optional[str]] = mapped_column(String(20), index=True)
+    customer_type: Mapped[CustomerType] = mapped_column(Enum(CustomerType), nullable=False)
+    
+    # Teléfonos normalizados a E.164 (calculados al escribir phone/whatsapp)
+    phone_normalized: Mapped[Optional[str]] = mapped_column(String(20))
+    whatsapp_normalized: Mapped[Optional[str]] = mapped_column(String(20))
+    
+    # Información adicional
+    company_name: Mapped[Optional[str]] = mapped_column(String(255))
+    tax_id: Mapped[Optional[str]] = mapped_column(String(50))
+    address: Mapped[Optional[str]] = mapped_column(Text)
+    city: Mapped[Optional[str]] = mapped_column(String(100))
+    state: Mapped[Optional[str]] = mapped_column(String(100))
+    country: Mapped[Optional[str]] = mapped_column(String(100))
+    postal_code: Mapped[Optional[str]] = mapped_column(String(20))
+    
+    # Metadata flexible
+    metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    
+    # Relationships
+    quotations: Mapped[List["Quotation"]] = relationship(back_populates="customer", cascade="all, delete-orphan")
+    whatsapp_conversations: Mapped[List["WhatsAppConversation"]] = relationship(back_populates="customer")
+    purchase_totals: Mapped[Optional["CustomerPurchaseTotals"]] = relationship(
+        back_populates="customer", uselist=False, cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index('idx_customers_email', 'email'),
+        Index('idx_customers_phone', 'phone'),
+        Index('idx_customers_whatsapp', 'whatsapp'),
+        Index('idx_customers_phone_normalized', 'phone_normalized'),
+        Index('idx_customers_whatsapp_normalized', 'whatsapp_normalized'),
+        # Búsqueda por fragmentos (requiere la extensión pg_trgm)
+        Index('idx_customers_name_trgm', 'name',
+              postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_customers_company_trgm', 'company_name',
+              postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'}),
+        Index('idx_customers_email_trgm', 'email',
+              postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('idx_customers_phone_normalized_trgm', 'phone_normalized',
+              postgresql_using='gin', postgresql_ops={'phone_normalized': 'gin_trgm_ops'}),
+        Index('idx_customers_whatsapp_normalized_trgm', 'whatsapp_normalized',
+              postgresql_using='gin', postgresql_ops={'whatsapp_normalized': 'gin_trgm_ops'}),
+    )
+
+    @validates("phone", "whatsapp")
+    def _normalize_phone_columns(self, key: str, value: Optional[str]) -> Optional[str]:
+        setattr(self, f"{key}_normalized", normalize_phone(value))
+        return value
+
+
+class CustomerPurchaseTotals(Base):
+    """Totales históricos de compras por cliente (mantenidos incrementalmente)"""
+    __tablename__ = "customer_purchase_totals"
+
+    customer_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("customers.id"), primary_key=True)
+    
+    # Agregados de cotizaciones CONFIRMED
+    lifetime_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+    purchases_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_purchase_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    
+    # Relationships
+    customer: Mapped["Customer"] = relationship(back_populates="purchase_totals")
+
+    __table_args__ = (
+        CheckConstraint('purchases_count >= 0', name='check_purchases_count_positive'),
+    )
+
+
+# ============================================================================
+# PRODUCT CATALOG MODELS
+# ============================================================================
+
+class _SpecNumber(ColumnElement):
+    """
+    Valor numérico de specifications[key] para una columna generada
+
+    Acepta números y textos como "65%" (lib/seed.ts); cualquier otro valor
+    da NULL en lugar de hacer fallar el INSERT/UPDATE del producto.
+    """
+    type = Numeric(8, 2)
+    inherit_cache = False  # solo se usa en DDL
+
+    def __init__(self, key: str):
+        self.key = key
+
+
+@compiles(_SpecNumber)
+def _compile_spec_number(element, compiler, **kw):
+    value = f"(specifications ->> '{element.key}')"
+    return (
+        f"CASE WHEN {value} ~ '^-?[0-9]{{1,6}}(\\.[0-9]+)?%?$' "
+        f"THEN CAST(rtrim({value}, '%') AS NUMERIC(8, 2)) END"
+    )
+
+
+@compiles(_SpecNumber, "sqlite")
+def _compile_spec_number_sqlite(element, compiler, **kw):
+    # SQLite no tiene expresiones regulares: un "-" opcional, dígitos y a lo
+    # sumo un punto tras quitar "%" (los booleanos JSON, que ->> devuelve como
+    # 0/1, quedan afuera)
+    value = f"rtrim(specifications ->> '{element.key}', '%')"
+    unsigned = f"ltrim({value}, '-')"
+    return (
+        f"CASE WHEN json_type(specifications, '$.{element.key}') IN ('integer', 'real', 'text') "
+        f"AND {value} NOT GLOB '--*' AND {unsigned} GLOB '[0-9]*' "
+        f"AND {unsigned} NOT GLOB '*[^0-9.]*' AND {unsigned} NOT GLOB '*.*.*' "
+        f"THEN CAST({value} AS NUMERIC(8, 2)) END"
+    )
+
+
+def _spec_number(key: str) -> Computed:
+    """Columna generada numérica a partir de Product.specifications"""
+    return Computed(_SpecNumber(key), persisted=True)
+
+
+def _spec_text(key: str) -> Computed:
+    """Columna generada de texto a partir de Product.specifications"""
+    return Computed(f"specifications ->> '{key}'", persisted=True)
+
+
+class ProductCategory(Base):
+    """Categoría de productos"""
+    __tablename__ = "product_categories"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    slug: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    vertical: Mapped[VerticalType] = mapped_column(Enum(VerticalType), nullable=False)
+    parent_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("product_categories.id"))
+    sort_order: Mapped[int] = mapped_column(Integer, default=0)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    products: Mapped[List["Product"]] = relationship(back_populates="category")
+    parent: Mapped[Optional["ProductCategory"]] = relationship(remote_side=[id], back_populates="children")
+    children: Mapped[List["ProductCategory"]] = relationship(back_populates="parent")
+
+
+class Product(Base):
+    """Producto/Film"""
+    __tablename__ = "products"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    category_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("product_categories.id"), nullable=False)
+    sku: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    product_type: Mapped[ProductType] = mapped_column(Enum(ProductType), nullable=False)
+    
+    # Especificaciones técnicas
+    specifications: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # {
+    #   "material": "polyester",
+    #   "color": "charcoal",
+    #   "opacity": 95,  # 0-100%
+    #   "uv_protection": 99,  # 0-100%
+    #   "heat_rejection": 65,  # 0-100%
+    #   "visible_light_transmission": 5,  # 0-100%
+    #   "thickness_microns": 50,
+    #   "warranty_years": 10,
+    #   "scratch_resistant": true,
+    #   "anti_fade": true
+    # }
+    
+    # Proyección tipada de specifications para búsqueda facetada (solo lectura)
+    heat_rejection: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("heat_rejection"))
+    visible_light_transmission: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("visible_light_transmission"))
+    uv_protection: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("uv_protection"))
+    opacity: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("opacity"))
+    thickness_microns: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("thickness_microns"))
+    warranty_years: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), _spec_number("warranty_years"))
+    color: Mapped[Optional[str]] = mapped_column(String(50), _spec_text("color"))
+    material: Mapped[Optional[str]] = mapped_column(String(50), _spec_text("material"))
+    
+    # Estado y control
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    featured: Mapped[bool] = mapped_column(Boolean, default=False)
+    
+    # Imágenes
+    image_url: Mapped[Optional[str]] = mapped_column(String(500))
+    gallery_urls: Mapped[Optional[list]] = mapped_column(JSONB, default=list)
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    
+    # Relationships
+    category: Mapped["ProductCategory"] = relationship(back_populates="products")
+    prices: Mapped[List["ProductPrice"]] = relationship(back_populates="product", cascade="all, delete-orphan")
+    quotation_items: Mapped[List["QuotationItem"]] = relationship(back_populates="product")
+
+    __table_args__ = (
+        Index('idx_products_category', 'category_id'),
+        Index('idx_products_active', 'active'),
+        Index('idx_products_type', 'product_type'),
+        Index('idx_products_type_heat_rejection', 'product_type', 'heat_rejection'),
+        Index('idx_products_type_vlt', 'product_type', 'visible_light_transmission'),
+        Index('idx_products_type_uv_protection', 'product_type', 'uv_protection'),
+        Index('idx_products_type_warranty', 'product_type', 'warranty_years'),
+        Index('idx_products_type_color', 'product_type', 'color'),
+    )
+
+
+class ProductFacetCount(Base):
+    """Conteos de facetas precalculados por tipo de producto y vertical"""
+    __tablename__ = "product_facet_counts"
+
+    product_type: Mapped[ProductType] = mapped_column(Enum(ProductType), primary_key=True)
+    vertical: Mapped[VerticalType] = mapped_column(Enum(VerticalType), primary_key=True)
+    facet: Mapped[str] = mapped_column(String(50), primary_key=True)  # "heat_rejection", "color", ...
+    bucket: Mapped[str] = mapped_column(String(50), primary_key=True)  # "60-69", "charcoal", ...
+    
+    product_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+class ProductPrice(Base):
+    """Precios de productos"""
+    __tablename__ = "product_prices"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    product_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    
+    # Precios según unidad de medida
+    price_per_sqm: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))  # Precio por m²
+    price_per_linear_meter: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))  # Precio por metro lineal
+    installation_per_sqm: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))  # Instalación por m²
+    installation_per_linear_meter: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))
+    
+    # Precios por vertical (pueden variar)
+    vertical: Mapped[Optional[VerticalType]] = mapped_column(Enum(VerticalType))
+    
+    # Moneda y vigencia
+    currency: Mapped[str] = mapped_column(String(3), default="USD")
+    valid_from: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    valid_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    # Control
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    product: Mapped["Product"] = relationship(back_populates="prices")
+
+    __table_args__ = (
+        Index('idx_prices_product_valid', 'product_id', 'valid_from', 'valid_until'),
+        Index('idx_prices_active', 'active'),
+    )
+
+
+# ============================================================================
+# QUOTATION MODELS
+# ============================================================================
+
+class Quotation(Base):
+    """Cotización principal"""
+    __tablename__ = "quotations"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    quotation_number: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    # active_history: los agregados incrementales necesitan el valor previo
+    customer_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=False, active_history=True)
+    
+    # Tipo de cotización
+    vertical: Mapped[VerticalType] = mapped_column(Enum(VerticalType), nullable=False, active_history=True)
+    status: Mapped[QuotationStatus] = mapped_column(Enum(QuotationStatus), default=QuotationStatus.DRAFT, active_history=True)
+    
+    # Montos
+    subtotal: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, active_history=True)
+    discount_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0.00"), active_history=True)
+    tax_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0.00"), active_history=True)
+    total: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, active_history=True)
+    
+    # Detalles de cálculo
+    calculation_details: Mapped[dict] = mapped_column(JSONB, default=dict, active_history=True)
+    # {
+    #   "total_area_sqm": 150.5,
+    #   "waste_percentage": 0.15,
+    #   "complexity_factor": 1.2,
+    #   "volume_discount_percentage": 0.10,
+    #   "tax_rate": 0.21
+    # }
+    
+    # Notas y observaciones
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    internal_notes: Mapped[Optional[str]] = mapped_column(Text)
+    
+    # Vigencia
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    
+    # Relationships
+    customer: Mapped["Customer"] = relationship(back_populates="quotations")
+    items: Mapped[List["QuotationItem"]] = relationship(back_populates="quotation", cascade="all, delete-orphan")
+    property: Mapped[Optional["Property"]] = relationship(back_populates="quotation", uselist=False, cascade="all, delete-orphan")
+    vehicle: Mapped[Optional["Vehicle"]] = relationship(back_populates="quotation", uselist=False, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('idx_quotations_customer', 'customer_id'),
+        Index('idx_quotations_status', 'status'),
+        Index('idx_quotations_vertical', 'vertical'),
+        Index('idx_quotations_created', 'created_at'),
+        Index('idx_quotations_status_expires', 'status', 'expires_at'),
+    )
+    # created_at (reloj de la base) vuelve con RETURNING en el mismo flush:
+    # los rollups incrementales lo imputan al mismo día que rebuild_rollups
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class QuotationItem(Base):
+    """Items de cotización"""
+    __tablename__ = "quotation_items"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    quotation_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("quotations.id"), nullable=False)
+    product_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    opening_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("openings.id"))
+    
+    # Cantidades
+    quantity: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    unit: Mapped[str] = mapped_column(String(20), nullable=False)  # "m²", "m", "unit"
+    
+    # Precios
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    installation_cost: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0.00"))
+    subtotal: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    
+    # Dimensiones y especificaciones
+    dimensions: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    # {
+    #   "width": 1.5,
+    #   "height": 2.0,
+    #   "area": 3.0,
+    #   "waste_area": 0.45
+    # }
+    
+    specifications: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    # {
+    #   "complexity_factor": 1.2,
+    #   "installation_difficulty": "medium",
+    #   "access_type": "indoor",
+    #   "floor_level": 3
+    # }
+    
+    # Descripción personalizada
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    quotation: Mapped["Quotation"] = relationship(back_populates="items")
+    product: Mapped["Product"] = relationship(back_populates="quotation_items")
+    opening: Mapped[Optional["Opening"]] = relationship(back_populates="quotation_items")
+
+    __table_args__ = (
+        Index('idx_items_quotation', 'quotation_id'),
+        Index('idx_items_product', 'product_id'),
+    )
+
+
+class QuotationDailyRollup(Base):
+    """Totales diarios de cotizaciones por vertical y estado (panel del encargado)"""
+    __tablename__ = "quotation_daily_rollups"
+
+    # Día de creación de la cotización (UTC)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    vertical: Mapped[VerticalType] = mapped_column(Enum(VerticalType), primary_key=True)
+    status: Mapped[QuotationStatus] = mapped_column(Enum(QuotationStatus), primary_key=True)
+    
+    # Agregados
+    quotations_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    subtotal_sum: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=Decimal("0.00"))
+    discount_sum: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=Decimal("0.00"))
+    tax_sum: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=Decimal("0.00"))
+    total_sum: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=Decimal("0.00"))
+    total_area_sqm: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=Decimal("0.00"))
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+# ============================================================================
+# PROPERTY MODELS (Residential & Commercial)
+# ============================================================================
+
+class Property(Base):
+    """Propiedad (hogar, edificio, oficina)"""
+    __tablename__ = "properties"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    quotation_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("quotations.id"), nullable=False)
+    
+    # Tipo y datos básicos
+    property_type: Mapped[PropertyType] = mapped_column(Enum(PropertyType), nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(String(255))  # Nombre del edificio/proyecto
+    
+    # Ubicación
+    address: Mapped[Optional[str]] = mapped_column(Text)
+    city: Mapped[Optional[str]] = mapped_column(String(100))
+    state: Mapped[Optional[str]] = mapped_column(String(100))
+    postal_code: Mapped[Optional[str]] = mapped_column(String(20))
+    location: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)  # {"lat": -34.xxx, "lng": -58.xxx}
+    
+    # Características
+    total_area: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))  # Área total en m²
+    floors: Mapped[Optional[int]] = mapped_column(Integer)
+    year_built: Mapped[Optional[int]] = mapped_column(Integer)
+    
+    # Metadata adicional
+    metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    # {
+    #   "building_style": "modern",
+    #   "glass_type": "tempered",
+    #   "has_elevator": true,
+    #   "access_notes": "Security checkpoint at entrance"
+    # }
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    quotation: Mapped["Quotation"] = relationship(back_populates="property")
+    rooms: Mapped[List["Room"]] = relationship(back_populates="property", cascade="all, delete-orphan")
+
+
+class Room(Base):
+    """Habitación o área de una propiedad"""
+    __tablename__ = "rooms"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    property_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False)
+    
+    # Identificación
+    name: Mapped[str] = mapped_column(String(100), nullable=False)  # "Sala Principal", "Oficina 305"
+    room_type: Mapped[RoomType] = mapped_column(Enum(RoomType), nullable=False)
+    
+    # Características
+    area: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))  # Área en m²
+    floor: Mapped[int] = mapped_column(Integer, default=1)
+    
+    # Metadata
+    metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    # {
+    #   "ceiling_height": 2.8,
+    #   "has_ac": true,
+    #   "sun_exposure": "east",
+    #   "privacy_level": "high"
+    # }
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    property: Mapped["Property"] = relationship(back_populates="rooms")
+    openings: Mapped[List["Opening"]] = relationship(back_populates="room", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('idx_rooms_property', 'property_id'),
+    )
+
+
+class Opening(Base):
+    """Abertura (ventana, puerta, mampara, etc.)"""
+    __tablename__ = "openings"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    room_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("rooms.id"), nullable=False)
+    
+    # Tipo de abertura
+    opening_type: Mapped[OpeningType] = mapped_column(Enum(OpeningType), nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(String(100))  # "Ventana Principal", "Puerta Corrediza"
+    
+    # Dimensiones
+    width: Mapped[Decimal] = mapped_column(Numeric(8, 2), nullable=False)  # metros
+    height: Mapped[Decimal] = mapped_column(Numeric(8, 2), nullable=False)  # metros
+    area: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)  # m² calculado
+    quantity: Mapped[int] = mapped_column(Integer, default=1)  # Para múltiples aberturas idénticas
+    
+    # Especificaciones técnicas
+    specifications: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # {
+    #   "glass_type": "tempered",
+    #   "thickness_mm": 6,
+    #   "frame_material": "aluminum",
+    #   "opening_direction": "sliding",
+    #   "has_dividers": false,
+    #   "curved": false,
+    #   "tinted": false,
+    #   "installation_height_m": 1.5,
+    #   "difficult_access": false
+    # }
+    
+    # Notas
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    room: Mapped["Room"] = relationship(back_populates="openings")
+    quotation_items: Mapped[List["QuotationItem"]] = relationship(back_populates="opening")
+
+    __table_args__ = (
+        Index('idx_openings_room', 'room_id'),
+        CheckConstraint('width > 0', name='check_width_positive'),
+        CheckConstraint('height > 0', name='check_height_positive'),
+        CheckConstraint('quantity > 0', name='check_quantity_positive'),
+    )
+
+
+# ============================================================================
+# VEHICLE MODELS (Automotive)
+# ============================================================================
+
+class Vehicle(Base):
+    """Vehículo para vertical automotriz"""
+    __tablename__ = "vehicles"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    quotation_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("quotations.id"), nullable=False)
+    
+    # Identificación del vehículo
+    vin: Mapped[Optional[str]] = mapped_column(String(17), unique=True)
+    make: Mapped[str] = mapped_column(String(50), nullable=False)  # Marca
+    model: Mapped[str] = mapped_column(String(100), nullable=False)  # Modelo
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    vehicle_type: Mapped[VehicleType] = mapped_column(Enum(VehicleType), nullable=False)
+    
+    # Color y características
+    color: Mapped[Optional[str]] = mapped_column(String(50))
+    license_plate: Mapped[Optional[str]] = mapped_column(String(20))
+    
+    # Especificaciones de vidrios
+    glass_specifications: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # {
+    #   "windshield": {"width": 1.5, "height": 0.8, "curved": true},
+    #   "rear": {"width": 1.4, "height": 0.7, "curved": true},
+    #   "side_windows": {"front_left": {...}, "front_right": {...}, ...},
+    #   "sunroof": {"width": 0.8, "height": 1.2, "type": "panoramic"}
+    # }
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    quotation: Mapped["Quotation"] = relationship(back_populates="vehicle")
+
+    __table_args__ = (
+        Index('idx_vehicles_vin', 'vin'),
+        Index('idx_vehicles_make_model', 'make', 'model', 'year'),
+    )
+
+
+# ============================================================================
+# WHATSAPP INTEGRATION MODELS
+# ============================================================================
+
+class WhatsAppConversation(Base):
+    """Conversación de WhatsApp"""
+    __tablename__ = "whatsapp_conversations"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    customer_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("customers.id"))
+    
+    # Identificación WhatsApp
+    phone_number: Mapped[str] = mapped_column(String(20), nullable=False)
+    wa_id: Mapped[str] = mapped_column(String(50), nullable=False)  # WhatsApp ID
+    phone_key: Mapped[Optional[str]] = mapped_column(String(20))  # phone_number en E.164
+    
+    # Estado de la conversación
+    status: Mapped[WhatsAppConversationStatus] = mapped_column(
+        Enum(WhatsAppConversationStatus), 
+        default=WhatsAppConversationStatus.ACTIVE
+    )
+    
+    # Contexto de la conversación
+    context: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # {
+    #   "current_step": "selecting_vertical",
+    #   "vertical": "residential",
+    #   "property_data": {...},
+    #   "selected_products": [...]
+    # }
+    
+    # Timestamps
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_message_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    # Relationships
+    customer: Mapped[Optional["Customer"]] = relationship(back_populates="whatsapp_conversations")
+    messages: Mapped[List["WhatsAppMessage"]] = relationship(back_populates="conversation", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('idx_wa_conv_phone', 'phone_number'),
+        Index('idx_wa_conv_customer', 'customer_id'),
+        Index('idx_wa_conv_status', 'status'),
+        Index('idx_wa_conv_status_last_message', 'status', 'last_message_at'),
+        # Una sola conversación activa por teléfono
+        Index('uq_wa_conv_active_phone_key', 'phone_key', unique=True,
+              postgresql_where=text("status = 'ACTIVE'"),
+              sqlite_where=text("status = 'ACTIVE'")),
+    )
+
+    @validates("phone_number")
+    def _normalize_phone_number(self, key: str, value: str) -> str:
+        self.phone_key = normalize_phone(value)
+        return value
+
+
+class WhatsAppMessage(Base):
+    """Mensaje de WhatsApp"""
+    __tablename__ = "whatsapp_messages"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    conversation_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("whatsapp_conversations.id"), nullable=False)
+    
+    # Dirección del mensaje
+    direction: Mapped[MessageDirection] = mapped_column(Enum(MessageDirection), nullable=False)
+    
+    # Contenido
+    message_type: Mapped[str] = mapped_column(String(20), default="text")  # text, image, document, etc.
+    content: Mapped[Text] = mapped_column(Text, nullable=False)
+    
+    # WhatsApp metadata
+    wa_message_id: Mapped[Optional[str]] = mapped_column(String(100), unique=True)
+    metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
+    
+    # Control de estado
+    delivered: Mapped[bool] = mapped_column(Boolean, default=False)
+    read: Mapped[bool] = mapped_column(Boolean, default=False)
+    
+    # Timestamps
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    read_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    # Relationships
+    conversation: Mapped["WhatsAppConversation"] = relationship(back_populates="messages")
+
+    __table_args__ = (
+        Index('idx_wa_msg_conversation', 'conversation_id'),
+        Index('idx_wa_msg_sent_at', 'sent_at'),
+    )
+
+
+# ============================================================================
+# PRICING RULES
+# ============================================================================
+
+class PricingRuleSet(Base):
+    """Versión de las reglas de negocio (desperdicios, descuentos, impuestos, complejidad)"""
+    __tablename__ = "pricing_rule_sets"
+
+    version: Mapped[str] = mapped_column(String(50), primary_key=True)
+    
+    # Reglas en el formato de pricing_rules.rules_to_dict
+    rules: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    
+    # Solo la versión activa más reciente se usa para cotizar
+    active: Mapped[bool] = mapped_column(Boolean, default=False)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    activated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_pricing_rule_sets_active', 'active', 'activated_at'),
+    )
+
+
+# ============================================================================
+# AUDIT & LOGGING
+# ============================================================================
+
+class AuditLog(Base):
+    """Log de auditoría"""
+    __tablename__ = "audit_logs"
+
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    
+    # Qué se hizo
+    action: Mapped[str] = mapped_column(String(50), nullable=False)  # CREATE, UPDATE, DELETE
+    entity_type: Mapped[str] = mapped_column(String(50), nullable=False)  # Quotation, Product, etc.
+    entity_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    
+    # Quién lo hizo
+    user_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True))
+    user_email: Mapped[Optional[str]] = mapped_column(String(255))
+    
+    # Datos del cambio
+    changes: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # {"field": {"old": "value1", "new": "value2"}}
+    
+    # Contexto
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45))
+    user_agent: Mapped[Optional[str]] = mapped_column(Text)
+    
+    # Timestamp
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_audit_entity', 'entity_type', 'entity_id'),
+        Index('idx_audit_user', 'user_id'),
+        Index('idx_audit_created', 'created_at'),
+    )
@@ -0,0 +1,343 @@
+"""
+Parallel Calculation
+Cálculo por fragmentos de una cotización gigante (fachadas, aeropuertos):
+las aberturas se reparten en fragmentos que un pool de procesos lee desde
+memoria compartida, cada fragmento devuelve sus sumas parciales (y sus
+items, si se piden), y el descuento por volumen, los impuestos y el
+redondeo final se aplican una sola vez tras combinar, con el mismo
+resultado que el cálculo serie
+"""
+import os
+import pickle
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .calculator import (
+    CalculationItem,
+    ItemTotals,
+    OpeningData,
+    ProductData,
+    QuotationCalculationResult,
+    QuotationCalculator,
+)
+from .pricing_rules import rules_from_dict, rules_to_dict
+
+
+# Por debajo de este tamaño el costo de repartir supera la ganancia
+DEFAULT_MIN_PARALLEL_OPENINGS = 5000
+
+# Partes serie medidas con benchmarks/parallel_calculation (60.000 aberturas,
+# 0,56 s en serie): armar el buffer ~0,06 s, reconstruir los items 0,35-0,7 s.
+# Sin items el tope de Amdahl es ~9x; con items, menos de 2x con cualquier
+# cantidad de núcleos
+
+# Fragmentos por worker: más de uno equilibra la carga entre procesos
+SHARDS_PER_WORKER = 4
+
+# Los Decimal viajan como texto unido por "|" (pickle de Decimal es varias
+# veces más lento que calcular el item); el resto como listas
+_SEPARATOR = "|"
+_ITEM_FIELDS = tuple(f.name for f in fields(CalculationItem) if f.name != "specifications")
+_DECIMAL_FIELDS = frozenset(f.name for f in fields(CalculationItem) if f.type is Decimal)
+
+# Columnas con pocos valores distintos: se reutiliza el Decimal ya parseado
+_INTERNED_FIELDS = frozenset({
+    "base_width",
+    "base_height",
+    "waste_percentage",
+    "material_cost_per_sqm",
+    "installation_cost_per_sqm",
+    "complexity_factor",
+})
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class ShardedRunStats:
+    """Tiempos de la última ejecución"""
+    openings: int
+    shards: int
+    workers: int
+    encode_s: float  # armado del buffer compartido
+    wait_s: float  # esperando a los workers
+    decode_s: float  # reconstrucción de items (se solapa con el cálculo de otros fragmentos)
+    finalize_s: float  # combinación, descuento, impuestos y redondeo
+    total_s: float
+    parallel: bool
+
+
+def available_cpus() -> int:
+    """Núcleos utilizables por este proceso (respeta la afinidad de CPU)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+_calculators: Dict[Tuple[str, Optional[Decimal]], QuotationCalculator] = {}
+
+
+def _worker_calculator(rules: Dict, tax_rate: Decimal) -> QuotationCalculator:
+    # Las versiones de reglas son inmutables: se parsean una vez por proceso
+    key = (rules["version"], tax_rate)
+    calculator = _calculators.get(key)
+    if calculator is None:
+        calculator = _calculators[key] = QuotationCalculator(tax_rate, rules_from_dict(rules))
+    return calculator
+
+
+def _encode_column(values: List) -> object:
+    return _SEPARATOR.join(map(str, values))
+
+
+def _decode_column(name: str, column, cache: Dict[str, Decimal]) -> List:
+    if name not in _DECIMAL_FIELDS:
+        return column
+    values = column.split(_SEPARATOR)
+    if name not in _INTERNED_FIELDS:
+        return list(map(Decimal, values))
+    get = cache.get
+    decoded = []
+    for value in values:
+        number = get(value)
+        if number is None:
+            number = cache[value] = Decimal(value)
+        decoded.append(number)
+    return decoded
+
+
+def _calculate_shard(
+    memory_name: str,
+    header: Tuple[int, int],
+    shard: Tuple[int, int],
+    rules: Dict,
+    tax_rate: Decimal,
+    include_items: bool
+) -> Tuple[Optional[Dict[str, object]], ItemTotals]:
+    """Calcular los items de un fragmento leyendo la entrada de memoria compartida"""
+    # Los workers comparten el resource tracker del padre, que es quien borra el segmento
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        products = pickle.loads(memory.buf[header[0]:header[1]])
+        ids, types, widths, heights, quantities, specifications, rooms, floors, product_indexes = pickle.loads(
+            memory.buf[shard[0]:shard[1]]
+        )
+    finally:
+        memory.close()
+
+    calculator = _worker_calculator(rules, tax_rate)
+    calculate_item = calculator.calculate_item
+    items = [
+        calculate_item(
+            OpeningData(opening_id, opening_type, Decimal(width), Decimal(height), quantity, specs, room, floor),
+            products[product_index],
+        )
+        for opening_id, opening_type, width, height, quantity, specs, room, floor, product_index in zip(
+            ids, types, widths.split(_SEPARATOR), heights.split(_SEPARATOR),
+            quantities, specifications, rooms, floors, product_indexes,
+        )
+    ]
+    totals = ItemTotals.from_items(items)
+    if not include_items:
+        return None, totals
+    columns = {
+        name: _encode_column([getattr(item, name) for item in items]) if name in _DECIMAL_FIELDS
+        else [getattr(item, name) for item in items]
+        for name in _ITEM_FIELDS
+    }
+    return columns, totals
+
+
+# ============================================================================
+# SHARDED CALCULATOR
+# ============================================================================
+
+class ShardedQuotationCalculator:
+    """
+    Calcula cotizaciones gigantes en paralelo con el mismo resultado que
+    QuotationCalculator.calculate_quotation
+
+    Los items no dependen entre sí: cada fragmento los calcula con las mismas
+    reglas y devuelve sus sumas parciales (ItemTotals). Las sumas de Decimal
+    son exactas, así que combinarlas en orden de fragmento da los mismos
+    totales que la suma serie; el descuento, los impuestos y el redondeo se
+    aplican una vez con finalize_quotation.
+    """
+
+    def __init__(
+        self,
+        calculator: Optional[QuotationCalculator] = None,
+        workers: Optional[int] = None,
+        min_parallel_openings: int = DEFAULT_MIN_PARALLEL_OPENINGS,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Inicializar
+
+        Args:
+            calculator: Calculadora (reglas y tasa); None para una por defecto
+            workers: Procesos del pool (None: núcleos disponibles)
+            min_parallel_openings: Por debajo se calcula en serie
+            executor: Pool de procesos propio (None: se crea uno y se reutiliza)
+        """
+        self.calculator = calculator or QuotationCalculator()
+        self.workers = workers or available_cpus()
+        self.min_parallel_openings = min_parallel_openings
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.last_run: Optional[ShardedRunStats] = None
+
+    def __enter__(self) -> "ShardedQuotationCalculator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def calculate_quotation(
+        self,
+        openings: Sequence[OpeningData],
+        products: Sequence[ProductData],
+        custom_tax_rate: Optional[Decimal] = None,
+        shards: Optional[int] = None,
+        include_items: bool = False
+    ) -> QuotationCalculationResult:
+        """
+        Calcular una cotización completa repartiendo las aberturas
+
+        Por defecto devuelve solo totales y detalles (items vacío), el camino
+        que escala con los núcleos. Reconstruir los items en este proceso es
+        serie y acota el speedup a menos de 2x (ver el tope medido arriba):
+        include_items=True solo cuando se necesita el detalle por abertura.
+
+        Args:
+            openings: Lista de aberturas
+            products: Lista de productos (debe coincidir con openings)
+            custom_tax_rate: Tasa de impuesto personalizada (None para usar default)
+            shards: Cantidad de fragmentos (None: SHARDS_PER_WORKER por worker)
+            include_items: Si se devuelven los items
+
+        Returns:
+            Resultado idéntico al de calculate_quotation (sin items salvo
+            include_items=True)
+        """
+        if len(openings) != len(products):
+            raise ValueError("Debe haber un producto por cada abertura")
+        calculator = self.calculator
+        tax_rate = custom_tax_rate or calculator.tax_rate
+        start = time.perf_counter()
+
+        if len(openings) < self.min_parallel_openings or self.workers < 2:
+            result = calculator.calculate_quotation(list(openings), list(products), custom_tax_rate)
+            if not include_items:
+                result.items = []
+            elapsed = time.perf_counter() - start
+            self.last_run = ShardedRunStats(len(openings), 1, 1, 0.0, elapsed, 0.0, 0.0, elapsed, parallel=False)
+            return result
+
+        shard_count = max(1, min(shards or self.workers * SHARDS_PER_WORKER, len(openings)))
+        bounds = [len(openings) * index // shard_count for index in range(shard_count + 1)]
+
+        # Catálogo deduplicado por identidad: la misma instancia suele repetirse miles de veces
+        product_index: Dict[int, int] = {}
+        catalog: List[ProductData] = []
+        indexes = []
+        for product in products:
+            index = product_index.get(id(product))
+            if index is None:
+                index = product_index[id(product)] = len(catalog)
+                catalog.append(product)
+            indexes.append(index)
+
+        blobs = [pickle.dumps(catalog, pickle.HIGHEST_PROTOCOL)]
+        for low, high in zip(bounds, bounds[1:]):
+            shard = openings[low:high]
+            blobs.append(pickle.dumps((
+                [opening.opening_id for opening in shard],
+                [opening.opening_type for opening in shard],
+                _encode_column([opening.width for opening in shard]),
+                _encode_column([opening.height for opening in shard]),
+                [opening.quantity for opening in shard],
+                [opening.specifications for opening in shard],
+                [opening.room_name for opening in shard],
+                [opening.floor for opening in shard],
+                indexes[low:high],
+            ), pickle.HIGHEST_PROTOCOL))
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+
+        items: List[CalculationItem] = []
+        partials: List[ItemTotals] = []
+        wait_s = decode_s = 0.0
+        memory = shared_memory.SharedMemory(create=True, size=max(offsets[-1], 1))
+        try:
+            for blob, offset in zip(blobs, offsets):
+                memory.buf[offset:offset + len(blob)] = blob
+            del blobs
+            encoded = time.perf_counter()
+
+            rules = rules_to_dict(calculator.rules)
+            header = (offsets[0], offsets[1])
+            futures = [
+                self.executor.submit(
+                    _calculate_shard, memory.name, header, (offsets[index], offsets[index + 1]),
+                    rules, tax_rate, include_items,
+                )
+                for index in range(1, shard_count + 1)
+            ]
+            # En orden de fragmento, sin importar cuál terminó primero; cada
+            # uno se decodifica mientras los siguientes siguen calculándose
+            cache: Dict[str, Decimal] = {}
+            append = items.append
+            for low, future in zip(bounds, futures):
+                waited = time.perf_counter()
+                columns, totals = future.result()
+                decoding = time.perf_counter()
+                partials.append(totals)
+                if columns is not None:
+                    decoded = [_decode_column(name, columns[name], cache) for name in _ITEM_FIELDS]
+                    for opening, values in zip(openings[low:], zip(*decoded)):
+                        append(CalculationItem(*values, opening.specifications))
+                wait_s += decoding - waited
+                decode_s += time.perf_counter() - decoding
+        finally:
+            memory.close()
+            memory.unlink()
+
+        finalizing = time.perf_counter()
+        result = calculator.finalize_quotation(items, ItemTotals.merge(partials), tax_rate)
+        finished = time.perf_counter()
+
+        self.last_run = ShardedRunStats(
+            openings=len(openings),
+            shards=shard_count,
+            workers=self.workers,
+            encode_s=encoded - start,
+            wait_s=wait_s,
+            decode_s=decode_s,
+            finalize_s=finished - finalizing,
+            total_s=finished - start,
+            parallel=True,
+        )
+        return result
@@ -0,0 +1,136 @@
+"""
+Phone Normalization
+Normalización de teléfonos a E.164 para búsquedas y matching de WhatsApp
+"""
+import re
+from typing import Optional
+
+
+# Código de país por defecto (Argentina)
+DEFAULT_COUNTRY_CODE = "54"
+
+# Característica para números locales sin código de área (AMBA)
+DEFAULT_AREA_CODE = "11"
+
+# Argentina: código de país, número nacional (área + abonado) y prefijos
+# de celular: "9" tras el código de país (formato internacional, wa_id) y
+# "15" entre el área y el abonado (formato local)
+ARGENTINA_COUNTRY_CODE = "54"
+ARGENTINA_NATIONAL_DIGITS = 10
+ARGENTINA_LOCAL_DIGITS = 8
+ARGENTINA_MOBILE_PREFIX = "9"
+ARGENTINA_MOBILE_TRUNK = "15"
+# Primer dígito de las áreas argentinas (11, 2xx(x), 3xx(x))
+ARGENTINA_AREA_FIRST_DIGITS = "123"
+
+# Longitud máxima de un número E.164 (sin "+")
+E164_MAX_DIGITS = 15
+
+# Números sin código de país tienen como máximo esta cantidad de dígitos
+NATIONAL_MAX_DIGITS = 10
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def phone_digits(value: Optional[str]) -> str:
+    """Dígitos de un teléfono en cualquier formato"""
+    if not value:
+        return ""
+    return _NON_DIGITS.sub("", value)
+
+
+def _argentine_national(national: str, default_area_code: str) -> str:
+    """
+    Número nacional argentino sin los prefijos de celular
+
+    El mismo celular se escribe "9 11 2345-6789" (internacional, wa_id),
+    "11 15 2345-6789" o "15-2345-6789" (local); sin distinguir celulares de
+    fijos, la clave común es área + abonado, sin "9" ni "15".
+    """
+    if len(national) == ARGENTINA_NATIONAL_DIGITS + 1 and national.startswith(ARGENTINA_MOBILE_PREFIX):
+        return national[1:]
+    if len(national) == ARGENTINA_NATIONAL_DIGITS + 2:
+        # El área es "11" o de 3 a 4 dígitos que empiezan con 2 o 3
+        positions = (2,) if national.startswith("11") else (3, 4)
+        for position in positions:
+            if national[position:position + 2] == ARGENTINA_MOBILE_TRUNK:
+                return national[:position] + national[position + 2:]
+        return national
+    if len(national) == ARGENTINA_NATIONAL_DIGITS and national.startswith(ARGENTINA_MOBILE_TRUNK):
+        return default_area_code + national[2:]
+    if len(national) == ARGENTINA_LOCAL_DIGITS:
+        return default_area_code + national
+    return national
+
+
+def normalize_phone(
+    value: Optional[str],
+    default_country_code: str = DEFAULT_COUNTRY_CODE,
+    default_area_code: str = DEFAULT_AREA_CODE
+) -> Optional[str]:
+    """
+    Normalizar un teléfono a E.164 (ej: "+541123456789")
+
+    Reglas:
+    - "+" o prefijo internacional "00": el número ya incluye código de país
+    - prefijo troncal "0": número nacional, se antepone el código por defecto
+    - hasta NATIONAL_MAX_DIGITS dígitos: número nacional
+    - "9" y un número nacional argentino (ej: "9 11 2345 6789"): celular
+      argentino sin código de país
+    - resto: se asume que ya incluye código de país (ej: wa_id de WhatsApp)
+    - Argentina: se quitan el "9" y el "15" de celular y los números locales
+      toman el área por defecto, así todas las formas dan la misma clave;
+      con menos de ARGENTINA_LOCAL_DIGITS dígitos no es un teléfono
+
+    >>> {normalize_phone(value) for value in (
+    ...     "5491123456789", "+54 9 11 2345 6789", "011 2345-6789", "(011) 23456789",
+    ...     "11 2345 6789", "15-2345-6789", "011 15 2345-6789", "2345-6789",
+    ...     "9 11 2345 6789",
+    ... )}
+    {'+541123456789'}
+    >>> normalize_phone("0351 15 234-5678")
+    '+543512345678'
+    >>> [normalize_phone(value) for value in ("0", "123", "+54 9")]
+    [None, None, None]
+
+    Args:
+        value: Teléfono en formato libre
+        default_country_code: Código de país para números nacionales
+        default_area_code: Área para números argentinos locales (sin área)
+
+    Returns:
+        Teléfono en E.164 o None si no hay dígitos válidos
+    """
+    if not value:
+        return None
+
+    stripped = value.strip()
+    digits = phone_digits(stripped)
+    if not digits:
+        return None
+
+    if stripped.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = default_country_code + digits.lstrip("0")
+    elif len(digits) <= NATIONAL_MAX_DIGITS:
+        digits = default_country_code + digits
+    elif (
+        default_country_code == ARGENTINA_COUNTRY_CODE
+        and len(digits) == ARGENTINA_NATIONAL_DIGITS + 1
+        and digits.startswith(ARGENTINA_MOBILE_PREFIX)
+        and digits[1] in ARGENTINA_AREA_FIRST_DIGITS
+    ):
+        digits = default_country_code + digits
+
+    if digits.startswith(ARGENTINA_COUNTRY_CODE):
+        national = digits[len(ARGENTINA_COUNTRY_CODE):]
+        if len(national) < ARGENTINA_LOCAL_DIGITS:
+            return None
+        digits = ARGENTINA_COUNTRY_CODE + _argentine_national(national, default_area_code)
+
+    if not digits or len(digits) > E164_MAX_DIGITS:
+        return None
+    return f"+{digits}"
@@ -0,0 +1,469 @@
+"""
+Pricing Rules
+Reglas de negocio versionadas (desperdicios, descuentos por volumen,
+impuestos y factores de complejidad) cargadas desde un archivo JSON o desde
+la tabla pricing_rule_sets, validadas y recargables en caliente
+"""
+import argparse
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .calculator import DEFAULT_PRICING_RULES, PricingRules, QuotationCalculator
+
+
+DEFAULT_POLL_INTERVAL = 30.0  # segundos
+
+# Fuente de reglas: devuelve un snapshot nuevo o None si no cambió desde la última llamada
+RulesSource = Callable[[], Optional[PricingRules]]
+
+
+# ============================================================================
+# PARSING & VALIDATION
+# ============================================================================
+
+def _decimal(value, field_name: str, low: Decimal, high: Optional[Decimal] = None) -> Decimal:
+    """Convertir a Decimal validando el rango [low, high]"""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{field_name}: se esperaba un número, no {value!r}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{field_name}: valor no finito")
+    try:
+        # str() evita arrastrar el error binario de los float de JSON
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{field_name}: número inválido {value!r}") from None
+    if not number.is_finite() or number < low or (high is not None and number > high):
+        limit = f"[{low}, {high}]" if high is not None else f">= {low}"
+        raise ValueError(f"{field_name}: {number} fuera de rango {limit}")
+    return number
+
+
+def _mapping(data: Dict, field_name: str) -> Dict:
+    value = data.get(field_name)
+    if not isinstance(value, dict):
+        raise ValueError(f"{field_name}: se esperaba un objeto")
+    return value
+
+
+def _pairs(data: Dict, field_name: str) -> List:
+    value = data.get(field_name)
+    if not isinstance(value, list) or not all(isinstance(pair, list) and len(pair) == 2 for pair in value):
+        raise ValueError(f"{field_name}: se esperaba una lista de pares [umbral, valor]")
+    return value
+
+
+def rules_from_dict(data: Dict) -> PricingRules:
+    """
+    Validar y precompilar reglas en el formato de rules_to_dict
+
+    Args:
+        data: Reglas (ej: contenido del archivo JSON o de PricingRuleSet.rules)
+
+    Returns:
+        Snapshot inmutable, con las tablas de solo lectura y los escalones ordenados
+
+    Raises:
+        ValueError: Si falta un campo o algún valor es inválido
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Las reglas deben ser un objeto")
+    version = data.get("version")
+    if not isinstance(version, str) or not version.strip():
+        raise ValueError("version: se requiere un texto no vacío")
+
+    one = Decimal("1")
+    waste_matrix = {}
+    for opening_type, by_product in _mapping(data, "waste_matrix").items():
+        if not isinstance(by_product, dict):
+            raise ValueError(f"waste_matrix.{opening_type}: se esperaba un objeto")
+        waste_matrix[opening_type] = MappingProxyType({
+            product_type: _decimal(value, f"waste_matrix.{opening_type}.{product_type}", Decimal("0"), one)
+            for product_type, value in by_product.items()
+        })
+
+    volume_discounts = sorted(
+        (
+            (_decimal(threshold, "volume_discounts.umbral", Decimal("0")),
+             _decimal(discount, "volume_discounts.descuento", Decimal("0"), one))
+            for threshold, discount in _pairs(data, "volume_discounts")
+        ),
+        reverse=True,
+    )
+    thresholds = [threshold for threshold, _ in volume_discounts]
+    if len(set(thresholds)) != len(thresholds):
+        raise ValueError("volume_discounts: umbrales repetidos")
+    # Más área nunca debe dar menos descuento
+    for (_, higher), (_, lower) in zip(volume_discounts, volume_discounts[1:]):
+        if higher < lower:
+            raise ValueError("volume_discounts: el descuento debe crecer con el umbral")
+
+    height_factors = []
+    for min_floor, factor in _pairs(data, "height_factors"):
+        if isinstance(min_floor, bool) or not isinstance(min_floor, int):
+            raise ValueError(f"height_factors: piso inválido {min_floor!r}")
+        height_factors.append((min_floor, _decimal(factor, f"height_factors.{min_floor}", one)))
+    height_factors.sort(reverse=True)
+
+    return PricingRules(
+        version=version.strip(),
+        waste_matrix=MappingProxyType(waste_matrix),
+        default_waste=_decimal(data.get("default_waste"), "default_waste", Decimal("0"), one),
+        waste_adjustments=tuple(
+            (key, _decimal(value, f"waste_adjustments.{key}", Decimal("0"), one))
+            for key, value in _mapping(data, "waste_adjustments").items()
+        ),
+        max_waste=_decimal(data.get("max_waste"), "max_waste", Decimal("0"), one),
+        tax_rate=_decimal(data.get("tax_rate"), "tax_rate", Decimal("0"), one),
+        volume_discounts=tuple(volume_discounts),
+        height_factors=tuple(height_factors),
+        complexity_factors=tuple(
+            (key, _decimal(value, f"complexity_factors.{key}", one))
+            for key, value in _mapping(data, "complexity_factors").items()
+        ),
+    )
+
+
+def rules_to_dict(rules: PricingRules) -> Dict:
+    """Reglas serializables a JSON (los Decimal como texto, sin pérdida)"""
+    return {
+        "version": rules.version,
+        "waste_matrix": {
+            opening_type: {product_type: str(value) for product_type, value in by_product.items()}
+            for opening_type, by_product in rules.waste_matrix.items()
+        },
+        "default_waste": str(rules.default_waste),
+        "waste_adjustments": {key: str(value) for key, value in rules.waste_adjustments},
+        "max_waste": str(rules.max_waste),
+        "tax_rate": str(rules.tax_rate),
+        "volume_discounts": [[str(threshold), str(discount)] for threshold, discount in rules.volume_discounts],
+        "height_factors": [[min_floor, str(factor)] for min_floor, factor in rules.height_factors],
+        "complexity_factors": {key: str(value) for key, value in rules.complexity_factors},
+    }
+
+
+def load_rules_file(path: str) -> PricingRules:
+    """Leer y validar reglas desde un archivo JSON"""
+    with open(path, encoding="utf-8") as source:
+        return rules_from_dict(json.load(source))
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+# SQLAlchemy se importa dentro de las funciones: los workers que leen las
+# reglas de un archivo no lo necesitan
+
+def load_active_rules(session) -> Optional[PricingRules]:
+    """
+    Reglas activas más recientes de pricing_rule_sets
+
+    Args:
+        session: Session de SQLAlchemy
+
+    Returns:
+        Snapshot validado o None si no hay ninguna versión activa
+    """
+    from sqlalchemy import select
+    from .models import PricingRuleSet
+
+    row = session.execute(
+        select(PricingRuleSet.rules)
+        .where(PricingRuleSet.active.is_(True))
+        .order_by(PricingRuleSet.activated_at.desc().nulls_last(), PricingRuleSet.created_at.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    return rules_from_dict(row) if row is not None else None
+
+
+def publish_rules(session, rules: PricingRules, notes: Optional[str] = None, activate: bool = True) -> None:
+    """
+    Guardar una versión de reglas y, opcionalmente, activarla
+
+    Las versiones son inmutables: publicar una versión existente con otras
+    reglas es un error. Activar desactiva las demás en la misma transacción.
+
+    Args:
+        session: Session de SQLAlchemy (el commit queda a cargo del llamador)
+        rules: Reglas validadas
+        notes: Comentario de la versión
+        activate: Si pasa a ser la versión vigente
+    """
+    from sqlalchemy import update
+    from .models import PricingRuleSet
+
+    data = rules_to_dict(rules)
+    existing = session.get(PricingRuleSet, rules.version)
+    if existing is None:
+        existing = PricingRuleSet(version=rules.version, rules=data, notes=notes, active=False)
+        session.add(existing)
+    elif existing.rules != data:
+        raise ValueError(f"La versión {rules.version} ya existe con otras reglas")
+
+    if activate:
+        session.execute(
+            update(PricingRuleSet)
+            .where(PricingRuleSet.active.is_(True), PricingRuleSet.version != rules.version)
+            .values(active=False)
+        )
+        existing.active = True
+        existing.activated_at = datetime.now(timezone.utc)
+    session.flush()
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def file_source(path: str) -> RulesSource:
+    """
+    Fuente que relee el archivo solo si cambió su fecha de modificación o tamaño
+
+    Args:
+        path: Ruta del archivo JSON de reglas
+
+    Returns:
+        Función que devuelve las reglas nuevas o None si el archivo no cambió
+    """
+    last_stat: List[Optional[Tuple[int, int]]] = [None]
+
+    def load() -> Optional[PricingRules]:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == last_stat[0]:
+            return None
+        rules = load_rules_file(path)
+        # Se registra solo tras validar: un archivo a medio escribir se reintenta
+        last_stat[0] = signature
+        return rules
+
+    return load
+
+
+def database_source(session_factory) -> RulesSource:
+    """
+    Fuente que consulta la versión activa y solo carga las reglas si cambió
+
+    Args:
+        session_factory: sessionmaker (o callable que devuelva una Session)
+
+    Returns:
+        Función que devuelve las reglas nuevas o None si la versión no cambió
+    """
+    from sqlalchemy import select
+    from .models import PricingRuleSet
+
+    last_version: List[Optional[str]] = [None]
+
+    def load() -> Optional[PricingRules]:
+        with session_factory() as session:
+            version = session.execute(
+                select(PricingRuleSet.version)
+                .where(PricingRuleSet.active.is_(True))
+                .order_by(PricingRuleSet.activated_at.desc().nulls_last(), PricingRuleSet.created_at.desc())
+                .limit(1)
+            ).scalar_one_or_none()
+            if version is None or version == last_version[0]:
+                return None
+            rules = rules_from_dict(session.get(PricingRuleSet, version).rules)
+        last_version[0] = version
+        return rules
+
+    return load
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+@dataclass(frozen=True)
+class _Current:
+    rules: PricingRules
+    calculator: QuotationCalculator
+
+
+class RulesRegistry:
+    """
+    Reglas vigentes de un proceso, reemplazables sin detener los cálculos
+
+    Cada cálculo toma calculator() al empezar y lo usa hasta terminar: la
+    calculadora queda ligada a un snapshot inmutable, así que una recarga
+    concurrente no lo afecta. La recarga arma el snapshot y la calculadora
+    nuevos fuera de toda sección crítica y los publica con una única
+    asignación (atómica en CPython); los lectores nunca toman un lock.
+    """
+
+    def __init__(
+        self,
+        source: Optional[RulesSource] = None,
+        rules: Optional[PricingRules] = None,
+        tax_rate: Optional[Decimal] = None
+    ):
+        """
+        Inicializar registro
+
+        Args:
+            source: Fuente de reglas para reload() (None: solo swap() manual)
+            rules: Reglas iniciales (None para las por defecto)
+            tax_rate: Tasa de impuesto fija (None para usar la de las reglas)
+        """
+        self.source = source
+        self.tax_rate = tax_rate
+        self.last_error: Optional[Exception] = None
+        self._current = self._build(rules or DEFAULT_PRICING_RULES)
+        # Motivo por el que se rechazaron las últimas reglas de la fuente: la
+        # fuente no las vuelve a entregar hasta que cambien, así que cada
+        # reload() lo repite en lugar de informar que no hay cambios
+        self._rejection: Optional[str] = None
+        # Serializa recargas entre sí, nunca a los lectores
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _build(self, rules: PricingRules) -> _Current:
+        return _Current(rules, QuotationCalculator(self.tax_rate, rules))
+
+    @property
+    def rules(self) -> PricingRules:
+        return self._current.rules
+
+    @property
+    def version(self) -> str:
+        return self._current.rules.version
+
+    def calculator(self) -> QuotationCalculator:
+        """Calculadora de las reglas vigentes (tomarla una vez por cálculo)"""
+        return self._current.calculator
+
+    def swap(self, rules: PricingRules) -> PricingRules:
+        """
+        Publicar reglas nuevas
+
+        Args:
+            rules: Snapshot validado
+
+        Returns:
+            Snapshot anterior
+        """
+        current = self._build(rules)
+        previous, self._current = self._current, current
+        return previous.rules
+
+    def reload(self) -> bool:
+        """
+        Consultar la fuente y publicar las reglas si cambió la versión
+
+        Returns:
+            True si se publicaron reglas nuevas
+
+        Raises:
+            ValueError: Si la fuente tiene reglas inválidas (las vigentes no
+                cambian), en cada llamada hasta que la fuente cambie
+        """
+        if self.source is None:
+            raise ValueError("El registro no tiene una fuente de reglas")
+        with self._reload_lock:
+            rules = self.source()
+            if rules is None:
+                if self._rejection is not None:
+                    raise ValueError(self._rejection)
+                return False
+            self._rejection = None
+            if rules == self._current.rules:
+                return False
+            if rules.version == self._current.rules.version:
+                # La versión identifica las reglas con que se cotizó
+                self._rejection = f"La versión {rules.version} cambió sin incrementarse"
+                raise ValueError(self._rejection)
+            self.swap(rules)
+            return True
+
+    # ------------------------------------------------------------------------
+    # Recarga en segundo plano
+    # ------------------------------------------------------------------------
+
+    def start_watching(self, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """
+        Recargar periódicamente en un hilo daemon
+
+        Los errores de la fuente (archivo inválido, base caída) se guardan en
+        last_error y se sigue cotizando con las reglas vigentes.
+
+        Args:
+            interval: Segundos entre consultas a la fuente
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                    self.last_error = None
+                except Exception as exc:  # noqa: BLE001 - el watcher no debe morir
+                    self.last_error = exc
+
+        self._watcher = threading.Thread(target=watch, name="pricing-rules-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Versiones de reglas de negocio")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("export", help="Imprimir las reglas por defecto (JSON)")
+
+    validate = subparsers.add_parser("validate", help="Validar un archivo de reglas")
+    validate.add_argument("path")
+
+    publish = subparsers.add_parser("publish", help="Guardar un archivo de reglas en la base")
+    publish.add_argument("path")
+    publish.add_argument("--notes")
+    publish.add_argument("--inactive", action="store_true", help="Guardar sin activar")
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        print(json.dumps(rules_to_dict(DEFAULT_PRICING_RULES), indent=2, ensure_ascii=False))
+        return 0
+
+    try:
+        rules = load_rules_file(args.path)
+    except ValueError as exc:
+        print(f"Reglas inválidas: {exc}")
+        return 1
+    if args.command == "validate":
+        print(f"Reglas {rules.version} válidas")
+        return 0
+
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session, session.begin():
+        publish_rules(session, rules, args.notes, activate=not args.inactive)
+    print(f"Reglas {rules.version} publicadas{'' if args.inactive else ' y activadas'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
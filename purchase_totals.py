@@ -0,0 +1,358 @@
+"""
+Customer Purchase Totals
+Agregado por cliente de compras confirmadas, mantenido incrementalmente en la
+misma transacción que cambia el estado de la cotización
+"""
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, create_engine, func, inspect, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .models import CustomerPurchaseTotals, Quotation, QuotationStatus
+from .tracking import has_changes, listen_once, previous_value
+
+
+TOTALS_TABLE = CustomerPurchaseTotals.__table__
+QUOTATIONS_TABLE = Quotation.__table__
+
+TRACKED_ATTRIBUTES = ("status", "total", "customer_id", "confirmed_at")
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class _PurchaseDelta:
+    """Variación acumulada de un cliente dentro de un flush"""
+    total: Decimal = Decimal("0.00")
+    count: int = 0
+    last_purchase_at: Optional[datetime] = None
+    recompute_last_purchase: bool = False
+
+
+@dataclass
+class PurchaseTotalsMismatch:
+    """Diferencia entre el agregado almacenado y el recalculado"""
+    customer_id: object
+    expected_total: Decimal
+    stored_total: Decimal
+    expected_count: int
+    stored_count: int
+    expected_last_purchase_at: Optional[datetime]
+    stored_last_purchase_at: Optional[datetime]
+
+
+# ============================================================================
+# INCREMENTAL MAINTENANCE
+# ============================================================================
+
+def _is_confirmed(status) -> bool:
+    return status == QuotationStatus.CONFIRMED
+
+
+def _collect_deltas(session: Session) -> Dict[object, _PurchaseDelta]:
+    """
+    Calcular las variaciones por cliente a partir de las cotizaciones del flush
+
+    Args:
+        session: Sesión en proceso de flush
+
+    Returns:
+        Diccionario customer_id -> variación
+    """
+    deltas: Dict[object, _PurchaseDelta] = {}
+
+    def add(customer_id, quotation: Quotation) -> None:
+        delta = deltas.setdefault(customer_id, _PurchaseDelta())
+        delta.total += quotation.total or Decimal("0.00")
+        delta.count += 1
+        confirmed_at = quotation.confirmed_at
+        if confirmed_at is not None and (
+            delta.last_purchase_at is None or confirmed_at > delta.last_purchase_at
+        ):
+            delta.last_purchase_at = confirmed_at
+
+    def remove(customer_id, total: Optional[Decimal]) -> None:
+        delta = deltas.setdefault(customer_id, _PurchaseDelta())
+        delta.total -= total or Decimal("0.00")
+        delta.count -= 1
+        delta.recompute_last_purchase = True
+
+    for obj in session.new:
+        if isinstance(obj, Quotation) and _is_confirmed(obj.status):
+            add(obj.customer_id, obj)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Quotation):
+            continue
+        state = inspect(obj)
+        if not has_changes(state, TRACKED_ATTRIBUTES):
+            continue
+        if _is_confirmed(previous_value(state, "status")):
+            remove(previous_value(state, "customer_id"), previous_value(state, "total"))
+        if _is_confirmed(obj.status):
+            add(obj.customer_id, obj)
+
+    for obj in session.deleted:
+        if not isinstance(obj, Quotation):
+            continue
+        state = inspect(obj)
+        if _is_confirmed(previous_value(state, "status")):
+            remove(previous_value(state, "customer_id"), previous_value(state, "total"))
+
+    return deltas
+
+
+def _last_purchase_subquery(customer_id):
+    return (
+        select(func.max(QUOTATIONS_TABLE.c.confirmed_at))
+        .where(QUOTATIONS_TABLE.c.customer_id == customer_id)
+        .where(QUOTATIONS_TABLE.c.status == QuotationStatus.CONFIRMED)
+        .scalar_subquery()
+    )
+
+
+def _apply_deltas(session: Session, flush_context) -> None:
+    """
+    Aplicar las variaciones al agregado dentro de la transacción del flush
+
+    Se ejecuta en after_flush: los cambios de la cotización ya están escritos
+    en la transacción, así que los recálculos puntuales ven el estado nuevo.
+    """
+    deltas = _collect_deltas(session)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    missing: Dict[object, _PurchaseDelta] = {}
+
+    for customer_id, delta in deltas.items():
+        if delta.count == 0 and delta.total == 0 and not delta.recompute_last_purchase \
+                and delta.last_purchase_at is None:
+            continue
+
+        values = {
+            "lifetime_total": TOTALS_TABLE.c.lifetime_total + delta.total,
+            "purchases_count": TOTALS_TABLE.c.purchases_count + delta.count,
+            "updated_at": func.now(),
+        }
+        if delta.recompute_last_purchase:
+            values["last_purchase_at"] = _last_purchase_subquery(customer_id)
+        elif delta.last_purchase_at is not None:
+            last_purchase_at = TOTALS_TABLE.c.last_purchase_at
+            values["last_purchase_at"] = case(
+                (or_(last_purchase_at.is_(None), last_purchase_at < delta.last_purchase_at),
+                 delta.last_purchase_at),
+                else_=last_purchase_at,
+            )
+
+        result = connection.execute(
+            TOTALS_TABLE.update()
+            .where(TOTALS_TABLE.c.customer_id == customer_id)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            missing[customer_id] = delta
+
+    # Clientes sin fila todavía: se construye desde las cotizaciones ya escritas
+    if not missing:
+        return
+    if connection.dialect.name != "postgresql":
+        _rebuild(connection, list(missing))
+        return
+    # Dos primeras compras concurrentes del mismo cliente: la segunda espera
+    # el INSERT de la primera y, ya confirmada, le suma solo su variación
+    # (el agregado de la primera no incluye la cotización de la segunda)
+    for customer_id, delta in missing.items():
+        stmt = pg_insert(TOTALS_TABLE).from_select(
+            ["customer_id", "lifetime_total", "purchases_count", "last_purchase_at"],
+            _aggregate_select([customer_id]),
+        )
+        last_purchase_at = (
+            _last_purchase_subquery(customer_id) if delta.recompute_last_purchase
+            else func.greatest(TOTALS_TABLE.c.last_purchase_at, stmt.excluded.last_purchase_at)
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["customer_id"],
+            set_={
+                "lifetime_total": TOTALS_TABLE.c.lifetime_total + delta.total,
+                "purchases_count": TOTALS_TABLE.c.purchases_count + delta.count,
+                "last_purchase_at": last_purchase_at,
+                "updated_at": func.now(),
+            },
+        ))
+
+
+def register_purchase_totals_tracking(session_target=Session) -> None:
+    """
+    Registrar el mantenimiento incremental sobre una Session o sessionmaker
+
+    Args:
+        session_target: Clase Session, sessionmaker o instancia a instrumentar
+    """
+    listen_once(session_target, "after_flush", _apply_deltas)
+
+
+# ============================================================================
+# REBUILD & CONSISTENCY CHECK
+# ============================================================================
+
+def _aggregate_select(customer_ids: Optional[Iterable] = None):
+    stmt = (
+        select(
+            QUOTATIONS_TABLE.c.customer_id,
+            func.coalesce(func.sum(QUOTATIONS_TABLE.c.total), Decimal("0.00")),
+            func.count(),
+            func.max(QUOTATIONS_TABLE.c.confirmed_at),
+        )
+        .where(QUOTATIONS_TABLE.c.status == QuotationStatus.CONFIRMED)
+        .group_by(QUOTATIONS_TABLE.c.customer_id)
+    )
+    if customer_ids is not None:
+        stmt = stmt.where(QUOTATIONS_TABLE.c.customer_id.in_(list(customer_ids)))
+    return stmt
+
+
+def _rebuild(connection, customer_ids: Optional[Iterable] = None) -> int:
+    delete = TOTALS_TABLE.delete()
+    if customer_ids is not None:
+        customer_ids = list(customer_ids)
+        delete = delete.where(TOTALS_TABLE.c.customer_id.in_(customer_ids))
+    connection.execute(delete)
+
+    insert = TOTALS_TABLE.insert().from_select(
+        ["customer_id", "lifetime_total", "purchases_count", "last_purchase_at"],
+        _aggregate_select(customer_ids),
+    )
+    return connection.execute(insert).rowcount
+
+
+def rebuild_purchase_totals(
+    session: Session,
+    customer_ids: Optional[Iterable] = None
+) -> int:
+    """
+    Reconstruir (backfill) el agregado con un INSERT ... SELECT
+
+    Args:
+        session: Sesión de base de datos (el commit queda a cargo del llamador)
+        customer_ids: Clientes a reconstruir (None para todos)
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    return _rebuild(session.connection(), customer_ids)
+
+
+def check_purchase_totals(
+    session: Session,
+    customer_ids: Optional[Iterable] = None
+) -> List[PurchaseTotalsMismatch]:
+    """
+    Comparar el agregado almacenado contra el recalculado desde quotations
+
+    Args:
+        session: Sesión de base de datos
+        customer_ids: Clientes a verificar (None para todos)
+
+    Returns:
+        Lista de diferencias (vacía si el agregado es consistente)
+    """
+    if customer_ids is not None:
+        customer_ids = list(customer_ids)
+
+    expected = {
+        row[0]: (Decimal(row[1]), row[2], row[3])
+        for row in session.execute(_aggregate_select(customer_ids))
+    }
+
+    stored_stmt = select(
+        TOTALS_TABLE.c.customer_id,
+        TOTALS_TABLE.c.lifetime_total,
+        TOTALS_TABLE.c.purchases_count,
+        TOTALS_TABLE.c.last_purchase_at,
+    )
+    if customer_ids is not None:
+        stored_stmt = stored_stmt.where(TOTALS_TABLE.c.customer_id.in_(customer_ids))
+    stored = {row[0]: (Decimal(row[1]), row[2], row[3]) for row in session.execute(stored_stmt)}
+
+    empty = (Decimal("0.00"), 0, None)
+    mismatches: List[PurchaseTotalsMismatch] = []
+    for customer_id in expected.keys() | stored.keys():
+        exp = expected.get(customer_id, empty)
+        got = stored.get(customer_id, empty)
+        if exp != got:
+            mismatches.append(PurchaseTotalsMismatch(
+                customer_id=customer_id,
+                expected_total=exp[0],
+                stored_total=got[0],
+                expected_count=exp[1],
+                stored_count=got[1],
+                expected_last_purchase_at=exp[2],
+                stored_last_purchase_at=got[2],
+            ))
+    return mismatches
+
+
+# ============================================================================
+# LOOKUP
+# ============================================================================
+
+def get_customer_total_purchases(session: Session, customer_id) -> Decimal:
+    """
+    Total histórico de compras para PricingStrategy.apply_loyalty_discount
+
+    Args:
+        session: Sesión de base de datos
+        customer_id: ID del cliente
+
+    Returns:
+        Total de cotizaciones confirmadas (lectura por clave primaria)
+    """
+    totals = session.get(CustomerPurchaseTotals, customer_id)
+    if totals is None:
+        return Decimal("0.00")
+    return totals.lifetime_total
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mantenimiento de customer_purchase_totals")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        if args.command == "rebuild":
+            with session.begin():
+                rows = rebuild_purchase_totals(session)
+            print(f"customer_purchase_totals reconstruida: {rows} clientes")
+            return 0
+
+        mismatches = check_purchase_totals(session)
+        for mismatch in mismatches:
+            print(
+                f"{mismatch.customer_id}: total {mismatch.stored_total} != {mismatch.expected_total}, "
+                f"count {mismatch.stored_count} != {mismatch.expected_count}, "
+                f"last {mismatch.stored_last_purchase_at} != {mismatch.expected_last_purchase_at}"
+            )
+        print(f"{len(mismatches)} clientes inconsistentes")
+        return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,233 @@
+"""
+Quotation Clone
+Duplicación de una cotización completa (propiedad, ambientes, aberturas,
+items y vehículo) en el servidor con INSERT ... SELECT, remapeando los
+UUID a través de una tabla temporal
+"""
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Column, MetaData, Table, func, literal, null, select, union_all
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from .models import Opening, Property, Quotation, QuotationItem, QuotationStatus, Room, Vehicle
+from .rollups import RollupDelta, apply_rollup_deltas, area_from_details, rollup_day
+
+
+QUOTATIONS_TABLE = Quotation.__table__
+PROPERTIES_TABLE = Property.__table__
+ROOMS_TABLE = Room.__table__
+OPENINGS_TABLE = Opening.__table__
+ITEMS_TABLE = QuotationItem.__table__
+VEHICLES_TABLE = Vehicle.__table__
+
+# Columnas que toman el valor por defecto del servidor en la copia
+SERVER_DEFAULT_COLUMNS = ("created_at", "updated_at")
+
+# Tabla temporal old_id -> new_id; se vacía al confirmar (PostgreSQL) y al
+# empezar cada clonación
+ID_MAP_TABLE = Table(
+    "clone_id_map",
+    MetaData(),
+    Column("old_id", PG_UUID(as_uuid=True), primary_key=True),
+    Column("new_id", PG_UUID(as_uuid=True), nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class CloneResult:
+    """Cotización creada por la clonación"""
+    quotation_id: UUID
+    quotation_number: str
+    rows_copied: Dict[str, int]
+    statements: int
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def generate_quotation_number(now: Optional[datetime] = None) -> str:
+    """Número de cotización único (ej: "COT-20240315-8F3A2C")"""
+    now = now or datetime.now(timezone.utc)
+    return f"COT-{now:%Y%m%d}-{secrets.token_hex(3).upper()}"
+
+
+def new_uuid_expression(dialect_name: str):
+    """Expresión SQL que genera un UUID por fila"""
+    if dialect_name == "postgresql":
+        return func.gen_random_uuid()
+    # SQLite guarda los UUID como 32 caracteres hexadecimales
+    return func.lower(func.hex(func.randomblob(16)))
+
+
+def _copy_columns(table: Table, overrides: Dict) -> Tuple[List[str], List]:
+    """Columnas destino y expresiones origen para copiar una tabla"""
+    names, expressions = [], []
+    for column in table.c:
+        if column.name in SERVER_DEFAULT_COLUMNS or column.computed is not None:
+            continue
+        names.append(column.name)
+        expressions.append(overrides.get(column.name, column))
+    return names, expressions
+
+
+def _id_map_statement(dialect_name: str, source_id: UUID):
+    """INSERT de old_id -> new_id para todas las filas hijas de la cotización"""
+    p, r, o = PROPERTIES_TABLE, ROOMS_TABLE, OPENINGS_TABLE
+    old_ids = union_all(
+        select(p.c.id).where(p.c.quotation_id == source_id),
+        select(r.c.id).join(p, p.c.id == r.c.property_id).where(p.c.quotation_id == source_id),
+        select(o.c.id)
+        .join(r, r.c.id == o.c.room_id)
+        .join(p, p.c.id == r.c.property_id)
+        .where(p.c.quotation_id == source_id),
+        select(ITEMS_TABLE.c.id).where(ITEMS_TABLE.c.quotation_id == source_id),
+        select(VEHICLES_TABLE.c.id).where(VEHICLES_TABLE.c.quotation_id == source_id),
+    ).subquery("old_ids")
+    return ID_MAP_TABLE.insert().from_select(
+        ["old_id", "new_id"],
+        select(old_ids.c.id, new_uuid_expression(dialect_name)),
+    )
+
+
+def _copy_children_statement(table: Table, parent_column: str, parent_map, source_filter, extra_overrides=None):
+    """
+    INSERT ... SELECT de una tabla hija con su id y su clave padre remapeados
+
+    Args:
+        table: Tabla a copiar
+        parent_column: Columna FK al padre
+        parent_map: Expresión del nuevo id del padre
+        source_filter: Función (select) -> select que restringe a la cotización origen
+        extra_overrides: Columnas adicionales a reemplazar
+    """
+    own_map = ID_MAP_TABLE.alias(f"{table.name}_map")
+    overrides = {"id": own_map.c.new_id, parent_column: parent_map, **(extra_overrides or {})}
+    names, expressions = _copy_columns(table, overrides)
+    stmt = select(*expressions).select_from(table).join(own_map, own_map.c.old_id == table.c.id)
+    return table.insert().from_select(names, source_filter(stmt))
+
+
+# ============================================================================
+# CLONE
+# ============================================================================
+
+def clone_quotation(
+    session: Session,
+    source_id: UUID,
+    quotation_number: Optional[str] = None,
+    customer_id: Optional[UUID] = None
+) -> CloneResult:
+    """
+    Duplicar una cotización con una cantidad fija de sentencias
+
+    La copia queda en DRAFT, sin vencimiento ni confirmación. El VIN del
+    vehículo no se copia (es único).
+
+    Args:
+        session: Sesión de base de datos (el commit queda a cargo del llamador)
+        source_id: ID de la cotización a duplicar
+        quotation_number: Número de la copia (None para generarlo)
+        customer_id: Cliente de la copia (None para el mismo)
+
+    Returns:
+        ID y número de la cotización creada, filas copiadas por tabla
+    """
+    connection = session.connection()
+    dialect_name = connection.dialect.name
+    new_id = uuid4()
+    quotation_number = quotation_number or generate_quotation_number()
+    statements = 0
+    rows: Dict[str, int] = {}
+
+    # Cabecera
+    q = QUOTATIONS_TABLE
+    names, expressions = _copy_columns(q, {
+        "id": literal(new_id, q.c.id.type),
+        "quotation_number": literal(quotation_number),
+        "customer_id": literal(customer_id, q.c.customer_id.type) if customer_id else q.c.customer_id,
+        "status": literal(QuotationStatus.DRAFT, q.c.status.type),
+        "expires_at": null(),
+        "confirmed_at": null(),
+    })
+    header = connection.execute(
+        q.insert()
+        .from_select(names, select(*expressions).where(q.c.id == source_id))
+        .returning(q.c.created_at, q.c.vertical, q.c.subtotal, q.c.discount_amount,
+                   q.c.tax_amount, q.c.total, q.c.calculation_details)
+    ).one_or_none()
+    statements += 1
+    if header is None:
+        raise ValueError(f"No existe la cotización {source_id}")
+    rows["quotations"] = 1
+
+    # Mapa de ids
+    ID_MAP_TABLE.create(connection, checkfirst=True)
+    connection.execute(ID_MAP_TABLE.delete())
+    connection.execute(_id_map_statement(dialect_name, source_id))
+    statements += 3
+
+    p, r, o = PROPERTIES_TABLE, ROOMS_TABLE, OPENINGS_TABLE
+    parent_map = ID_MAP_TABLE.alias("parent_map")
+    new_parent = parent_map.c.new_id
+
+    copies = [
+        ("properties", _copy_children_statement(
+            p, "quotation_id", literal(new_id, p.c.quotation_id.type),
+            lambda stmt: stmt.where(p.c.quotation_id == source_id),
+        )),
+        ("rooms", _copy_children_statement(
+            r, "property_id", new_parent,
+            lambda stmt: stmt.join(parent_map, parent_map.c.old_id == r.c.property_id)
+            .join(p, p.c.id == r.c.property_id)
+            .where(p.c.quotation_id == source_id),
+        )),
+        ("openings", _copy_children_statement(
+            o, "room_id", new_parent,
+            lambda stmt: stmt.join(parent_map, parent_map.c.old_id == o.c.room_id)
+            .join(r, r.c.id == o.c.room_id)
+            .join(p, p.c.id == r.c.property_id)
+            .where(p.c.quotation_id == source_id),
+        )),
+        ("quotation_items", _copy_children_statement(
+            ITEMS_TABLE, "quotation_id", literal(new_id, ITEMS_TABLE.c.quotation_id.type),
+            lambda stmt: stmt.outerjoin(parent_map, parent_map.c.old_id == ITEMS_TABLE.c.opening_id)
+            .where(ITEMS_TABLE.c.quotation_id == source_id),
+            {"opening_id": new_parent},
+        )),
+        ("vehicles", _copy_children_statement(
+            VEHICLES_TABLE, "quotation_id", literal(new_id, VEHICLES_TABLE.c.quotation_id.type),
+            lambda stmt: stmt.where(VEHICLES_TABLE.c.quotation_id == source_id),
+            {"vin": null()},
+        )),
+    ]
+    for name, stmt in copies:
+        rows[name] = connection.execute(stmt).rowcount
+        statements += 1
+
+    # Rollups del panel: el INSERT no pasa por los listeners del ORM
+    delta = RollupDelta()
+    delta.add(
+        1, 1, header.subtotal, header.discount_amount, header.tax_amount, header.total,
+        area_from_details(header.calculation_details),
+    )
+    apply_rollup_deltas(connection, {(rollup_day(header.created_at), header.vertical, QuotationStatus.DRAFT): delta})
+    statements += 1
+
+    return CloneResult(
+        quotation_id=new_id,
+        quotation_number=quotation_number,
+        rows_copied=rows,
+        statements=statements,
+    )
@@ -0,0 +1,223 @@
+"""
+Quotation Persistence
+Guardado de un cálculo sobre una cotización existente por diferencias:
+solo se insertan, actualizan o eliminan los items que cambiaron
+"""
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from .models import Quotation, QuotationItem
+from .calculator import CalculationItem, QuotationCalculationResult
+
+
+DELETE_BATCH_SIZE = 500
+
+# Columnas de QuotationItem derivadas del cálculo
+ITEM_COLUMNS = (
+    "quantity",
+    "unit",
+    "unit_price",
+    "installation_cost",
+    "subtotal",
+    "dimensions",
+    "specifications",
+    "description",
+)
+
+ITEMS_TABLE = QuotationItem.__table__
+
+ItemKey = Tuple[UUID, UUID]
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class ItemChanges:
+    """Diferencias entre los items guardados y los calculados"""
+    inserts: List[Dict] = field(default_factory=list)
+    updates: List[Dict] = field(default_factory=list)
+    deletes: List[UUID] = field(default_factory=list)
+    unchanged: int = 0
+    statements: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.inserts or self.updates or self.deletes)
+
+
+# ============================================================================
+# MAPPING
+# ============================================================================
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+
+def item_key(item: CalculationItem) -> ItemKey:
+    return UUID(str(item.opening_id)), UUID(str(item.product_id))
+
+
+def item_values(item: CalculationItem) -> Dict:
+    """Valores de las columnas de QuotationItem para un item calculado"""
+    return {
+        "quantity": item.final_area,
+        "unit": item.unit,
+        "unit_price": _money(item.material_cost_per_sqm),
+        "installation_cost": _money(item.installation_cost_per_sqm),
+        "subtotal": item.item_subtotal,
+        "dimensions": {
+            "width": float(item.base_width),
+            "height": float(item.base_height),
+            "area": float(item.base_area),
+            "waste_area": float(item.waste_area),
+            "quantity": item.quantity,
+        },
+        "specifications": {
+            **(item.specifications or {}),
+            "complexity_factor": float(item.complexity_factor),
+            "waste_percentage": float(item.waste_percentage),
+        },
+        "description": f"{item.opening_name} | {item.product_name}",
+    }
+
+
+def header_values(result: QuotationCalculationResult) -> Dict:
+    """Valores del encabezado de Quotation para un resultado"""
+    return {
+        "subtotal": result.subtotal_before_discount,
+        "discount_amount": result.volume_discount_amount,
+        "tax_amount": result.tax_amount,
+        "total": result.total,
+        # Copia: el ORM detecta el cambio por reasignación, no por mutación
+        "calculation_details": dict(result.calculation_details),
+    }
+
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+def diff_items(
+    quotation_id: UUID,
+    stored: List[Dict],
+    items: List[CalculationItem]
+) -> ItemChanges:
+    """
+    Comparar items guardados con los calculados por (opening_id, product_id)
+
+    Las claves repetidas se emparejan en orden.
+
+    Args:
+        quotation_id: ID de la cotización
+        stored: Filas guardadas (id, opening_id, product_id y ITEM_COLUMNS)
+        items: Items calculados
+
+    Returns:
+        Inserciones, actualizaciones y eliminaciones necesarias
+    """
+    stored_by_key: Dict[ItemKey, List[Dict]] = {}
+    for row in stored:
+        stored_by_key.setdefault((row["opening_id"], row["product_id"]), []).append(row)
+
+    changes = ItemChanges()
+    for item in items:
+        key = item_key(item)
+        values = item_values(item)
+        candidates = stored_by_key.get(key)
+        if candidates:
+            row = candidates.pop(0)
+            if any(row[name] != values[name] for name in ITEM_COLUMNS):
+                changes.updates.append({"b_id": row["id"], **{f"b_{name}": values[name] for name in ITEM_COLUMNS}})
+            else:
+                changes.unchanged += 1
+        else:
+            changes.inserts.append({
+                "id": uuid4(),
+                "quotation_id": quotation_id,
+                "opening_id": key[0],
+                "product_id": key[1],
+                **values,
+            })
+
+    for rows in stored_by_key.values():
+        changes.deletes.extend(row["id"] for row in rows)
+    return changes
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+def apply_item_changes(session: Session, changes: ItemChanges) -> None:
+    """Ejecutar las diferencias con un INSERT, un UPDATE y DELETEs por lotes"""
+    c = ITEMS_TABLE.c
+    if changes.inserts:
+        session.execute(ITEMS_TABLE.insert(), changes.inserts)
+        changes.statements += 1
+    if changes.updates:
+        update = (
+            ITEMS_TABLE.update()
+            .where(c.id == bindparam("b_id"))
+            .values({name: bindparam(f"b_{name}") for name in ITEM_COLUMNS})
+        )
+        session.execute(update, changes.updates)
+        changes.statements += 1
+    for start in range(0, len(changes.deletes), DELETE_BATCH_SIZE):
+        batch = changes.deletes[start:start + DELETE_BATCH_SIZE]
+        session.execute(ITEMS_TABLE.delete().where(c.id.in_(batch)))
+        changes.statements += 1
+
+
+def save_calculation(
+    session: Session,
+    quotation: Quotation,
+    result: QuotationCalculationResult,
+    stored: Optional[List[Dict]] = None
+) -> ItemChanges:
+    """
+    Guardar un cálculo en una cotización existente por diferencias
+
+    A diferencia de reasignar Quotation.items (que con delete-orphan borra y
+    vuelve a insertar todos los items), solo toca las filas que cambiaron.
+    El encabezado se actualiza por el ORM para que los listeners de
+    rollups y totales de compras vean los nuevos importes.
+
+    Args:
+        session: Sesión de base de datos (el commit queda a cargo del llamador)
+        quotation: Cotización a actualizar
+        result: Resultado de calculate_quotation
+        stored: Items guardados si ya se leyeron (None para consultarlos)
+
+    Returns:
+        Cambios aplicados
+    """
+    statements = 0
+    if stored is None:
+        c = ITEMS_TABLE.c
+        stored = [
+            dict(row) for row in session.execute(
+                select(c.id, c.opening_id, c.product_id, *(c[name] for name in ITEM_COLUMNS))
+                .where(c.quotation_id == quotation.id)
+                .where(c.opening_id.is_not(None))
+                .order_by(c.created_at, c.id)
+            ).mappings()
+        ]
+        statements += 1
+
+    changes = diff_items(quotation.id, stored, result.items)
+    changes.statements += statements
+    apply_item_changes(session, changes)
+
+    for name, value in header_values(result).items():
+        setattr(quotation, name, value)
+    if changes.has_changes:
+        # La colección en memoria ya no refleja la tabla
+        session.expire(quotation, ["items"])
+    return changes
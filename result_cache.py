@@ -0,0 +1,399 @@
+"""
+Quotation Result Cache
+Caché en disco de resultados de cotización, compartida entre procesos y
+direccionada por un hash canónico de las entradas del cálculo
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .calculator import (
+    CalculationItem,
+    OpeningData,
+    PRICING_RULES_VERSION,
+    ProductData,
+    QuotationCalculationResult,
+    QuotationCalculator,
+    generate_quotation_summary,
+)
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+
+# Al superar el tope se libera hasta este porcentaje para no desalojar en cada put
+EVICTION_TARGET_RATIO = 0.9
+
+# Productos por sentencia al invalidar (límite de parámetros de SQLite)
+INVALIDATION_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    rules_version TEXT NOT NULL,
+    result BLOB NOT NULL,
+    summary BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_rules ON entries (rules_version);
+
+CREATE TABLE IF NOT EXISTS entry_products (
+    key TEXT NOT NULL REFERENCES entries (key) ON DELETE CASCADE,
+    product_id TEXT NOT NULL,
+    PRIMARY KEY (product_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_bytes', 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'total_bytes';
+END;
+"""
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class CachedQuotation:
+    """Entrada de la caché"""
+    result: QuotationCalculationResult
+    summary: Dict
+
+
+@dataclass
+class CacheStats:
+    """Estadísticas de la caché"""
+    entries: int
+    total_bytes: int
+    max_bytes: int
+
+
+# ============================================================================
+# SERIALIZATION
+# ============================================================================
+
+def _encode_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _canonical_json(value) -> bytes:
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_encode_default
+    ).encode("utf-8")
+
+
+def _dataclass_to_dict(obj) -> Dict:
+    # Evita dataclasses.asdict: no hace falta copiar en profundidad specifications
+    return {f.name: getattr(obj, f.name) for f in fields(obj)}
+
+
+def _dataclass_from_dict(cls, data: Dict):
+    values = {}
+    for f in fields(cls):
+        value = data[f.name]
+        if f.type is Decimal and value is not None:
+            value = Decimal(value)
+        values[f.name] = value
+    return cls(**values)
+
+
+def serialize_result(result: QuotationCalculationResult) -> bytes:
+    """Serializar un resultado a JSON con Decimals exactos"""
+    data = _dataclass_to_dict(result)
+    data["items"] = [_dataclass_to_dict(item) for item in result.items]
+    return _canonical_json(data)
+
+
+def deserialize_result(payload: bytes) -> QuotationCalculationResult:
+    """Reconstruir un resultado serializado con serialize_result"""
+    data = json.loads(payload)
+    data["items"] = [_dataclass_from_dict(CalculationItem, item) for item in data["items"]]
+    return _dataclass_from_dict(QuotationCalculationResult, data)
+
+
+# ============================================================================
+# CACHE KEY
+# ============================================================================
+
+def make_cache_key(
+    openings: List[OpeningData],
+    products: List[ProductData],
+    tax_rate: Decimal,
+    rules_version: str = PRICING_RULES_VERSION
+) -> str:
+    """
+    Calcular la clave canónica de una cotización
+
+    Args:
+        openings: Lista de aberturas (el orden es significativo)
+        products: Lista de productos, incluyendo sus precios
+        tax_rate: Tasa de impuesto efectiva
+        rules_version: Versión de las reglas de negocio
+
+    Returns:
+        Hash SHA-256 en hexadecimal
+    """
+    payload = {
+        "rules_version": rules_version,
+        "tax_rate": str(tax_rate),
+        "openings": [_dataclass_to_dict(opening) for opening in openings],
+        "products": [_dataclass_to_dict(product) for product in products],
+    }
+    return hashlib.sha256(_canonical_json(payload)).hexdigest()
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class QuotationResultCache:
+    """Caché de resultados respaldada por un archivo SQLite compartido"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        rules_version: str = PRICING_RULES_VERSION,
+        timeout: float = 5.0
+    ):
+        """
+        Inicializar caché
+
+        Args:
+            path: Ruta del archivo de la caché (compartido entre procesos)
+            max_bytes: Tamaño máximo de los resultados almacenados
+            rules_version: Versión de reglas con la que se generan las claves
+            timeout: Segundos de espera ante bloqueos de otros procesos
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rules_version = rules_version
+        self.timeout = timeout
+        # Una conexión por hilo y proceso: sqlite3 no permite usar una conexión
+        # desde otro hilo y no se comparten conexiones a través de fork (el
+        # hilo que hace fork conserva su threading.local en el hijo)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "connection", None) is None or local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.executescript(_SCHEMA)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def close(self) -> None:
+        """Cerrar la conexión del hilo actual (las de otros hilos se cierran al terminar esos hilos)"""
+        local = self._local
+        if getattr(local, "connection", None) is not None and local.pid == os.getpid():
+            local.connection.close()
+        local.connection = None
+        local.pid = None
+
+    def make_key(
+        self,
+        openings: List[OpeningData],
+        products: List[ProductData],
+        tax_rate: Decimal
+    ) -> str:
+        return make_cache_key(openings, products, tax_rate, self.rules_version)
+
+    def get(self, key: str) -> Optional[CachedQuotation]:
+        """
+        Obtener una entrada
+
+        Args:
+            key: Clave generada con make_key
+
+        Returns:
+            Entrada cacheada o None si no existe o es de otra versión de reglas
+        """
+        row = self.connection.execute(
+            "SELECT result, summary FROM entries WHERE key = ? AND rules_version = ?",
+            (key, self.rules_version),
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.connection.execute(
+            "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        return CachedQuotation(result=deserialize_result(row[0]), summary=json.loads(row[1]))
+
+    def put(
+        self,
+        key: str,
+        result: QuotationCalculationResult,
+        summary: Dict,
+        product_ids: Iterable[str] = ()
+    ) -> None:
+        """
+        Guardar una entrada y desalojar las menos usadas si se supera el tope
+
+        Args:
+            key: Clave generada con make_key
+            result: Resultado del cálculo
+            summary: Salida de generate_quotation_summary
+            product_ids: Productos usados, para invalidación por precio
+        """
+        result_blob = serialize_result(result)
+        summary_blob = _canonical_json(summary)
+        size = len(result_blob) + len(summary_blob)
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT INTO entries (key, rules_version, result, summary, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self.rules_version, result_blob, summary_blob, size, now, now),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO entry_products (key, product_id) VALUES (?, ?)",
+                [(key, str(product_id)) for product_id in set(product_ids)],
+            )
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total_bytes = connection.execute(
+            "SELECT value FROM meta WHERE name = 'total_bytes'"
+        ).fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        freed = 0
+        victims: List[Tuple[str]] = []
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def get_or_calculate(
+        self,
+        calculator: QuotationCalculator,
+        openings: List[OpeningData],
+        products: List[ProductData],
+        custom_tax_rate: Optional[Decimal] = None
+    ) -> CachedQuotation:
+        """
+        Obtener de la caché o calcular y guardar
+
+        Args:
+            calculator: Calculadora a usar en caso de fallo de caché
+            openings: Lista de aberturas
+            products: Lista de productos
+            custom_tax_rate: Tasa de impuesto personalizada
+
+        Returns:
+            Resultado y resumen de la cotización
+        """
+        # Tras una recarga de reglas (RulesRegistry) se sigue la versión de la
+        # calculadora; las entradas viejas quedan para invalidate_rules o el LRU
+        self.rules_version = calculator.rules.version
+        tax_rate = custom_tax_rate or calculator.tax_rate
+        key = self.make_key(openings, products, tax_rate)
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = calculator.calculate_quotation(openings, products, custom_tax_rate)
+        summary = generate_quotation_summary(result)
+        self.put(key, result, summary, (product.product_id for product in products))
+        return CachedQuotation(result=result, summary=summary)
+
+    # ------------------------------------------------------------------
+    # Invalidación
+    # ------------------------------------------------------------------
+
+    def invalidate_products(self, product_ids: Iterable[str]) -> int:
+        """
+        Invalidar las entradas que usan productos cuyo precio cambió
+
+        Returns:
+            Cantidad de entradas eliminadas
+        """
+        ids = [str(product_id) for product_id in product_ids]
+        removed = 0
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for start in range(0, len(ids), INVALIDATION_BATCH_SIZE):
+                batch = ids[start:start + INVALIDATION_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                cursor = connection.execute(
+                    "DELETE FROM entries WHERE key IN"
+                    f" (SELECT key FROM entry_products WHERE product_id IN ({placeholders}))",
+                    batch,
+                )
+                removed += cursor.rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return removed
+
+    def invalidate_rules(self, rules_version: Optional[str] = None) -> int:
+        """
+        Invalidar las entradas generadas con otras reglas de negocio
+
+        Args:
+            rules_version: Versión vigente (None para usar la de la caché)
+
+        Returns:
+            Cantidad de entradas eliminadas
+        """
+        if rules_version is not None:
+            self.rules_version = rules_version
+        cursor = self.connection.execute(
+            "DELETE FROM entries WHERE rules_version != ?", (self.rules_version,)
+        )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self.connection.execute("DELETE FROM entries")
+
+    def stats(self) -> CacheStats:
+        entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total_bytes = self.connection.execute(
+            "SELECT value FROM meta WHERE name = 'total_bytes'"
+        ).fetchone()[0]
+        return CacheStats(entries=entries, total_bytes=total_bytes, max_bytes=self.max_bytes)
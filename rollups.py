@@ -0,0 +1,328 @@
+"""
+Dashboard Rollups
+Totales diarios de cotizaciones por (vertical, estado) para el panel del
+encargado, mantenidos incrementalmente en cada flush
+"""
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Numeric, cast, create_engine, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .models import Quotation, QuotationDailyRollup, QuotationStatus, VerticalType
+from .tracking import has_changes, listen_once, previous_value
+
+
+ROLLUPS_TABLE = QuotationDailyRollup.__table__
+QUOTATIONS_TABLE = Quotation.__table__
+
+SUM_COLUMNS = (
+    "quotations_count",
+    "subtotal_sum",
+    "discount_sum",
+    "tax_sum",
+    "total_sum",
+    "total_area_sqm",
+)
+
+TRACKED_ATTRIBUTES = (
+    "status",
+    "vertical",
+    "subtotal",
+    "discount_amount",
+    "tax_amount",
+    "total",
+    "calculation_details",
+)
+
+RollupKey = Tuple[date, VerticalType, QuotationStatus]
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class RollupDelta:
+    """Variación de una fila de rollup"""
+    quotations_count: int = 0
+    subtotal_sum: Decimal = Decimal("0.00")
+    discount_sum: Decimal = Decimal("0.00")
+    tax_sum: Decimal = Decimal("0.00")
+    total_sum: Decimal = Decimal("0.00")
+    total_area_sqm: Decimal = Decimal("0.00")
+
+    def add(self, sign: int, count: int, subtotal, discount, tax, total, area) -> None:
+        self.quotations_count += sign * count
+        self.subtotal_sum += sign * Decimal(subtotal or 0)
+        self.discount_sum += sign * Decimal(discount or 0)
+        self.tax_sum += sign * Decimal(tax or 0)
+        self.total_sum += sign * Decimal(total or 0)
+        self.total_area_sqm += sign * Decimal(area or 0)
+
+    def is_empty(self) -> bool:
+        return all(not getattr(self, name) for name in SUM_COLUMNS)
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def rollup_day(created_at: Optional[datetime]) -> date:
+    """
+    Día (UTC) al que se imputa una cotización
+
+    Las cotizaciones nuevas ya traen created_at de la base al llegar al
+    after_flush (eager_defaults en Quotation), igual que las que lee
+    rebuild_rollups; sin él (filas de otro mapeo) se usa el día UTC actual.
+    """
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def area_from_details(calculation_details: Optional[Dict]) -> Decimal:
+    """Área total (m²) registrada en calculation_details"""
+    if not calculation_details:
+        return Decimal("0.00")
+    return Decimal(str(calculation_details.get("total_area_sqm") or 0))
+
+
+def day_expression(dialect_name: str, column):
+    """Expresión SQL del día UTC de un timestamp (equivalente a rollup_day)"""
+    if dialect_name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def area_expression(column):
+    """Expresión SQL del área total registrada en calculation_details"""
+    return func.coalesce(cast(column["total_area_sqm"].as_string(), Numeric(16, 2)), 0)
+
+
+def apply_rollup_deltas(connection, deltas: Dict[RollupKey, RollupDelta]) -> None:
+    """
+    Sumar variaciones a las filas de rollup (creándolas si no existen)
+
+    En PostgreSQL es un único INSERT ... ON CONFLICT DO UPDATE con todas las
+    filas, ordenadas por clave para evitar deadlocks entre transacciones.
+
+    Args:
+        connection: Conexión de la transacción en curso
+        deltas: Variaciones por (día, vertical, estado)
+    """
+    rows = [
+        {
+            "day": key[0],
+            "vertical": key[1],
+            "status": key[2],
+            **{name: getattr(delta, name) for name in SUM_COLUMNS},
+        }
+        for key, delta in sorted(deltas.items(), key=lambda entry: (entry[0][0], entry[0][1].value, entry[0][2].value))
+        if not delta.is_empty()
+    ]
+    if not rows:
+        return
+
+    if connection.dialect.name == "postgresql":
+        stmt = pg_insert(ROLLUPS_TABLE).values(rows)
+        set_ = {name: ROLLUPS_TABLE.c[name] + stmt.excluded[name] for name in SUM_COLUMNS}
+        set_["updated_at"] = func.now()
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "vertical", "status"], set_=set_
+        ))
+        return
+
+    for row in rows:
+        result = connection.execute(
+            ROLLUPS_TABLE.update()
+            .where(ROLLUPS_TABLE.c.day == row["day"])
+            .where(ROLLUPS_TABLE.c.vertical == row["vertical"])
+            .where(ROLLUPS_TABLE.c.status == row["status"])
+            .values({name: ROLLUPS_TABLE.c[name] + row[name] for name in SUM_COLUMNS})
+        )
+        if result.rowcount == 0:
+            connection.execute(ROLLUPS_TABLE.insert().values(row))
+
+
+# ============================================================================
+# INCREMENTAL MAINTENANCE
+# ============================================================================
+
+def _collect_deltas(session: Session) -> Dict[RollupKey, RollupDelta]:
+    deltas: Dict[RollupKey, RollupDelta] = {}
+
+    def contribute(sign: int, day: date, vertical, status, subtotal, discount, tax, total, details) -> None:
+        key = (day, VerticalType(vertical), QuotationStatus(status or QuotationStatus.DRAFT))
+        deltas.setdefault(key, RollupDelta()).add(
+            sign, 1, subtotal, discount, tax, total, area_from_details(details)
+        )
+
+    def contribute_current(sign: int, quotation: Quotation, day: date) -> None:
+        contribute(
+            sign, day, quotation.vertical, quotation.status,
+            quotation.subtotal, quotation.discount_amount, quotation.tax_amount,
+            quotation.total, quotation.calculation_details,
+        )
+
+    def contribute_previous(sign: int, quotation: Quotation, day: date) -> None:
+        state = inspect(quotation)
+        contribute(
+            sign, day,
+            previous_value(state, "vertical"), previous_value(state, "status"),
+            previous_value(state, "subtotal"), previous_value(state, "discount_amount"),
+            previous_value(state, "tax_amount"), previous_value(state, "total"),
+            previous_value(state, "calculation_details"),
+        )
+
+    for obj in session.new:
+        if isinstance(obj, Quotation):
+            # created_at ya vino con RETURNING (eager_defaults): sin consulta extra
+            contribute_current(1, obj, rollup_day(inspect(obj).dict.get("created_at")))
+
+    for obj in session.dirty:
+        if isinstance(obj, Quotation) and has_changes(inspect(obj), TRACKED_ATTRIBUTES):
+            day = rollup_day(obj.created_at)
+            contribute_previous(-1, obj, day)
+            contribute_current(1, obj, day)
+
+    for obj in session.deleted:
+        if isinstance(obj, Quotation):
+            contribute_previous(-1, obj, rollup_day(obj.created_at))
+
+    return deltas
+
+
+def _apply_flush_deltas(session: Session, flush_context) -> None:
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+
+def register_rollup_tracking(session_target=Session) -> None:
+    """
+    Registrar el mantenimiento incremental sobre una Session o sessionmaker
+
+    Args:
+        session_target: Clase Session, sessionmaker o instancia a instrumentar
+    """
+    listen_once(session_target, "after_flush", _apply_flush_deltas)
+
+
+# ============================================================================
+# REBUILD
+# ============================================================================
+
+def rebuild_rollups(
+    session: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None
+) -> int:
+    """
+    Reconstruir (backfill) los rollups de un rango de días con INSERT ... SELECT
+
+    Args:
+        session: Sesión de base de datos (el commit queda a cargo del llamador)
+        start_day: Primer día inclusive (None para sin límite)
+        end_day: Último día inclusive (None para sin límite)
+
+    Returns:
+        Cantidad de filas de rollup escritas
+    """
+    connection = session.connection()
+    q = QUOTATIONS_TABLE
+    day = day_expression(connection.dialect.name, q.c.created_at)
+
+    delete = ROLLUPS_TABLE.delete()
+    aggregate = select(
+        day,
+        q.c.vertical,
+        q.c.status,
+        func.count(),
+        func.coalesce(func.sum(q.c.subtotal), 0),
+        func.coalesce(func.sum(q.c.discount_amount), 0),
+        func.coalesce(func.sum(q.c.tax_amount), 0),
+        func.coalesce(func.sum(q.c.total), 0),
+        func.coalesce(func.sum(area_expression(q.c.calculation_details)), 0),
+    ).group_by(day, q.c.vertical, q.c.status)
+
+    if start_day is not None:
+        delete = delete.where(ROLLUPS_TABLE.c.day >= start_day)
+        aggregate = aggregate.where(day >= start_day)
+    if end_day is not None:
+        delete = delete.where(ROLLUPS_TABLE.c.day <= end_day)
+        aggregate = aggregate.where(day <= end_day)
+
+    connection.execute(delete)
+    return connection.execute(
+        ROLLUPS_TABLE.insert().from_select(["day", "vertical", "status", *SUM_COLUMNS], aggregate)
+    ).rowcount
+
+
+# ============================================================================
+# DASHBOARD QUERIES
+# ============================================================================
+
+def get_dashboard_rollups(
+    session: Session,
+    start_day: date,
+    end_day: date,
+    vertical: Optional[VerticalType] = None,
+    status: Optional[QuotationStatus] = None
+) -> List[QuotationDailyRollup]:
+    """
+    Leer los rollups de un rango de días (lectura por clave primaria)
+
+    Args:
+        session: Sesión de base de datos
+        start_day: Primer día inclusive
+        end_day: Último día inclusive
+        vertical: Filtrar por vertical
+        status: Filtrar por estado
+
+    Returns:
+        Filas ordenadas por día, vertical y estado
+    """
+    stmt = (
+        select(QuotationDailyRollup)
+        .where(QuotationDailyRollup.day >= start_day)
+        .where(QuotationDailyRollup.day <= end_day)
+        .order_by(QuotationDailyRollup.day, QuotationDailyRollup.vertical, QuotationDailyRollup.status)
+    )
+    if vertical is not None:
+        stmt = stmt.where(QuotationDailyRollup.vertical == vertical)
+    if status is not None:
+        stmt = stmt.where(QuotationDailyRollup.status == status)
+    return list(session.scalars(stmt))
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstrucción de quotation_daily_rollups")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--start", type=date.fromisoformat, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Último día (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session, session.begin():
+        rows = rebuild_rollups(session, args.start, args.end)
+    print(f"quotation_daily_rollups reconstruida: {rows} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
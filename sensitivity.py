@@ -0,0 +1,293 @@
+"""
+Sensitivity
+Reporte de sensibilidad de una cotización calculada: distancia a cada
+escalón de descuento por volumen y área de equilibrio, costo marginal de
+cada factor de complejidad y participación de cada item, sin recalcular la
+cotización
+"""
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Sequence
+
+from .calculator import (
+    OpeningData,
+    PricingRules,
+    ProductData,
+    QuotationCalculationResult,
+    QuotationCalculator,
+)
+
+
+CENT = Decimal("0.01")
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class TierSensitivity:
+    """Escalón de descuento por volumen aún no alcanzado"""
+    threshold: Decimal  # m²
+    discount_percentage: Decimal
+    missing_area: Decimal  # m² que faltan
+    # Total si se agrega missing_area al costo promedio por m² de la cotización
+    total_at_threshold: Decimal
+    total_change: Decimal
+    # m² que se pueden agregar en ese escalón sin superar el total actual
+    break_even_area: Decimal
+    pays_off: bool  # llegar al escalón cuesta menos que el total actual
+
+
+@dataclass
+class DriverSensitivity:
+    """Efecto de quitar un factor de complejidad de todos los items"""
+    driver: str
+    items_affected: int
+    area_change: Decimal  # el desperdicio también depende de algunos factores
+    subtotal_change: Decimal
+    total_without: Decimal
+    total_change: Decimal  # negativo = ahorro
+    discount_changes: bool
+
+
+@dataclass
+class ItemShare:
+    """Participación de un item en la cotización"""
+    opening_id: str
+    product_id: str
+    name: str
+    area: Decimal
+    subtotal: Decimal
+    share: Decimal  # fracción del subtotal antes de descuento
+    installation_share: Decimal  # fracción del item que es instalación
+    total_contribution: Decimal  # aporte al total con descuento e impuestos
+
+
+@dataclass
+class SensitivityReport:
+    """Reporte de sensibilidad"""
+    total: Decimal
+    total_final_area: Decimal
+    discount_percentage: Decimal
+    average_cost_per_sqm: Decimal  # subtotal antes de descuento / área final
+    # m² que se pueden quitar sin bajar de escalón (None sin descuento)
+    area_above_current_tier: Optional[Decimal]
+    tiers: List[TierSensitivity]
+    drivers: List[DriverSensitivity]
+    items: List[ItemShare]
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def _round(value: Decimal) -> Decimal:
+    return value.quantize(CENT, ROUND_HALF_UP)
+
+
+def complexity_drivers(rules: PricingRules) -> Dict[str, object]:
+    """
+    Especificaciones que encarecen un item según las reglas y valor que las "quita"
+
+    Incluye los factores de complejidad, los ajustes de desperdicio (ej:
+    irregular_shape) y, si hay recargo por altura, el piso.
+
+    Args:
+        rules: Reglas de la calculadora usada
+
+    Returns:
+        Dict especificación -> valor neutro
+    """
+    drivers: Dict[str, object] = {}
+    for key, _ in rules.complexity_factors + rules.waste_adjustments:
+        drivers.setdefault(key, False)
+    if rules.height_factors:
+        # El recargo aplica con piso > min_floor: el menor umbral no recarga
+        drivers["floor"] = min(min_floor for min_floor, _ in rules.height_factors)
+    return drivers
+
+
+def _total(calculator: QuotationCalculator, subtotal: Decimal, area: Decimal, tax_rate: Decimal) -> Decimal:
+    """Total con la misma aritmética que calculate_quotation"""
+    discount_pct, _ = calculator.calculate_volume_discount(area)
+    after_discount = subtotal - subtotal * discount_pct
+    return _round(after_discount + after_discount * tax_rate)
+
+
+def _tiers(
+    calculator: QuotationCalculator,
+    result: QuotationCalculationResult,
+    average_cost: Decimal
+) -> List[TierSensitivity]:
+    subtotal, area, tax_rate = result.subtotal_before_discount, result.total_final_area, result.tax_rate
+    current_factor = 1 - result.volume_discount_percentage
+    tiers = []
+    for threshold, discount_pct in sorted(calculator.rules.volume_discounts):
+        if threshold <= area:
+            continue
+        missing = threshold - area
+        total_at = _total(calculator, subtotal + missing * average_cost, threshold, tax_rate)
+        # (S + x * costo_promedio) * (1 - d_nuevo) = S * (1 - d_actual)
+        if average_cost > 0:
+            break_even = subtotal * (current_factor / (1 - discount_pct) - 1) / average_cost
+        else:
+            break_even = Decimal("0")
+        tiers.append(TierSensitivity(
+            threshold=threshold,
+            discount_percentage=discount_pct,
+            missing_area=missing,
+            total_at_threshold=total_at,
+            total_change=total_at - result.total,
+            break_even_area=_round(break_even),
+            pays_off=total_at <= result.total,
+        ))
+    return tiers
+
+
+def _drivers(
+    calculator: QuotationCalculator,
+    result: QuotationCalculationResult,
+    openings: Sequence[OpeningData],
+    products: Sequence[ProductData]
+) -> List[DriverSensitivity]:
+    drivers = []
+    for driver, neutral in complexity_drivers(calculator.rules).items():
+        affected, area_change, subtotal_change = 0, Decimal("0"), Decimal("0")
+        for item, opening, product in zip(result.items, openings, products):
+            specifications = opening.specifications or {}
+            if specifications.get(driver, neutral) == neutral:
+                continue
+            without = {**specifications, driver: neutral}
+            complexity = calculator.calculate_complexity_factor(without)
+            waste_pct = calculator.calculate_waste_percentage(opening.opening_type, product.product_type, without)
+            if complexity == item.complexity_factor and waste_pct == item.waste_percentage:
+                continue  # ej: piso 2, no aplica recargo por altura
+            affected += 1
+            final_area = _round(item.base_area + item.base_area * waste_pct)
+            material = _round(final_area * product.price_per_sqm)
+            installation = _round(final_area * product.installation_per_sqm * complexity)
+            area_change += final_area - item.final_area
+            subtotal_change += material + installation - item.material_subtotal - item.installation_subtotal
+        if not affected:
+            continue
+        area = result.total_final_area + area_change
+        total_without = _total(calculator, result.subtotal_before_discount + subtotal_change, area, result.tax_rate)
+        drivers.append(DriverSensitivity(
+            driver=driver,
+            items_affected=affected,
+            area_change=area_change,
+            subtotal_change=subtotal_change,
+            total_without=total_without,
+            total_change=total_without - result.total,
+            discount_changes=calculator.calculate_volume_discount(area)[0] != result.volume_discount_percentage,
+        ))
+    drivers.sort(key=lambda driver: driver.total_change)
+    return drivers
+
+
+def sensitivity_report(
+    result: QuotationCalculationResult,
+    openings: Sequence[OpeningData],
+    products: Sequence[ProductData],
+    calculator: Optional[QuotationCalculator] = None
+) -> SensitivityReport:
+    """
+    Reporte de sensibilidad a partir de un cálculo ya hecho
+
+    Los escalones se evalúan agregando área al costo promedio por m² de la
+    cotización; los factores de complejidad se evalúan item por item con
+    el mismo redondeo que calculate_item, sin recalcular la cotización.
+
+    Args:
+        result: Resultado de calculate_quotation
+        openings: Aberturas usadas en el cálculo (mismo orden)
+        products: Productos usados en el cálculo (mismo orden)
+        calculator: Calculadora usada (None para una por defecto); sus
+            reglas deben ser las del cálculo (calculation_details["rules_version"])
+
+    Returns:
+        Escalones, factores de complejidad e items
+    """
+    if not (len(result.items) == len(openings) == len(products)):
+        raise ValueError("Debe haber una abertura y un producto por cada item")
+    calculator = calculator or QuotationCalculator(result.tax_rate)
+    rules_version = result.calculation_details.get("rules_version")
+    if rules_version is not None and rules_version != calculator.rules.version:
+        # Tras una recarga de reglas: factores y escalones serían los de otras reglas
+        raise ValueError(
+            f"El cálculo usó las reglas {rules_version} y la calculadora tiene {calculator.rules.version}"
+        )
+
+    subtotal, area = result.subtotal_before_discount, result.total_final_area
+    average_cost = subtotal / area if area > 0 else Decimal("0")
+    net_factor = (1 - result.volume_discount_percentage) * (1 + result.tax_rate)
+
+    area_above: Optional[Decimal] = None
+    for threshold, discount_pct in calculator.rules.volume_discounts:
+        if discount_pct == result.volume_discount_percentage:
+            area_above = area - threshold
+            break
+
+    items = [
+        ItemShare(
+            opening_id=item.opening_id,
+            product_id=item.product_id,
+            name=f"{item.opening_name} | {item.product_name}",
+            area=item.final_area,
+            subtotal=item.item_subtotal,
+            share=(item.item_subtotal / subtotal).quantize(Decimal("0.0001"), ROUND_HALF_UP) if subtotal else Decimal("0"),
+            installation_share=(
+                (item.installation_subtotal / item.item_subtotal).quantize(Decimal("0.0001"), ROUND_HALF_UP)
+                if item.item_subtotal else Decimal("0")
+            ),
+            total_contribution=_round(item.item_subtotal * net_factor),
+        )
+        for item in result.items
+    ]
+    items.sort(key=lambda item: item.subtotal, reverse=True)
+
+    return SensitivityReport(
+        total=result.total,
+        total_final_area=area,
+        discount_percentage=result.volume_discount_percentage,
+        average_cost_per_sqm=_round(average_cost),
+        area_above_current_tier=area_above,
+        tiers=_tiers(calculator, result, average_cost),
+        drivers=_drivers(calculator, result, openings, products),
+        items=items,
+    )
+
+
+def sensitivity_summary(report: SensitivityReport) -> Dict:
+    """Resumen serializable para el vendedor"""
+    return {
+        "total": float(report.total),
+        "total_area": float(report.total_final_area),
+        "discount_percentage": float(report.discount_percentage * 100),
+        "area_above_current_tier": float(report.area_above_current_tier) if report.area_above_current_tier is not None else None,
+        "next_tiers": [
+            {
+                "threshold": float(tier.threshold),
+                "discount_percentage": float(tier.discount_percentage * 100),
+                "missing_area": float(tier.missing_area),
+                "total_change": float(tier.total_change),
+                "break_even_area": float(tier.break_even_area),
+                "pays_off": tier.pays_off,
+            }
+            for tier in report.tiers
+        ],
+        "complexity": [
+            {
+                "driver": driver.driver,
+                "items": driver.items_affected,
+                "savings": float(-driver.total_change),
+                "discount_changes": driver.discount_changes,
+            }
+            for driver in report.drivers
+        ],
+        "top_items": [
+            {"name": item.name, "share": float(item.share), "total": float(item.total_contribution)}
+            for item in report.items[:10]
+        ],
+    }
@@ -0,0 +1,259 @@
+"""
+Quotation Serialization
+Codificador JSON directo a bytes para resultados y resúmenes de cotización,
+con Decimals exactos, textos formateados y emisión incremental de items
+"""
+import json
+from decimal import Decimal
+from typing import BinaryIO, Callable, Dict, Iterator, List
+
+from .calculator import (
+    CalculationItem,
+    QuotationCalculationResult,
+    format_currency,
+)
+
+
+# Items por bloque al emitir incrementalmente
+DEFAULT_ITEMS_PER_CHUNK = 512
+
+CURRENCY_SYMBOLS = {
+    "USD": "$",
+    "ARS": "$",
+    "EUR": "€",
+    "GBP": "£",
+}
+
+_ITEM_DECIMAL_FIELDS = (
+    "base_width",
+    "base_height",
+    "base_area",
+    "waste_percentage",
+    "waste_area",
+    "final_area",
+    "material_cost_per_sqm",
+    "installation_cost_per_sqm",
+    "complexity_factor",
+    "material_subtotal",
+    "installation_subtotal",
+    "item_subtotal",
+)
+
+_ITEM_MONEY_FIELDS = (
+    "material_subtotal",
+    "installation_subtotal",
+    "item_subtotal",
+)
+
+_RESULT_DECIMAL_FIELDS = (
+    "total_base_area",
+    "total_waste_area",
+    "total_final_area",
+    "material_subtotal",
+    "installation_subtotal",
+    "subtotal_before_discount",
+    "volume_discount_percentage",
+    "volume_discount_amount",
+    "subtotal_after_discount",
+    "tax_rate",
+    "tax_amount",
+    "total",
+)
+
+_dump_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+# ============================================================================
+# FORMATTING
+# ============================================================================
+
+def format_money(amount: Decimal, currency: str = "USD") -> str:
+    """
+    Formatear monto como moneda (mismo resultado que format_currency)
+
+    Los montos ya redondeados a 2 decimales se formatean sobre su
+    representación textual, sin pasar por el formateo de Decimal.
+
+    Args:
+        amount: Monto a formatear
+        currency: Código de moneda (USD, ARS, etc.)
+
+    Returns:
+        String formateado (ej: "$1,234.56")
+    """
+    text = str(amount)
+    sign = ""
+    if text[0] == "-":
+        sign = "-"
+        text = text[1:]
+
+    integer, _, fraction = text.partition(".")
+    if len(fraction) != 2 or not integer.isdigit():
+        return format_currency(amount, currency)
+
+    if len(integer) > 3:
+        integer = f"{int(integer):,}"
+    return f"{CURRENCY_SYMBOLS.get(currency, '$')}{sign}{integer}.{fraction}"
+
+
+def _money(amount: Decimal, currency: str) -> str:
+    return (
+        f'{{"value":{float(amount)!r},"amount":"{amount}",'
+        f'"formatted":{_dump_json(format_money(amount, currency))}}}'
+    )
+
+
+# ============================================================================
+# ENCODERS
+# ============================================================================
+
+def encode_summary(result: QuotationCalculationResult, currency: str = "USD") -> bytes:
+    """
+    Codificar el resumen de cotización directamente a JSON
+
+    Produce la misma estructura que generate_quotation_summary, agregando en
+    cada monto la clave "amount" con el Decimal exacto como string.
+
+    Args:
+        result: Resultado del cálculo
+        currency: Código de moneda para los textos formateados
+
+    Returns:
+        JSON en UTF-8
+    """
+    return _summary_json(result, currency).encode("utf-8")
+
+
+def _summary_json(result: QuotationCalculationResult, currency: str) -> str:
+    discount_pct = result.volume_discount_percentage * 100
+    tax_pct = result.tax_rate * 100
+    discount = _money(result.volume_discount_amount, currency)
+    tax = _money(result.tax_amount, currency)
+    return (
+        f'{{"items_count":{len(result.items)},'
+        f'"total_area":{{"value":{float(result.total_final_area)!r},'
+        f'"amount":"{result.total_final_area}",'
+        f'"formatted":{_dump_json(f"{result.total_final_area:.2f} m²")}}},'
+        f'"pricing":{{'
+        f'"material":{_money(result.material_subtotal, currency)},'
+        f'"installation":{_money(result.installation_subtotal, currency)},'
+        f'"subtotal":{_money(result.subtotal_before_discount, currency)},'
+        f'"discount":{{"percentage":{float(discount_pct)!r},"exact_rate":"{result.volume_discount_percentage}",'
+        f'{discount[1:]},'
+        f'"tax":{{"rate":{float(tax_pct)!r},"exact_rate":"{result.tax_rate}",{tax[1:]},'
+        f'"total":{_money(result.total, currency)}}},'
+        f'"details":{_dump_json(result.calculation_details)}}}'
+    )
+
+
+def _item_encoder(currency: str) -> Callable[[CalculationItem], str]:
+    # Nombres y especificaciones se repiten entre items: se codifican una vez
+    strings: Dict[str, str] = {}
+    specs: Dict[int, str] = {}
+
+    def encode_string(value: str) -> str:
+        encoded = strings.get(value)
+        if encoded is None:
+            encoded = strings[value] = _dump_json(value)
+        return encoded
+
+    def encode(item: CalculationItem) -> str:
+        specifications = item.specifications
+        encoded_specs = specs.get(id(specifications))
+        if encoded_specs is None:
+            encoded_specs = specs[id(specifications)] = _dump_json(specifications)
+
+        parts = [
+            f'{{"opening_id":{encode_string(str(item.opening_id))},'
+            f'"product_id":{encode_string(str(item.product_id))},'
+            f'"opening_name":{encode_string(item.opening_name)},'
+            f'"product_name":{encode_string(item.product_name)},'
+            f'"quantity":{item.quantity},'
+            f'"unit":{encode_string(item.unit)}'
+        ]
+        for name in _ITEM_DECIMAL_FIELDS:
+            parts.append(f',"{name}":"{getattr(item, name)}"')
+        parts.append(',"formatted":{')
+        parts.append(",".join(
+            f'"{name}":{_dump_json(format_money(getattr(item, name), currency))}'
+            for name in _ITEM_MONEY_FIELDS
+        ))
+        parts.append(f'}},"specifications":{encoded_specs}}}')
+        return "".join(parts)
+
+    return encode
+
+
+def iter_encode_result(
+    result: QuotationCalculationResult,
+    currency: str = "USD",
+    items_per_chunk: int = DEFAULT_ITEMS_PER_CHUNK
+) -> Iterator[bytes]:
+    """
+    Codificar un resultado completo emitiendo los items por bloques
+
+    El documento tiene los totales exactos, el resumen y por último el array
+    de items, que se genera incrementalmente para no construirlo en memoria.
+
+    Args:
+        result: Resultado del cálculo
+        currency: Código de moneda para los textos formateados
+        items_per_chunk: Items por bloque emitido
+
+    Yields:
+        Fragmentos JSON en UTF-8
+    """
+    totals = ",".join(f'"{name}":"{getattr(result, name)}"' for name in _RESULT_DECIMAL_FIELDS)
+    yield (
+        f'{{"totals":{{{totals}}},'
+        f'"summary":{_summary_json(result, currency)},'
+        f'"items":['
+    ).encode("utf-8")
+
+    encode_item = _item_encoder(currency)
+    items = result.items
+    for start in range(0, len(items), items_per_chunk):
+        chunk: List[str] = [encode_item(item) for item in items[start:start + items_per_chunk]]
+        prefix = "," if start else ""
+        yield (prefix + ",".join(chunk)).encode("utf-8")
+
+    yield b"]}"
+
+
+def encode_result(result: QuotationCalculationResult, currency: str = "USD") -> bytes:
+    """
+    Codificar un resultado completo a JSON
+
+    Args:
+        result: Resultado del cálculo
+        currency: Código de moneda para los textos formateados
+
+    Returns:
+        JSON en UTF-8
+    """
+    return b"".join(iter_encode_result(result, currency))
+
+
+def write_result(
+    result: QuotationCalculationResult,
+    stream: BinaryIO,
+    currency: str = "USD",
+    items_per_chunk: int = DEFAULT_ITEMS_PER_CHUNK
+) -> int:
+    """
+    Escribir un resultado en un stream binario sin armarlo entero en memoria
+
+    Args:
+        result: Resultado del cálculo
+        stream: Destino (archivo, socket, respuesta HTTP)
+        currency: Código de moneda para los textos formateados
+        items_per_chunk: Items por bloque emitido
+
+    Returns:
+        Bytes escritos
+    """
+    written = 0
+    for chunk in iter_encode_result(result, currency, items_per_chunk):
+        stream.write(chunk)
+        written += len(chunk)
+    return written
@@ -0,0 +1,550 @@
+"""
+Site Routes
+Índice espacial (grilla) sobre Property.location para consultas de cercanía
+y armado de recorridos diarios de visitas de medición e instalaciones:
+agrupamiento por barrido angular desde cada base y orden de visita con
+vecino más cercano + 2-opt. Sin servicios externos
+"""
+import argparse
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from .models import Property, Quotation, QuotationStatus
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+DEFAULT_CELL_KM = 1.0
+
+# Distancia por calle / distancia en línea recta en zona urbana
+ROAD_FACTOR = 1.3
+DEFAULT_SPEED_KMH = 25.0
+
+DEFAULT_SERVICE_MINUTES = {
+    QuotationStatus.DRAFT: 45,      # visita de medición
+    QuotationStatus.PENDING: 45,
+    QuotationStatus.CONFIRMED: 180,  # instalación
+}
+DEFAULT_ROUTE_MINUTES = 8 * 60
+DEFAULT_MAX_STOPS = 25
+
+TWO_OPT_MAX_PASSES = 50
+
+QUOTATIONS_TABLE = Quotation.__table__
+PROPERTIES_TABLE = Property.__table__
+
+T = TypeVar("T")
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class Stop:
+    """Visita a una propiedad"""
+    stop_id: str
+    lat: float
+    lng: float
+    service_minutes: float = 45.0
+    quotation_id: Optional[str] = None
+    address: Optional[str] = None
+
+
+@dataclass
+class Depot:
+    """Base de salida de cuadrillas"""
+    depot_id: str
+    lat: float
+    lng: float
+    crews: int = 1
+
+
+@dataclass
+class Route:
+    """Recorrido de una cuadrilla en un día"""
+    depot_id: str
+    day: int  # índice de día desde el inicio del plan
+    crew: int  # cuadrilla de la base
+    stops: List[Stop]
+    distance_km: float
+    minutes: float
+
+
+@dataclass
+class RoutePlan:
+    """Recorridos por día y visitas sin base alcanzable"""
+    routes: List[Route]
+    unrouted: List[Stop] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    @property
+    def days(self) -> int:
+        return max((route.day + 1 for route in self.routes), default=0)
+
+
+# ============================================================================
+# GEOMETRY
+# ============================================================================
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia de gran círculo en km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class LocalProjection:
+    """
+    Proyección equirectangular alrededor de una latitud de referencia
+
+    A escala de ciudad el error frente a haversine es menor al 0,1% y
+    permite distancias euclídeas en km sin trigonometría por consulta.
+    """
+
+    def __init__(self, reference_lat: float):
+        self.x_scale = KM_PER_DEGREE * math.cos(math.radians(reference_lat))
+
+    def project(self, lat: float, lng: float) -> Tuple[float, float]:
+        return lng * self.x_scale, lat * KM_PER_DEGREE
+
+
+def parse_location(location: Optional[Dict]) -> Optional[Tuple[float, float]]:
+    """(lat, lng) de Property.location, o None si falta o es inválida"""
+    if not location:
+        return None
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or (lat == 0 and lng == 0):
+        return None
+    return lat, lng
+
+
+# ============================================================================
+# GRID INDEX
+# ============================================================================
+
+class GridIndex(Generic[T]):
+    """
+    Índice de puntos en una grilla de celdas cuadradas
+
+    Inserción O(1); las consultas recorren anillos de celdas alrededor del
+    punto. Con densidad urbana razonablemente pareja rinde como un KD-tree
+    y admite altas y bajas sin reconstruir.
+    """
+
+    def __init__(self, projection: LocalProjection, cell_km: float = DEFAULT_CELL_KM):
+        if cell_km <= 0:
+            raise ValueError("cell_km debe ser positivo")
+        self.projection = projection
+        self.cell_km = cell_km
+        self.cells: Dict[Tuple[int, int], List[Tuple[float, float, T]]] = {}
+        self.size = 0
+        self._bounds: Optional[List[int]] = None  # min_cx, min_cy, max_cx, max_cy
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[T],
+        position: Callable[[T], Tuple[float, float]],
+        cell_km: float = DEFAULT_CELL_KM
+    ) -> "GridIndex[T]":
+        """
+        Construir el índice
+
+        Args:
+            items: Objetos a indexar
+            position: Función objeto -> (lat, lng)
+            cell_km: Lado de la celda
+
+        Returns:
+            Índice proyectado sobre la latitud media de los objetos
+        """
+        items = list(items)
+        positions = [position(item) for item in items]
+        reference = sum(lat for lat, _ in positions) / len(positions) if positions else 0.0
+        index = cls(LocalProjection(reference), cell_km)
+        for item, (lat, lng) in zip(items, positions):
+            index.insert(lat, lng, item)
+        return index
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+
+    def insert(self, lat: float, lng: float, item: T) -> None:
+        x, y = self.projection.project(lat, lng)
+        cx, cy = self._cell(x, y)
+        self.cells.setdefault((cx, cy), []).append((x, y, item))
+        self.size += 1
+        if self._bounds is None:
+            self._bounds = [cx, cy, cx, cy]
+        else:
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], cx), min(bounds[1], cy)
+            bounds[2], bounds[3] = max(bounds[2], cx), max(bounds[3], cy)
+
+    def remove(self, lat: float, lng: float, item: T) -> bool:
+        x, y = self.projection.project(lat, lng)
+        bucket = self.cells.get(self._cell(x, y))
+        if not bucket:
+            return False
+        for position, entry in enumerate(bucket):
+            if entry[2] is item or entry[2] == item:
+                bucket[position] = bucket[-1]
+                bucket.pop()
+                self.size -= 1
+                return True
+        return False
+
+    def _ring(self, cx: int, cy: int, radius: int) -> Iterator[Tuple[int, int]]:
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, T]]:
+        """
+        Objetos a radius_km o menos (línea recta)
+
+        Returns:
+            Lista de (distancia_km, objeto) ordenada por distancia
+        """
+        x, y = self.projection.project(lat, lng)
+        min_cx, min_cy = self._cell(x - radius_km, y - radius_km)
+        max_cx, max_cy = self._cell(x + radius_km, y + radius_km)
+        limit = radius_km * radius_km
+        found = []
+        cells = self.cells
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for px, py, item in cells.get((cx, cy), ()):
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 <= limit:
+                        found.append((math.sqrt(d2), item))
+        found.sort(key=lambda entry: entry[0])
+        return found
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        predicate: Optional[Callable[[T], bool]] = None,
+        max_km: Optional[float] = None
+    ) -> List[Tuple[float, T]]:
+        """
+        Los k objetos más cercanos que cumplen predicate
+
+        Se recorren anillos de celdas hasta que el anillo siguiente ya no
+        puede contener nada más cerca que el k-ésimo encontrado.
+
+        Returns:
+            Lista de (distancia_km, objeto) ordenada por distancia
+        """
+        if not self.size or self._bounds is None:
+            return []
+        x, y = self.projection.project(lat, lng)
+        cx, cy = self._cell(x, y)
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        max_radius = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        if max_km is not None:
+            max_radius = min(max_radius, int(max_km / self.cell_km) + 1)
+
+        best: List[Tuple[float, int, T]] = []
+        cells = self.cells
+        for radius in range(max_radius + 1):
+            # Lo más cercano posible en este anillo está a (radius - 1) celdas
+            if len(best) >= k and best[-1][0] <= ((radius - 1) * self.cell_km) ** 2:
+                break
+            for cell in self._ring(cx, cy, radius):
+                for px, py, item in cells.get(cell, ()):
+                    if predicate is not None and not predicate(item):
+                        continue
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if len(best) < k or d2 < best[-1][0]:
+                        best.append((d2, id(item), item))
+                        best.sort(key=lambda entry: entry[0])
+                        del best[k:]
+        result = [(math.sqrt(d2), item) for d2, _, item in best]
+        if max_km is not None:
+            result = [entry for entry in result if entry[0] <= max_km]
+        return result
+
+
+# ============================================================================
+# ROUTING
+# ============================================================================
+
+def _route_length(points: Sequence[Tuple[float, float]], order: Sequence[int]) -> float:
+    """Longitud del circuito base -> order -> base (points[0] es la base)"""
+    total, previous = 0.0, points[0]
+    for index in order:
+        current = points[index]
+        total += math.hypot(current[0] - previous[0], current[1] - previous[1])
+        previous = current
+    return total + math.hypot(points[0][0] - previous[0], points[0][1] - previous[1])
+
+
+def order_stops(points: Sequence[Tuple[float, float]], max_passes: int = TWO_OPT_MAX_PASSES) -> List[int]:
+    """
+    Orden de visita aproximado (TSP): vecino más cercano y mejora 2-opt
+
+    Args:
+        points: Coordenadas proyectadas; points[0] es la base
+        max_passes: Pasadas máximas de 2-opt
+
+    Returns:
+        Índices de points (sin la base) en orden de visita
+    """
+    remaining = set(range(1, len(points)))
+    tour = [0]
+    while remaining:
+        last = points[tour[-1]]
+        closest = min(remaining, key=lambda index: (points[index][0] - last[0]) ** 2 + (points[index][1] - last[1]) ** 2)
+        remaining.remove(closest)
+        tour.append(closest)
+    tour.append(0)
+
+    def distance(a: int, b: int) -> float:
+        return math.hypot(points[a][0] - points[b][0], points[a][1] - points[b][1])
+
+    size = len(tour)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, size - 2):
+            a, b = tour[i - 1], tour[i]
+            d_ab = distance(a, b)
+            for j in range(i + 1, size - 1):
+                c, d = tour[j], tour[j + 1]
+                if distance(a, c) + distance(b, d) < d_ab + distance(c, d) - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    b = tour[i]
+                    d_ab = distance(a, b)
+                    improved = True
+        if not improved:
+            break
+    return tour[1:-1]
+
+
+def _sweep_clusters(
+    depot_xy: Tuple[float, float],
+    stops: List[Tuple[Stop, float, float]],
+    route_minutes: float,
+    max_stops: int,
+    minutes_per_km: float
+) -> List[List[Tuple[Stop, float, float]]]:
+    """
+    Barrido angular: recorrer las visitas por ángulo alrededor de la base y
+    cortar un grupo cuando el tiempo estimado supera la jornada
+    """
+    dx, dy = depot_xy
+    ordered = sorted(stops, key=lambda entry: math.atan2(entry[2] - dy, entry[1] - dx))
+    clusters, current = [], []
+    minutes, last = 0.0, depot_xy
+    for entry in ordered:
+        _, x, y = entry
+        leg = math.hypot(x - last[0], y - last[1]) * minutes_per_km
+        back = math.hypot(x - dx, y - dy) * minutes_per_km
+        if current and (len(current) >= max_stops or minutes + leg + entry[0].service_minutes + back > route_minutes):
+            clusters.append(current)
+            current, minutes, last = [], 0.0, depot_xy
+            leg = math.hypot(x - dx, y - dy) * minutes_per_km
+        current.append(entry)
+        minutes += leg + entry[0].service_minutes
+        last = (x, y)
+    if current:
+        clusters.append(current)
+    return clusters
+
+
+def plan_routes(
+    stops: Sequence[Stop],
+    depots: Sequence[Depot],
+    route_minutes: float = DEFAULT_ROUTE_MINUTES,
+    max_stops: int = DEFAULT_MAX_STOPS,
+    speed_kmh: float = DEFAULT_SPEED_KMH,
+    max_depot_km: Optional[float] = None
+) -> RoutePlan:
+    """
+    Armar recorridos diarios
+
+    Cada visita va a la base más cercana (índice de grilla); en cada base
+    las visitas se agrupan por barrido angular en recorridos de una jornada
+    y cada recorrido se ordena con vecino más cercano + 2-opt. Los
+    recorridos se reparten entre las cuadrillas de la base día por día.
+
+    Args:
+        stops: Visitas a programar
+        depots: Bases con su cantidad de cuadrillas
+        route_minutes: Duración de la jornada (viaje + servicio)
+        max_stops: Visitas máximas por recorrido
+        speed_kmh: Velocidad media en calle
+        max_depot_km: Visitas más lejos de toda base quedan sin programar
+
+    Returns:
+        Recorridos por día y cuadrilla
+    """
+    if not depots:
+        raise ValueError("Se requiere al menos una base")
+
+    start = time.perf_counter()
+    depot_index = GridIndex.build(depots, lambda depot: (depot.lat, depot.lng), cell_km=5.0)
+    projection = depot_index.projection
+    minutes_per_km = ROAD_FACTOR * 60 / speed_kmh
+
+    assigned: Dict[str, List[Tuple[Stop, float, float]]] = {depot.depot_id: [] for depot in depots}
+    unrouted: List[Stop] = []
+    for stop in stops:
+        nearest = depot_index.nearest(stop.lat, stop.lng, max_km=max_depot_km)
+        if not nearest:
+            unrouted.append(stop)
+            continue
+        x, y = projection.project(stop.lat, stop.lng)
+        assigned[nearest[0][1].depot_id].append((stop, x, y))
+
+    routes: List[Route] = []
+    for depot in depots:
+        depot_xy = projection.project(depot.lat, depot.lng)
+        clusters = _sweep_clusters(depot_xy, assigned[depot.depot_id], route_minutes, max_stops, minutes_per_km)
+        crews = max(depot.crews, 1)
+        for number, cluster in enumerate(clusters):
+            points = [depot_xy] + [(x, y) for _, x, y in cluster]
+            order = order_stops(points)
+            distance_km = _route_length(points, order) * ROAD_FACTOR
+            ordered = [cluster[index - 1][0] for index in order]
+            routes.append(Route(
+                depot_id=depot.depot_id,
+                day=number // crews,
+                crew=number % crews,
+                stops=ordered,
+                distance_km=round(distance_km, 2),
+                minutes=round(distance_km * 60 / speed_kmh + sum(stop.service_minutes for stop in ordered), 1),
+            ))
+
+    routes.sort(key=lambda route: (route.day, route.depot_id, route.crew))
+    return RoutePlan(routes=routes, unrouted=unrouted, duration_s=time.perf_counter() - start)
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+def load_pending_stops(
+    session: Session,
+    statuses: Sequence[QuotationStatus] = tuple(DEFAULT_SERVICE_MINUTES)
+) -> Tuple[List[Stop], int]:
+    """
+    Visitas de las cotizaciones pendientes con ubicación
+
+    Borradores y pendientes generan una visita de medición; las
+    confirmadas, una instalación.
+
+    Args:
+        session: Sesión de base de datos
+        statuses: Estados a incluir
+
+    Returns:
+        Tuple (visitas, propiedades sin ubicación válida)
+    """
+    q, p = QUOTATIONS_TABLE.c, PROPERTIES_TABLE.c
+    stmt = (
+        select(p.id, q.id, q.status, p.location, p.address, p.city)
+        .join(QUOTATIONS_TABLE, q.id == p.quotation_id)
+        .where(q.status.in_(list(statuses)))
+    )
+    stops, missing = [], 0
+    for property_id, quotation_id, status, location, address, city in session.execute(stmt):
+        point = parse_location(location)
+        if point is None:
+            missing += 1
+            continue
+        stops.append(Stop(
+            stop_id=str(property_id),
+            lat=point[0],
+            lng=point[1],
+            service_minutes=DEFAULT_SERVICE_MINUTES.get(status, 60),
+            quotation_id=str(quotation_id),
+            address=", ".join(part for part in (address, city) if part) or None,
+        ))
+    return stops, missing
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def load_depots(path: str) -> List[Depot]:
+    """Bases desde JSON: [{"depot_id": ..., "lat": ..., "lng": ..., "crews": 3}]"""
+    with open(path, encoding="utf-8") as source:
+        return [
+            Depot(str(entry["depot_id"]), float(entry["lat"]), float(entry["lng"]), int(entry.get("crews", 1)))
+            for entry in json.load(source)
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recorridos de visitas e instalaciones")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--depots", required=True, help="JSON con las bases")
+    parser.add_argument("--route-minutes", type=float, default=DEFAULT_ROUTE_MINUTES)
+    parser.add_argument("--max-stops", type=int, default=DEFAULT_MAX_STOPS)
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--output", help="Escribir los recorridos en JSON")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("Se requiere --database-url o DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        stops, missing = load_pending_stops(session)
+    plan = plan_routes(stops, load_depots(args.depots), args.route_minutes, args.max_stops)
+
+    print(
+        f"Visitas: {len(stops)} (sin ubicación: {missing}), recorridos: {len(plan.routes)}, "
+        f"días: {plan.days}, km: {sum(route.distance_km for route in plan.routes):.0f}, "
+        f"{plan.duration_s:.2f}s"
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({
+                "start": args.start.isoformat(),
+                "routes": [
+                    {
+                        "day": route.day,
+                        "depot_id": route.depot_id,
+                        "crew": route.crew,
+                        "distance_km": route.distance_km,
+                        "minutes": route.minutes,
+                        "stops": [
+                            {"stop_id": stop.stop_id, "quotation_id": stop.quotation_id,
+                             "lat": stop.lat, "lng": stop.lng, "address": stop.address}
+                            for stop in route.stops
+                        ],
+                    }
+                    for route in plan.routes
+                ],
+                "unrouted": [stop.stop_id for stop in plan.unrouted],
+            }, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
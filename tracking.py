@@ -0,0 +1,36 @@
+"""
+Change Tracking Helpers
+Utilidades compartidas por los agregados mantenidos desde eventos de flush
+"""
+from sqlalchemy import event
+
+
+def previous_value(state, attr_name: str):
+    """
+    Valor del atributo antes de los cambios pendientes del flush
+
+    Requiere active_history=True en columnas que puedan modificarse sin
+    haberse cargado (por ejemplo, después de un commit que expira la instancia).
+
+    Args:
+        state: InstanceState del objeto (sqlalchemy.inspect(obj))
+        attr_name: Nombre del atributo mapeado
+
+    Returns:
+        Valor previo, o el actual si el atributo no cambió
+    """
+    history = state.attrs[attr_name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), attr_name)
+
+
+def has_changes(state, attr_names) -> bool:
+    """Indica si alguno de los atributos tiene cambios pendientes"""
+    return any(state.attrs[name].history.has_changes() for name in attr_names)
+
+
+def listen_once(target, identifier: str, handler) -> None:
+    """Registrar un listener de eventos sin duplicarlo"""
+    if not event.contains(target, identifier, handler):
+        event.listen(target, identifier, handler)
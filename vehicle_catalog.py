@@ -0,0 +1,518 @@
+"""
+Vehicle Glass Catalog
+Catálogo local y versionado de vidrios por marca -> modelo -> año, guardado
+en un archivo binario compacto que se abre con mmap, con un trie de
+prefijos para autocompletar y generación de Vehicle.glass_specifications
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import unicodedata
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .enums import VehicleType
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_SOURCE_PATH = os.path.join(DATA_DIR, "vehicle_glass.json")
+DEFAULT_CATALOG_PATH = os.path.join(DATA_DIR, "vehicle_glass.bin")
+
+MAGIC = b"VGCAT\x00"
+FORMAT_VERSION = 1
+
+# magic, formato, versión del catálogo, (cantidad, offset) de strings, generaciones y vidrios
+HEADER = struct.Struct("<6sH16sIIIIII")
+# make, model (índices de string), año desde, año hasta, tipo, primer vidrio, cantidad de vidrios
+GENERATION = struct.Struct("<IIHHBIB")
+# posición, ancho (mm), alto (mm), flags
+PANE = struct.Struct("<BHHB")
+OFFSET = struct.Struct("<I")
+
+FLAG_CURVED = 1
+FLAG_TINT_ALLOWED = 2
+FLAG_REQUIRED = 4
+
+# Ids de vidrio de las plantillas (lib/vehicleWindows.ts)
+POSITIONS = (
+    "parabrisas",
+    "luneta",
+    "lateral_izq_del",
+    "lateral_der_del",
+    "lateral_izq_tras",
+    "lateral_der_tras",
+    "triangulo_izq",
+    "triangulo_der",
+    "techo",
+)
+
+# Clave de cada vidrio en Vehicle.glass_specifications
+GLASS_SPEC_KEYS = {
+    "parabrisas": ("windshield", None),
+    "luneta": ("rear", None),
+    "techo": ("sunroof", None),
+    "lateral_izq_del": ("side_windows", "front_left"),
+    "lateral_der_del": ("side_windows", "front_right"),
+    "lateral_izq_tras": ("side_windows", "rear_left"),
+    "lateral_der_tras": ("side_windows", "rear_right"),
+    "triangulo_izq": ("side_windows", "quarter_left"),
+    "triangulo_der": ("side_windows", "quarter_right"),
+}
+
+VEHICLE_TYPES = tuple(VehicleType)
+
+DEFAULT_SUGGESTIONS = 10
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass(frozen=True)
+class GlassPane:
+    """Vidrio de un vehículo"""
+    position: str
+    width: Decimal  # metros
+    height: Decimal  # metros
+    curved: bool
+    tint_allowed: bool  # False: no admite láminas de oscurecimiento (ej: parabrisas)
+    required: bool
+
+    @property
+    def area(self) -> Decimal:
+        return (self.width * self.height).quantize(Decimal("0.01"))
+
+
+@dataclass(frozen=True)
+class VehicleGlassEntry:
+    """Generación de un modelo con sus vidrios"""
+    make: str
+    model: str
+    year_from: int
+    year_to: int
+    vehicle_type: VehicleType
+    panes: Tuple[GlassPane, ...]
+
+
+@dataclass(frozen=True)
+class VehicleSuggestion:
+    """Sugerencia de autocompletado (model None para una marca)"""
+    make: str
+    model: Optional[str]
+
+    @property
+    def label(self) -> str:
+        return f"{self.make} {self.model}" if self.model else self.make
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def normalize_key(value: str) -> str:
+    """Clave de búsqueda: minúsculas, sin acentos ni espacios repetidos"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+class PrefixTrie:
+    """Trie de prefijos para autocompletar"""
+
+    __slots__ = ("_root",)
+
+    def __init__(self):
+        self._root: Dict = {}
+
+    def insert(self, key: str, value) -> None:
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault("", []).append(value)
+
+    def complete(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List:
+        """Valores cuyas claves empiezan con prefix, en orden alfabético de clave"""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        results: List = []
+        stack = [node]
+        while stack and len(results) < limit:
+            current = stack.pop()
+            results.extend(current.get("", ())[:limit - len(results)])
+            # Apilar en orden inverso para recorrer en orden alfabético
+            stack.extend(current[char] for char in sorted((c for c in current if c), reverse=True))
+        return results
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def _millimeters(meters: float, scale: float) -> int:
+    return int(round(meters * scale * 1000))
+
+
+def build_catalog(source_path: str = DEFAULT_SOURCE_PATH, output_path: str = DEFAULT_CATALOG_PATH) -> Dict[str, int]:
+    """
+    Compilar el catálogo fuente (JSON) al formato binario
+
+    Las listas de vidrios idénticas se guardan una sola vez.
+
+    Args:
+        source_path: Catálogo fuente
+        output_path: Archivo binario a escribir (reemplazo atómico)
+
+    Returns:
+        Cantidad de generaciones, vidrios y bytes escritos
+    """
+    with open(source_path, encoding="utf-8") as source_file:
+        source = json.load(source_file)
+
+    version = source["version"].encode("utf-8")
+    if len(version) > 16:
+        raise ValueError("La versión del catálogo no puede superar 16 bytes")
+
+    strings: List[str] = []
+    string_index: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    generations: List[Tuple] = []
+    panes: List[Tuple] = []
+    pane_lists: Dict[Tuple, int] = {}
+    for make in source["makes"]:
+        for model in make["models"]:
+            for generation in model["generations"]:
+                template = source["templates"][generation["template"]]
+                scale = generation.get("scale", 1.0)
+                pane_list = tuple(
+                    (
+                        POSITIONS.index(pane["id"]),
+                        _millimeters(pane["width"], scale),
+                        _millimeters(pane["height"], scale),
+                        (FLAG_CURVED if pane["curved"] else 0)
+                        | (FLAG_TINT_ALLOWED if pane["tint_allowed"] else 0)
+                        | (FLAG_REQUIRED if pane["required"] else 0),
+                    )
+                    for pane in template["panes"]
+                    if pane["id"] not in generation.get("without", ())
+                )
+                if pane_list not in pane_lists:
+                    pane_lists[pane_list] = len(panes)
+                    panes.extend(pane_list)
+                year_from, year_to = generation["years"]
+                generations.append((
+                    intern(make["make"]),
+                    intern(model["model"]),
+                    year_from,
+                    year_to,
+                    VEHICLE_TYPES.index(VehicleType(template["vehicle_type"])),
+                    pane_lists[pane_list],
+                    len(pane_list),
+                ))
+
+    # Orden de búsqueda: marca, modelo, año
+    generations.sort(key=lambda g: (normalize_key(strings[g[0]]), normalize_key(strings[g[1]]), g[2]))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets, position = [], 0
+    for value in encoded:
+        string_offsets.append(position)
+        position += len(value)
+    string_offsets.append(position)
+
+    strings_offset = HEADER.size
+    generations_offset = strings_offset + OFFSET.size * len(string_offsets) + position
+    panes_offset = generations_offset + GENERATION.size * len(generations)
+
+    payload = bytearray(HEADER.pack(
+        MAGIC, FORMAT_VERSION, version,
+        len(strings), strings_offset,
+        len(generations), generations_offset,
+        len(panes), panes_offset,
+    ))
+    for offset in string_offsets:
+        payload += OFFSET.pack(offset)
+    for value in encoded:
+        payload += value
+    for generation in generations:
+        payload += GENERATION.pack(*generation)
+    for pane in panes:
+        payload += PANE.pack(*pane)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            output.write(payload)
+        # mkstemp crea el archivo con 0600: el catálogo publicado lo leen otros usuarios
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {"generations": len(generations), "panes": len(panes), "bytes": len(payload)}
+
+
+# ============================================================================
+# CATALOG
+# ============================================================================
+
+class VehicleGlassCatalog:
+    """Catálogo de vidrios abierto con mmap"""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        """
+        Abrir un catálogo compilado con build_catalog
+
+        Solo se indexan en memoria los nombres (dict de modelos y trie); las
+        generaciones y los vidrios se leen del mapeo la primera vez que se
+        consultan.
+
+        Args:
+            path: Archivo binario del catálogo
+        """
+        self.path = path
+        with open(path, "rb") as catalog_file:
+            self._mmap = mmap.mmap(catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic, format_version, version,
+            strings_count, strings_offset,
+            self._generations_count, self._generations_offset,
+            self._panes_count, self._panes_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Archivo de catálogo inválido: {path}")
+        self.version = version.rstrip(b"\x00").decode("utf-8")
+
+        offsets = struct.unpack_from(f"<{strings_count + 1}I", self._mmap, strings_offset)
+        blob_start = strings_offset + OFFSET.size * (strings_count + 1)
+        self._strings = [
+            bytes(self._mmap[blob_start + offsets[index]:blob_start + offsets[index + 1]]).decode("utf-8")
+            for index in range(strings_count)
+        ]
+
+        self._entries: Dict[int, VehicleGlassEntry] = {}
+        self._models: Dict[Tuple[str, str], List[int]] = {}
+        self._makes: Dict[str, str] = {}
+        self._trie = PrefixTrie()
+        for index in range(self._generations_count):
+            make_index, model_index = struct.unpack_from(
+                "<II", self._mmap, self._generations_offset + index * GENERATION.size
+            )
+            make, model = self._strings[make_index], self._strings[model_index]
+            make_key, model_key = normalize_key(make), normalize_key(model)
+            generations = self._models.setdefault((make_key, model_key), [])
+            if not generations:
+                suggestion = VehicleSuggestion(make, model)
+                self._trie.insert(f"{make_key} {model_key}", suggestion)
+                self._trie.insert(model_key, suggestion)
+            if make_key not in self._makes:
+                self._makes[make_key] = make
+                self._trie.insert(make_key, VehicleSuggestion(make, None))
+            generations.append(index)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "VehicleGlassCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _generation(self, index: int) -> Tuple:
+        return GENERATION.unpack_from(self._mmap, self._generations_offset + index * GENERATION.size)
+
+    def _entry(self, index: int) -> VehicleGlassEntry:
+        entry = self._entries.get(index)
+        if entry is not None:
+            return entry
+
+        make_index, model_index, year_from, year_to, type_index, first_pane, pane_count = self._generation(index)
+        panes = []
+        for pane_index in range(first_pane, first_pane + pane_count):
+            position, width, height, flags = PANE.unpack_from(self._mmap, self._panes_offset + pane_index * PANE.size)
+            panes.append(GlassPane(
+                position=POSITIONS[position],
+                width=Decimal(width) / 1000,
+                height=Decimal(height) / 1000,
+                curved=bool(flags & FLAG_CURVED),
+                tint_allowed=bool(flags & FLAG_TINT_ALLOWED),
+                required=bool(flags & FLAG_REQUIRED),
+            ))
+        entry = self._entries[index] = VehicleGlassEntry(
+            make=self._strings[make_index],
+            model=self._strings[model_index],
+            year_from=year_from,
+            year_to=year_to,
+            vehicle_type=VEHICLE_TYPES[type_index],
+            panes=tuple(panes),
+        )
+        return entry
+
+    def makes(self) -> List[str]:
+        return sorted(self._makes.values(), key=normalize_key)
+
+    def models(self, make: str) -> List[str]:
+        make_key = normalize_key(make)
+        return [
+            self._entry(indexes[0]).model
+            for (entry_make, _), indexes in sorted(self._models.items())
+            if entry_make == make_key
+        ]
+
+    def generations(self, make: str, model: str) -> List[VehicleGlassEntry]:
+        indexes = self._models.get((normalize_key(make), normalize_key(model)), ())
+        return [self._entry(index) for index in indexes]
+
+    def lookup(self, make: str, model: str, year: Optional[int] = None) -> Optional[VehicleGlassEntry]:
+        """
+        Buscar los vidrios de un vehículo
+
+        Args:
+            make: Marca (sin distinguir mayúsculas ni acentos)
+            model: Modelo
+            year: Año (None para la generación más reciente)
+
+        Returns:
+            Generación que cubre el año o None si no está en el catálogo
+        """
+        indexes = self._models.get((normalize_key(make), normalize_key(model)))
+        if not indexes:
+            return None
+        if year is None:
+            return self._entry(indexes[-1])
+        for index in indexes:
+            entry = self._entry(index)
+            if entry.year_from <= year <= entry.year_to:
+                return entry
+        return None
+
+    def complete(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List[VehicleSuggestion]:
+        """Autocompletar marcas y modelos ("toy", "hil", "toyota hi")"""
+        key = normalize_key(prefix)
+        if not key:
+            return []
+        results, seen = [], set()
+        for suggestion in self._trie.complete(key, limit * 2):
+            if suggestion not in seen:
+                seen.add(suggestion)
+                results.append(suggestion)
+                if len(results) == limit:
+                    break
+        return results
+
+    def glass_specifications(
+        self,
+        make: str,
+        model: str,
+        year: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Generar Vehicle.glass_specifications desde el catálogo
+
+        Args:
+            make: Marca
+            model: Modelo
+            year: Año (None para la generación más reciente)
+
+        Returns:
+            Dict con windshield, rear, side_windows y sunroof, o None si el
+            vehículo no está en el catálogo
+        """
+        entry = self.lookup(make, model, year)
+        if entry is None:
+            return None
+
+        specifications: Dict = {"side_windows": {}}
+        for pane in entry.panes:
+            values = {
+                "width": float(pane.width),
+                "height": float(pane.height),
+                "curved": pane.curved,
+                "tint_allowed": pane.tint_allowed,
+                "required": pane.required,
+            }
+            key, side = GLASS_SPEC_KEYS[pane.position]
+            if side is None:
+                specifications[key] = values
+            else:
+                specifications["side_windows"][side] = values
+        specifications["catalog"] = {
+            "version": self.version,
+            "vehicle_type": entry.vehicle_type.value,
+            "years": [entry.year_from, entry.year_to],
+        }
+        return specifications
+
+
+@lru_cache(maxsize=1)
+def load_catalog(path: str = DEFAULT_CATALOG_PATH) -> VehicleGlassCatalog:
+    """Catálogo compartido por el proceso (se abre una sola vez)"""
+    return VehicleGlassCatalog(path)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Catálogo de vidrios de vehículos")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Compilar el catálogo fuente")
+    build.add_argument("--source", default=DEFAULT_SOURCE_PATH)
+    build.add_argument("--output", default=DEFAULT_CATALOG_PATH)
+
+    lookup = subparsers.add_parser("lookup", help="Mostrar glass_specifications de un vehículo")
+    lookup.add_argument("make")
+    lookup.add_argument("model")
+    lookup.add_argument("year", type=int, nargs="?")
+    lookup.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+
+    complete = subparsers.add_parser("complete", help="Autocompletar marca/modelo")
+    complete.add_argument("prefix")
+    complete.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        stats = build_catalog(args.source, args.output)
+        print(f"{args.output}: {stats['generations']} generaciones, {stats['panes']} vidrios, {stats['bytes']} bytes")
+        return 0
+
+    with VehicleGlassCatalog(args.catalog) as catalog:
+        if args.command == "lookup":
+            specifications = catalog.glass_specifications(args.make, args.model, args.year)
+            if specifications is None:
+                print("Vehículo no encontrado en el catálogo")
+                return 1
+            print(json.dumps(specifications, ensure_ascii=False, indent=2))
+        else:
+            for suggestion in catalog.complete(args.prefix):
+                print(suggestion.label)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
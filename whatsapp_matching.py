@@ -0,0 +1,342 @@
+"""
+WhatsApp Sender Matching
+Resolución del Customer y la conversación activa de un mensaje entrante,
+con una caché LRU en proceso para responder sin consultar la base
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from .models import Customer, WhatsAppConversation, WhatsAppConversationStatus
+from .phones import normalize_phone
+from .tracking import has_changes, listen_once, previous_value
+
+
+DEFAULT_MAX_ENTRIES = 10000
+
+# Vigencia de una entrada: acota lo que tarda en verse un cambio hecho por
+# otro proceso (sweeper, fusión de clientes) que no invalidó esta caché
+DEFAULT_TTL_S = 60.0
+
+BACKFILL_BATCH_SIZE = 5000
+
+CUSTOMERS_TABLE = Customer.__table__
+CONVERSATIONS_TABLE = WhatsAppConversation.__table__
+
+# Resolvers registrados en este proceso (ver invalidate_senders)
+_RESOLVERS: "weakref.WeakSet[WhatsAppSenderResolver]" = weakref.WeakSet()
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass(frozen=True)
+class SenderMatch:
+    """Cliente y conversación activa de un remitente"""
+    phone_key: str
+    customer_id: Optional[UUID]
+    conversation_id: Optional[UUID]
+
+
+@dataclass
+class ResolverStats:
+    """Estadísticas de la caché"""
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def sender_lookup_statement(phone_key: str):
+    """
+    Una sola consulta con la conversación activa (índice único parcial
+    uq_wa_conv_active_phone_key) y el cliente por teléfono normalizado
+    """
+    conv = CONVERSATIONS_TABLE.c
+    cust = CUSTOMERS_TABLE.c
+    active = (
+        conv.phone_key == phone_key,
+        conv.status == WhatsAppConversationStatus.ACTIVE,
+    )
+    customer_by_phone = (
+        select(cust.id)
+        .where(or_(cust.whatsapp_normalized == phone_key, cust.phone_normalized == phone_key))
+        .order_by(cust.created_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return select(
+        select(conv.id).where(*active).scalar_subquery().label("conversation_id"),
+        select(conv.customer_id).where(*active).scalar_subquery().label("conversation_customer_id"),
+        customer_by_phone.label("customer_id"),
+    )
+
+
+# ============================================================================
+# RESOLVER
+# ============================================================================
+
+class WhatsAppSenderResolver:
+    """Resolución de remitentes con caché LRU wa_id -> (cliente, conversación)"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: Optional[float] = DEFAULT_TTL_S
+    ):
+        """
+        Inicializar resolver
+
+        La caché es por proceso: se invalida desde los flush de este proceso
+        (ver register) y desde las sentencias por conjuntos del sweeper y de
+        la fusión de clientes (invalidate_senders); los cambios de otros
+        procesos se ven al vencer ttl_s o llamando a invalidate().
+
+        Args:
+            session_factory: Fábrica de sesiones para los fallos de caché
+            max_entries: Cantidad máxima de remitentes en caché
+            ttl_s: Vigencia de cada entrada en segundos (None: sin vencimiento)
+        """
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stats = ResolverStats()
+        self._entries: "OrderedDict[str, Tuple[SenderMatch, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_key = f"whatsapp_sender_resolver_{id(self)}"
+        # Generación de invalidaciones: una consulta en curso no guarda su
+        # resultado si su clave se invalidó (o la caché se limpió) mientras
+        # tanto, porque pudo leer el estado previo
+        self._generation = 0
+        self._cleared_at = 0
+        self._loading: Dict[str, int] = {}
+        self._invalidated_at: Dict[str, int] = {}
+
+    def resolve(self, wa_id: str) -> Optional[SenderMatch]:
+        """
+        Resolver el remitente de un webhook
+
+        Args:
+            wa_id: WhatsApp ID (teléfono con código de país)
+
+        Returns:
+            Coincidencia (con campos None si no hay cliente o conversación)
+            o None si el wa_id no es un teléfono válido
+        """
+        phone_key = normalize_phone(wa_id)
+        if phone_key is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(phone_key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(phone_key)
+                self.stats.hits += 1
+                return entry[0]
+            self.stats.misses += 1
+            generation = self._generation
+            self._loading[phone_key] = self._loading.get(phone_key, 0) + 1
+
+        try:
+            with self.session_factory() as session:
+                row = session.execute(sender_lookup_statement(phone_key)).one()
+            match = SenderMatch(
+                phone_key=phone_key,
+                customer_id=row.conversation_customer_id or row.customer_id,
+                conversation_id=row.conversation_id,
+            )
+        finally:
+            with self._lock:
+                invalidated_at = max(self._cleared_at, self._invalidated_at.get(phone_key, 0))
+                self._loading[phone_key] -= 1
+                if not self._loading[phone_key]:
+                    del self._loading[phone_key]
+                    self._invalidated_at.pop(phone_key, None)
+
+        if invalidated_at > generation:
+            return match
+        expires_at = now + self.ttl_s if self.ttl_s is not None else float("inf")
+        with self._lock:
+            self._entries[phone_key] = (match, expires_at)
+            self._entries.move_to_end(phone_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return match
+
+    def invalidate(self, *phone_keys: Optional[str]) -> None:
+        """Invalidar remitentes por teléfono normalizado (E.164)"""
+        with self._lock:
+            self._generation += 1
+            for phone_key in phone_keys:
+                if not phone_key:
+                    continue
+                if phone_key in self._loading:
+                    self._invalidated_at[phone_key] = self._generation
+                if self._entries.pop(phone_key, None) is not None:
+                    self.stats.invalidations += 1
+
+    def invalidate_ids(
+        self,
+        conversation_ids: Iterable[UUID] = (),
+        customer_ids: Iterable[UUID] = ()
+    ) -> None:
+        """Invalidar remitentes que apuntan a esas conversaciones o clientes"""
+        conversation_ids, customer_ids = set(conversation_ids), set(customer_ids)
+        if not conversation_ids and not customer_ids:
+            return
+        with self._lock:
+            self._generation += 1
+            # Las consultas en curso pudieron leer esas filas antes del cambio
+            for phone_key in self._loading:
+                self._invalidated_at[phone_key] = self._generation
+            stale = [
+                phone_key for phone_key, (match, _) in self._entries.items()
+                if match.conversation_id in conversation_ids or match.customer_id in customer_ids
+            ]
+            for phone_key in stale:
+                del self._entries[phone_key]
+            self.stats.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cleared_at = self._generation
+            self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Invalidación desde el ORM
+    # ------------------------------------------------------------------
+
+    def _changed_keys(self, session: Session) -> Set[str]:
+        keys: Set[str] = set()
+
+        for obj in session.new:
+            if isinstance(obj, WhatsAppConversation):
+                keys.add(obj.phone_key)
+            elif isinstance(obj, Customer):
+                keys.update((obj.phone_normalized, obj.whatsapp_normalized))
+
+        for obj in list(session.dirty) + list(session.deleted):
+            if isinstance(obj, WhatsAppConversation):
+                watched, key_attrs = ("status", "phone_key", "customer_id"), ("phone_key",)
+            elif isinstance(obj, Customer):
+                watched = key_attrs = ("phone_normalized", "whatsapp_normalized")
+            else:
+                continue
+            state = inspect(obj)
+            if obj in session.deleted or has_changes(state, watched):
+                for name in key_attrs:
+                    keys.update((previous_value(state, name), getattr(obj, name)))
+
+        keys.discard(None)
+        return keys
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        keys = self._changed_keys(session)
+        if keys:
+            self.invalidate(*keys)
+            # Se repite al confirmar: otro hilo pudo cachear el estado previo
+            session.info.setdefault(self._pending_key, set()).update(keys)
+
+    def _after_commit(self, session: Session) -> None:
+        keys = session.info.pop(self._pending_key, None)
+        if keys:
+            self.invalidate(*keys)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(self._pending_key, None)
+
+    def register(self, session_target=Session) -> None:
+        """
+        Invalidar automáticamente al crear, cerrar o reasignar conversaciones
+        y al cambiar los teléfonos de un cliente
+
+        Args:
+            session_target: Clase Session, sessionmaker o instancia a instrumentar
+        """
+        _RESOLVERS.add(self)
+        listen_once(session_target, "after_flush", self._after_flush)
+        listen_once(session_target, "after_commit", self._after_commit)
+        listen_once(session_target, "after_rollback", self._after_rollback)
+
+
+def invalidate_senders(
+    conversation_ids: Iterable[UUID] = (),
+    customer_ids: Iterable[UUID] = ()
+) -> None:
+    """
+    Invalidar los resolvers registrados en este proceso después de
+    sentencias por conjuntos que no pasan por el flush del ORM (conversaciones
+    abandonadas por el sweeper, clientes fusionados); llamar después del commit
+
+    Args:
+        conversation_ids: Conversaciones cerradas o reasignadas
+        customer_ids: Clientes eliminados o modificados
+    """
+    conversation_ids, customer_ids = set(conversation_ids), set(customer_ids)
+    for resolver in list(_RESOLVERS):
+        resolver.invalidate_ids(conversation_ids, customer_ids)
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+def backfill_conversation_phone_keys(session: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Recalcular phone_key de las conversaciones existentes
+
+    Necesario cuando cambia normalize_phone (como backfill_normalized_phones
+    para clientes); correrlo antes de recibir mensajes con la nueva clave,
+    o el resolver abre una segunda conversación activa para el teléfono.
+
+    Args:
+        session: Sesión de base de datos
+        batch_size: Conversaciones por lote
+
+    Returns:
+        Cantidad de conversaciones actualizadas
+    """
+    c = CONVERSATIONS_TABLE.c
+    update = CONVERSATIONS_TABLE.update().where(c.id == bindparam("b_id")).values(phone_key=bindparam("b_key"))
+
+    updated = 0
+    last_id = None
+    while True:
+        stmt = select(c.id, c.phone_number, c.phone_key).order_by(c.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(c.id > last_id)
+        rows = session.execute(stmt).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            phone_key = normalize_phone(row.phone_number)
+            if phone_key != row.phone_key:
+                params.append({"b_id": row.id, "b_key": phone_key})
+        if params:
+            session.execute(update, params)
+        session.commit()
+
+        updated += len(params)
+        last_id = rows[-1].id
+    return updated